@@ -0,0 +1 @@
+"""Benchmarks for the lab builder's hot paths."""
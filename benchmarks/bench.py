@@ -0,0 +1,271 @@
+"""Benchmark the lab builder's hot paths with synthetic labs.
+
+Synthetic labs of increasing size are built from ordinary `Service` and
+`Node` subclasses. For each size the benchmark measures constructing the
+lab, generating its topology and checking `needs_reconfigure`, and then
+runs `start`, `run` and `stop` against stand-in `containerlab`, `docker`
+and `sudo` commands (see `benchmarks.fakes`) to count the subprocesses each
+one spawns. The results are written as JSON so runs can be compared.
+
+Usage:
+    python -m benchmarks.bench [--sizes 10 100 1000] [--latency SECONDS] [--output FILE]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shlex
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from benchmarks import fakes
+from lab_builder.lab import Lab, Service
+from lab_builder.node import LinuxNode
+from lab_builder.runner import check_running
+
+SIZES = [10, 100, 1000]
+NODES_PER_SERVICE = 50
+# How often the readiness watcher polls `containerlab inspect` during `start`
+POLL_INTERVAL = 0.05
+
+
+class BenchNode(LinuxNode):
+    """A node with the kind of configuration real labs have."""
+
+    image = "alpine:latest"
+    environment = {"ROLE": "bench"}
+    binds = ["data:/data"]
+    ports = []
+
+
+def synthetic_lab(size: int) -> type[Lab]:
+    """Create a lab class with `size` nodes.
+
+    The nodes are split into services of `NODES_PER_SERVICE` nodes, and the
+    nodes of each service are linked in a chain.
+
+    Args:
+        size (int): The number of nodes.
+
+    Returns:
+        type[Lab]: The lab class.
+    """
+    services = {}
+    for first in range(0, size, NODES_PER_SERVICE):
+        names = [f"node{index}" for index in range(first, min(first + NODES_PER_SERVICE, size))]
+        service_name = f"service{first // NODES_PER_SERVICE}"
+        services[service_name] = type(f"BenchService{size}_{service_name}", (Service,), {
+            "nodes": {name: BenchNode for name in names},
+            "links": {lhs: {"eth1": f"{rhs}:eth2"} for lhs, rhs in zip(names, names[1:])},
+        })
+    return type(f"BenchLab{size}", (Lab,), {"name": f"bench{size}", "services": services})
+
+
+@contextlib.contextmanager
+def stand_ins(latency: float = 0.0):
+    """Put the stand-in `containerlab`, `docker` and `sudo` commands on the PATH.
+
+    Args:
+        latency (float, optional): How long each `containerlab` and `docker`
+            invocation takes, in seconds. Defaults to 0.0.
+
+    Yields:
+        str: The directory the invocation log and deployed state are kept in.
+    """
+    directory = tempfile.mkdtemp(prefix="lab_builder-bench-")
+    bin_dir = os.path.join(directory, "bin")
+    state_dir = os.path.join(directory, "state")
+    os.makedirs(bin_dir)
+    os.makedirs(state_dir)
+    shims = {
+        tool: f'exec {shlex.quote(sys.executable)} {shlex.quote(fakes.__file__)} {tool} "$@"\n'
+        for tool in ["containerlab", "docker"]
+    }
+    shims["sudo"] = '[ "$1" = "-E" ] && shift\nexec "$@"\n'
+    for tool, script in shims.items():
+        path = os.path.join(bin_dir, tool)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(f"#!/bin/sh\n{script}")
+        os.chmod(path, 0o755)
+
+    environment = {
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "LAB_BUILDER_RUNTIME": "cli",
+        fakes.STATE_ENV: state_dir,
+        fakes.LATENCY_ENV: str(latency),
+    }
+    try:
+        with patch.dict(os.environ, environment):
+            yield state_dir
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def invocations(state_dir: str) -> list[list[str]]:
+    """Get the stand-in commands that have been run, in order."""
+    try:
+        with open(os.path.join(state_dir, fakes.LOG_FILE), encoding="utf-8") as log:
+            return [json.loads(line) for line in log]
+    except FileNotFoundError:
+        return []
+
+
+@contextlib.contextmanager
+def phase(state_dir: str):
+    """Measure the time and subprocesses of a block of code.
+
+    Yields:
+        dict: Filled in with `seconds`, `subprocesses` and a count of each
+        sub-command (`containerlab inspect`, ...) once the block finishes.
+    """
+    result = {}
+    before = len(invocations(state_dir))
+    start = time.perf_counter()
+    yield result
+    result["seconds"] = time.perf_counter() - start
+    commands = [" ".join(invocation[:2]) for invocation in invocations(state_dir)[before:]]
+    result["subprocesses"] = len(commands)
+    result["commands"] = dict(sorted(Counter(commands).items()))
+
+
+def timed(func, repeat: int) -> dict:
+    """Time a function, returning the median and best of `repeat` runs."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times)}
+
+
+def measure_definitions(lab_class: type[Lab], base_dir: str, repeat: int) -> dict:
+    """Measure lab construction, topology generation and `needs_reconfigure`."""
+    results = {"init": timed(lambda: lab_class(base_dir=base_dir), repeat)}
+
+    lab = lab_class(base_dir=base_dir)
+
+    def generate():
+        lab.changed()
+        return lab.topology
+
+    def serialize():
+        lab.changed()
+        return lab.topology_str
+
+    results["topology"] = timed(generate, repeat)
+    results["topology_str"] = timed(serialize, repeat)
+
+    os.makedirs(lab.state_directory, exist_ok=True)
+    results["write_topology"] = timed(lab.write_topology, repeat)
+    results["needs_reconfigure"] = timed(lambda: lab.needs_reconfigure, repeat)
+    return results
+
+
+def measure_lifecycle(lab_class: type[Lab], base_dir: str, state_dir: str) -> dict:
+    """Measure `start`, `run` and `stop` the way the lab runner calls them."""
+    lab = lab_class(base_dir=base_dir, lazy=True)
+    lab.readiness.poll_interval = POLL_INTERVAL
+    results = {}
+    # the lab's progress messages (and its hook summary) would drown out the results
+    with (
+        open(os.devnull, "w", encoding="utf-8") as devnull,
+        contextlib.redirect_stdout(devnull),
+        contextlib.redirect_stderr(devnull),
+    ):
+        with phase(state_dir) as results["start"]:
+            lab.invalidate_inspection()
+            lab.start()
+
+        node = next(iter(lab.nodes))
+        run = check_running(lambda runner: node.run_cmd(["true"]))
+        with phase(state_dir) as results["run"]:
+            lab.invalidate_inspection()
+            run(SimpleNamespace(lab=lab))
+
+        with phase(state_dir) as results["stop"]:
+            lab.invalidate_inspection()
+            lab.stop()
+    return results
+
+
+def run_benchmark(sizes: list[int] = None, latency: float = 0.0, repeat: int = 5) -> dict:
+    """Run the benchmark for each lab size.
+
+    Args:
+        sizes (list[int], optional): The numbers of nodes to benchmark. Defaults to `SIZES`.
+        latency (float, optional): How long each stand-in command takes, in seconds.
+        repeat (int, optional): How many times to repeat the in-process measurements.
+
+    Returns:
+        dict: The machine-readable results.
+    """
+    results = []
+    with stand_ins(latency) as state_dir:
+        for size in sizes or SIZES:
+            lab_class = synthetic_lab(size)
+            with tempfile.TemporaryDirectory(prefix="lab_builder-bench-") as base_dir:
+                result = {
+                    "nodes": size,
+                    "services": len(lab_class.services),
+                    **measure_definitions(lab_class, base_dir, repeat),
+                }
+            with tempfile.TemporaryDirectory(prefix="lab_builder-bench-") as base_dir:
+                result.update(measure_lifecycle(lab_class, base_dir, state_dir))
+            results.append(result)
+    return {
+        "benchmark": "lab_builder",
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": latency,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def summarize(report: dict, file=sys.stderr):
+    """Print a human readable table of the results."""
+    print(
+        f"{'nodes':>6} {'init':>9} {'topology':>9} {'topo str':>9} {'reconf?':>9}"
+        f" {'start':>9} {'procs':>5} {'run':>9} {'procs':>5} {'stop':>9} {'procs':>5}",
+        file=file,
+    )
+    for result in report["results"]:
+        columns = [f"{result['nodes']:>6}"]
+        for name in ["init", "topology", "topology_str", "needs_reconfigure"]:
+            columns.append(f"{result[name]['median'] * 1000:>7.2f}ms")
+        for name in ["start", "run", "stop"]:
+            columns.append(f"{result[name]['seconds']:>8.2f}s")
+            columns.append(f"{result[name]['subprocesses']:>5}")
+        print(" ".join(columns), file=file)
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench", description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="numbers of nodes to benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each stand-in command takes")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of the in-process measurements")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.sizes, latency=args.latency, repeat=args.repeat)
+    summarize(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
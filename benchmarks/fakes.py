@@ -0,0 +1,109 @@
+"""Stand-in `containerlab` and `docker` commands for benchmarking.
+
+The benchmark puts small shell shims named `containerlab`, `docker` and
+`sudo` on the PATH. The `containerlab` and `docker` shims run this module,
+which logs the invocation, sleeps for the configured latency and then
+answers the way the real command would, keeping just enough state (which
+nodes of which lab are deployed) to make `inspect` and `exec` consistent.
+
+The shims are configured with environment variables:
+    * LAB_BUILDER_BENCH_STATE - directory holding the log and the deployed state
+    * LAB_BUILDER_BENCH_LATENCY - seconds each invocation takes (default 0)
+"""
+import json
+import os
+import sys
+import time
+
+STATE_ENV = "LAB_BUILDER_BENCH_STATE"
+LATENCY_ENV = "LAB_BUILDER_BENCH_LATENCY"
+LOG_FILE = "invocations.log"
+DEPLOYED_FILE = "deployed.json"
+
+
+def _option(args: list[str], name: str, default=None):
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def _load(state_dir: str) -> dict:
+    try:
+        with open(os.path.join(state_dir, DEPLOYED_FILE), encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def _save(state_dir: str, deployed: dict):
+    path = os.path.join(state_dir, DEPLOYED_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(deployed, file)
+    # readers (the lab's readiness poll) never see a partial file
+    os.replace(f"{path}.tmp", path)
+
+
+def _node_filter(args: list[str], nodes: list[str]) -> list[str]:
+    node_filter = _option(args, "--node-filter")
+    if node_filter is None:
+        return nodes
+    return [node for node in nodes if node in node_filter.split(",")]
+
+
+def containerlab(state_dir: str, args: list[str]) -> int:
+    """Answer a `containerlab` sub-command."""
+    deployed = _load(state_dir)
+    command = args[0] if args else ""
+    if command == "inspect":
+        name = _option(args, "--name")
+        lab = deployed.get(name, {"topology_file": "", "nodes": []})
+        containers = [{
+            "lab_name": name,
+            "labPath": lab["topology_file"],
+            "name": f"clab-{name}-{node}",
+            "container_id": f"{index:012x}",
+            "image": "hello-world",
+            "kind": "linux",
+            "state": "running",
+            "status": "Up 1 second",
+        } for index, node in enumerate(lab["nodes"])]
+        print(json.dumps({"containers": containers}))
+    elif command in ["deploy", "destroy"]:
+        topology_file = _option(args, "--topo")
+        with open(topology_file, encoding="utf-8") as file:
+            topology = json.load(file)
+        name = topology["name"]
+        nodes = _node_filter(args, list(topology["topology"]["nodes"]))
+        lab = deployed.setdefault(name, {"topology_file": topology_file, "nodes": []})
+        lab["topology_file"] = topology_file
+        if command == "deploy":
+            lab["nodes"] = sorted(set(lab["nodes"]) | set(nodes))
+        else:
+            lab["nodes"] = sorted(set(lab["nodes"]) - set(nodes))
+        if not lab["nodes"]:
+            del deployed[name]
+        _save(state_dir, deployed)
+    elif command == "exec":
+        node = _option(args, "--label", "clab-node-name=").split("=", 1)[1]
+        result = {"cmd": _option(args, "--cmd"), "return-code": 0, "stdout": "", "stderr": ""}
+        print(json.dumps({node: [result]}))
+    return 0
+
+
+def docker(state_dir: str, args: list[str]) -> int:
+    """Answer a `docker` sub-command (every image already exists)."""
+    return 0
+
+
+def main(argv: list[str]) -> int:
+    """Run the stand-in command named by the first argument."""
+    tool, args = argv[0], argv[1:]
+    state_dir = os.environ[STATE_ENV]
+    with open(os.path.join(state_dir, LOG_FILE), "a", encoding="utf-8") as log:
+        log.write(json.dumps([tool, *args]) + "\n")
+    time.sleep(float(os.environ.get(LATENCY_ENV, "0") or 0))
+    return {"containerlab": containerlab, "docker": docker}[tool](state_dir, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,128 @@
+"""Benchmark how long the lab builder's entry points take to import.
+
+Each entry point is imported in a fresh interpreter with `-X importtime`,
+so nothing is cached between measurements, and the cumulative import time
+of the entry point's module is compared with its budget. Importing an
+entry point must also not load the modules only some commands need (the
+interactive shell's `cmd2`, `jinja2` templates, ...).
+
+Usage:
+    python -m benchmarks.startup [--repeat N] [--output FILE]
+
+The exit status is non-zero when an entry point is over its budget. The
+test suite only checks that the deferred modules aren't imported; the budgets
+are checked by the benchmark job, which runs this module or the test suite
+with `LAB_BUILDER_BENCHMARKS=1`.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# The cold import budget of each entry point, in milliseconds. These leave
+# room for slower machines; the imports take a fraction of them on a laptop.
+BUDGETS = {
+    "lab_builder.__main__": 75,
+    "lab_builder.cli": 75,
+    "lab_builder.lab": 125,
+    "lab_builder.node": 125,
+    "lab_builder.labs.nautobot.services": 175,
+}
+
+# Modules that are only imported by the commands that need them
+DEFERRED = ["cmd2", "jinja2", "platformdirs"]
+
+
+def import_time(module: str) -> tuple[float, list[str]]:
+    """Import a module in a fresh interpreter.
+
+    Returns:
+        tuple[float, list[str]]: The module's cumulative import time in seconds
+        and the deferred modules the import loaded.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    cumulative = None
+    loaded = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if name.strip() == module and not name[1:].startswith(" "):
+            cumulative = int(total) / 1_000_000
+        loaded.add(name.strip().split(".")[0])
+    return cumulative, sorted(loaded.intersection(DEFERRED))
+
+
+def run_benchmark(modules: list[str] = None, repeat: int = 5) -> dict:
+    """Measure the cold import time of the entry points."""
+    results = []
+    for module in modules or BUDGETS:
+        times = []
+        loaded = []
+        for _ in range(repeat):
+            seconds, loaded = import_time(module)
+            times.append(seconds)
+        results.append({
+            "module": module,
+            "median": statistics.median(times),
+            "min": min(times),
+            "budget": BUDGETS.get(module, 0) / 1000,
+            "deferred_loaded": loaded,
+        })
+    return {"python": sys.version.split()[0], "repeat": repeat, "results": results}
+
+
+def failures(report: dict) -> list[str]:
+    """Get the entry points that are over budget or load deferred modules."""
+    messages = []
+    for result in report["results"]:
+        if result["budget"] and result["min"] > result["budget"]:
+            messages.append(
+                f"{result['module']} took {result['min'] * 1000:.1f}ms to import"
+                f" (budget {result['budget'] * 1000:.0f}ms)"
+            )
+        if result["deferred_loaded"]:
+            messages.append(f"{result['module']} imports {', '.join(result['deferred_loaded'])}")
+    return messages
+
+
+def summarize(report: dict, file=sys.stderr):
+    """Print a human readable table of the results."""
+    print(f"{'module':<40} {'median':>9} {'min':>9} {'budget':>9}", file=file)
+    for result in report["results"]:
+        print(
+            f"{result['module']:<40} {result['median'] * 1000:>7.2f}ms {result['min'] * 1000:>7.2f}ms"
+            f" {result['budget'] * 1000:>7.0f}ms",
+            file=file,
+        )
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=5, help="imports of each entry point")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(repeat=args.repeat)
+    summarize(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    for message in failures(report):
+        print(f"FAIL: {message}", file=sys.stderr)
+    return 1 if failures(report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
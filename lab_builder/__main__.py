@@ -2,11 +2,20 @@
 """This is the main entrypoint for running `lab_builder` labs."""
 import sys
 
-from .runner import LabRunner
+from .cli import ACTIONS, COMMANDS, main
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(f"Usage: {sys.argv[0]} <path to lab>", file=sys.stderr)
+        print(f"       {sys.argv[0]} {{{','.join(ACTIONS)}}} <path to lab> [<path to lab> ...]", file=sys.stderr)
+        print(f"       {sys.argv[0]} batch <path to lab> <script>", file=sys.stderr)
+        print(f"       {sys.argv[0]} list [prefix]", file=sys.stderr)
         sys.exit(1)
 
+    if sys.argv[1] in COMMANDS:
+        sys.exit(main(sys.argv[1:]))
+
+    # the interactive shell (and cmd2) is only loaded when it is used
+    from .runner import LabRunner
+
     LabRunner(sys.argv[1]).cmdloop()
@@ -0,0 +1,241 @@
+"""Scripted, non-interactive lab sessions.
+
+A batch script has one step per line:
+
+    start
+    wait --timeout 300
+    run nautobot nautobot nautobot-server migrate
+    & run nautobot worker echo ready
+    & run nautobot scheduler echo ready
+    stop
+
+Every step runs against the same lab instance, so the lab module is imported
+and the lab is built once, and the lab's inspection snapshot is shared by the
+steps until a `start` or `stop` changes the lab's containers. Consecutive
+steps that start with `&` are independent of each other and run in parallel.
+
+A JSON object is written for each step as it finishes, which makes the
+results easy to consume from CI pipelines. What the steps print is captured
+in the step's `output`, and anything printed that can't be attributed to a
+step goes to stderr, so the results are the only thing written to stdout.
+The output of the commands the lab runs (such as `containerlab deploy`)
+isn't captured. `wait` steps time out after the lab's `ready_timeout`
+unless they are given a `--timeout`.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+from dataclasses import dataclass, field
+import io
+import json
+import shlex
+import sys
+import threading
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from lab_builder.lab import Lab
+
+ACTIONS = ["start", "run", "wait", "stop"]
+
+
+class BatchError(Exception):
+    """Raised when a batch script can't be parsed."""
+
+
+@dataclass
+class Step:
+    """A step of a batch script."""
+
+    line: int
+    action: str
+    args: list[str] = field(default_factory=list)
+    parallel: bool = False
+
+    def __str__(self):
+        return shlex.join([self.action, *self.args])
+
+
+def parse_script(lines: typing.Iterable[str]) -> list[Step]:
+    """Parse a batch script, skipping blank lines and `#` comments.
+
+    Raises:
+        BatchError: If a step isn't valid.
+    """
+    steps = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parallel = line.startswith("&")
+        try:
+            action, *args = shlex.split(line.removeprefix("&"))
+        except ValueError as ex:
+            raise BatchError(f"line {number}: {ex}") from ex
+        if action not in ACTIONS:
+            raise BatchError(f"line {number}: unknown action {action}")
+        if parallel and action in ["start", "stop"]:
+            raise BatchError(f"line {number}: {action} can't run in parallel")
+        if action == "run" and not args:
+            raise BatchError(f"line {number}: run requires a command")
+        steps.append(Step(number, action, args, parallel))
+    return steps
+
+
+def group_steps(steps: list[Step]) -> list[list[Step]]:
+    """Group the consecutive parallel steps together."""
+    groups = []
+    for step in steps:
+        if step.parallel and groups and groups[-1][0].parallel:
+            groups[-1].append(step)
+        else:
+            groups.append([step])
+    return groups
+
+
+class _StepOutput(io.TextIOBase):
+    """A stdout that collects the output of the running steps.
+
+    While a single step runs, everything that is printed (including by the
+    threads the step starts, such as the lab's hook workers) is the step's
+    output. While parallel steps run, each step's output is collected in the
+    thread running it, and what other threads print can't be attributed to a
+    step, so it goes to the fallback stream (stderr) instead of the results.
+    """
+
+    def __init__(self, fallback: typing.TextIO):
+        self.fallback = fallback
+        self.local = threading.local()
+        self.shared = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def capture(self, shared: bool) -> typing.Iterator[io.StringIO]:
+        buffer = io.StringIO()
+        if shared:
+            self.shared = buffer
+        else:
+            self.local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            if shared:
+                self.shared = None
+            else:
+                self.local.buffer = None
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, "buffer", None) or self.shared
+        if buffer is None:
+            return self.fallback.write(text)
+        with self._lock:
+            return buffer.write(text)
+
+    def flush(self):
+        self.fallback.flush()
+
+
+class Batch:
+    """Run batch scripts against a lab."""
+
+    def __init__(self, lab: "Lab", output: typing.TextIO = None, keep_going: bool = False):
+        """Initialize the batch.
+
+        Args:
+            lab (Lab): The lab the steps run against.
+            output (typing.TextIO, optional): Where the step results are written.
+                Defaults to stdout.
+            keep_going (bool, optional): Continue after a step fails, instead of
+                skipping the rest of the script.
+        """
+        self.lab = lab
+        self.output = output
+        self.keep_going = keep_going
+        self._lock = threading.Lock()
+        # whether the lab is known to be running (and reconfigured) since the
+        # last start or stop
+        self._verified = False
+
+    def _start(self, _: Step):
+        self.lab.start()
+        self._verified = False
+
+    def _stop(self, _: Step):
+        self.lab.stop()
+        self._verified = False
+
+    def _wait(self, step: Step):
+        args = list(step.args)
+        timeout = self.lab.ready_timeout
+        if "--timeout" in args:
+            index = args.index("--timeout")
+            try:
+                timeout = float(args[index + 1])
+            except (IndexError, ValueError) as ex:
+                raise BatchError("--timeout requires a number of seconds") from ex
+            del args[index:index + 2]
+        unknown = sorted(set(args) - {node.name for node in self.lab.nodes}) if args else []
+        if unknown:
+            raise BatchError(f"unknown nodes {', '.join(unknown)}")
+        if not self.lab.readiness.wait(args or None, timeout=timeout):
+            raise TimeoutError(f"Timed out after {timeout}s")
+
+    def _run(self, step: Step):
+        with self._lock:
+            if not self._verified:
+                if not self.lab.running:
+                    raise RuntimeError(f"{self.lab.name} is not running")
+                if self.lab.needs_reconfigure:
+                    self.lab.start()
+                self._verified = True
+        command = self.lab.get_command(step.args)
+        if command is None:
+            raise BatchError("run requires a command")
+        function, args = command
+        function(*args)
+
+    def _execute(self, step: Step, stdout: _StepOutput, shared: bool = False) -> dict:
+        result = {"line": step.line, "step": str(step), "status": "ok"}
+        started = time.monotonic()
+        with stdout.capture(shared) as output:
+            try:
+                getattr(self, f"_{step.action}")(step)
+            except Exception as ex:
+                result["status"] = "failed"
+                result["error"] = str(ex) or ex.__class__.__name__
+        result["elapsed"] = round(time.monotonic() - started, 3)
+        result["output"] = output.getvalue()
+        return result
+
+    def _emit(self, result: dict, output: typing.TextIO):
+        with self._lock:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    def run(self, steps: list[Step]) -> bool:
+        """Run the steps of a batch script.
+
+        Args:
+            steps (list[Step]): The parsed script.
+
+        Returns:
+            bool: Whether every step succeeded.
+        """
+        output = self.output or sys.stdout
+        stdout = _StepOutput(sys.stderr)
+        ok = True
+        with contextlib.redirect_stdout(stdout):
+            for group in group_steps(steps):
+                if not ok and not self.keep_going:
+                    for step in group:
+                        self._emit({"line": step.line, "step": str(step), "status": "skipped"}, output)
+                    continue
+                if len(group) == 1:
+                    results = [self._execute(group[0], stdout, shared=True)]
+                else:
+                    with ThreadPoolExecutor(max_workers=len(group)) as executor:
+                        results = list(executor.map(lambda step: self._execute(step, stdout), group))
+                for result in results:
+                    self._emit(result, output)
+                    ok = ok and result["status"] == "ok"
+        return ok
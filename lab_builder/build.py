@@ -0,0 +1,149 @@
+"""Container image builds for nodes defined with a `containerfile`.
+
+Images are tagged with a digest of the Containerfile and its build context,
+so an image only needs to be built when its inputs change. The
+`ImageBuilder` collects the images a lab needs, skips the ones that already
+exist locally and builds the rest concurrently.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import functools
+import hashlib
+import os
+import subprocess
+import typing
+
+from lab_builder.engine import EngineError
+
+if typing.TYPE_CHECKING:
+    from lab_builder.lab import Lab
+    from lab_builder.node import Node
+
+
+@dataclass
+class ImageBuild:
+    """An image to build from a Containerfile."""
+
+    tag: str
+    container_file: str
+
+    @property
+    def context(self) -> str:
+        """Get the build context directory."""
+        return os.path.dirname(self.container_file)
+
+
+def _context_signature(context: str) -> tuple:
+    signature = []
+    for root, dirs, files in os.walk(context):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            stat = os.stat(path)
+            signature.append((os.path.relpath(path, context), stat.st_mode, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+@functools.lru_cache(maxsize=None)
+def _context_digest(container_file: str, signature: tuple) -> str:
+    context = os.path.dirname(container_file)
+    digest = hashlib.sha256()
+    digest.update(os.path.relpath(container_file, context).encode())
+    for relative_path, mode, _, _ in signature:
+        digest.update(b"\0" + relative_path.encode() + b"\0" + oct(mode & 0o777).encode() + b"\0")
+        with open(os.path.join(context, relative_path), "rb") as file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def context_digest(container_file: str) -> str:
+    """Compute a digest of a Containerfile and its build context.
+
+    Every file in the Containerfile's directory (the build context) is
+    included. The digest is cached until a file in the context changes.
+
+    Args:
+        container_file (str): Absolute path to the Containerfile.
+
+    Returns:
+        str: The hex digest.
+    """
+    return _context_digest(container_file, _context_signature(os.path.dirname(container_file)))
+
+
+def image_tag(name: str, container_file: str) -> str:
+    """Get the content-addressed tag for an image built from a Containerfile."""
+    return f"lab_builder/{name.lower()}:{context_digest(container_file)[:16]}"
+
+
+class ImageBuilder:
+    """Build the images needed by a lab's nodes."""
+
+    def __init__(self, lab: "Lab", max_workers: int = 4):
+        """Initialize the builder.
+
+        Args:
+            lab (Lab): The lab whose commands and engine should be used.
+            max_workers (int, optional): The maximum number of concurrent builds. Defaults to 4.
+        """
+        self.lab = lab
+        self.max_workers = max_workers
+
+    def collect(self, nodes: typing.Iterable["Node"]) -> list[ImageBuild]:
+        """Get the distinct images the nodes need to have built."""
+        builds = {}
+        for node in nodes:
+            container_file = getattr(node, "container_file_path", None)
+            if container_file and node.image not in builds:
+                builds[node.image] = ImageBuild(node.image, container_file)
+        return list(builds.values())
+
+    def image_exists(self, tag: str) -> bool:
+        """Determine if an image is already present locally."""
+        if self.lab.engine is not None:
+            try:
+                self.lab.engine.request("GET", f"/images/{tag}/json")
+            except EngineError as ex:
+                if ex.status == 404:
+                    return False
+                raise
+            return True
+        process = self.lab.run_cmd(
+            ["docker", "image", "inspect", tag],
+            check=False,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return process.returncode == 0
+
+    def _build(self, build: ImageBuild):
+        print("Building", build.tag)
+        cmd = [
+            "docker",
+            "image",
+            "build",
+            "--tag",
+            build.tag,
+            "--file",
+            build.container_file,
+            build.context,
+        ]
+        with self.lab.tracer.span(f"build {build.tag}", "build", cmd=" ".join(cmd)):
+            self.lab.run_cmd(cmd)
+
+    def build(self, nodes: typing.Iterable["Node"]) -> list[ImageBuild]:
+        """Build the images that are missing for the given nodes.
+
+        Args:
+            nodes (typing.Iterable[Node]): The nodes that need images.
+
+        Returns:
+            list[ImageBuild]: The images that were built.
+        """
+        builds = [build for build in self.collect(nodes) if not self.image_exists(build.tag)]
+        if builds:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # consume the results so that build failures are raised
+                list(executor.map(self._build, builds))
+        return builds
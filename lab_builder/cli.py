@@ -0,0 +1,324 @@
+"""Non-interactive lab commands.
+
+`python -m lab_builder up|down|status <lab> [<lab>...]` starts, stops or
+reports on several labs at once. Each lab is handled in its own process,
+so the labs are brought up concurrently, and the exit status is non-zero
+if any of them failed.
+
+`python -m lab_builder batch <lab> <script>` runs a batch script (see
+`lab_builder.batch`) against a single lab.
+
+`python -m lab_builder list [prefix]` lists the labs that ship with
+`lab_builder` (see `lab_builder.discovery`), which can be given to the
+other commands by name instead of by path.
+
+Before any lab is started, the labs are checked for settings that can't
+coexist on one host: overlapping management subnets, custom management
+networks that are declared by more than one lab and host ports that are
+published by more than one node.
+"""
+import argparse
+import contextlib
+from dataclasses import asdict, dataclass
+import ipaddress
+import json
+import sys
+import typing
+
+from lab_builder.batch import Batch, BatchError, parse_script
+from lab_builder.loader import default_base_dir, load_lab
+
+if typing.TYPE_CHECKING:
+    from lab_builder.lab import Lab
+
+ACTIONS = ["up", "down", "status"]
+COMMANDS = [*ACTIONS, "batch", "list"]
+
+
+@dataclass
+class PortBinding:
+    """A host port published by a node."""
+
+    lab: str
+    node: str
+    host_ip: str
+    host_port: int
+    protocol: str
+
+    def conflicts(self, other: "PortBinding") -> bool:
+        """Determine if two bindings can't both be published on the same host."""
+        if (self.host_port, self.protocol) != (other.host_port, other.protocol):
+            return False
+        wildcard = ["", "0.0.0.0", "::"]
+        return self.host_ip == other.host_ip or self.host_ip in wildcard or other.host_ip in wildcard
+
+
+def parse_port(lab: str, node: str, port: str) -> typing.Optional[PortBinding]:
+    """Parse a port in docker's `[host_ip:]host_port:container_port[/protocol]` format.
+
+    Returns:
+        PortBinding: The host side of the port, or None if the port isn't published on the host.
+    """
+    port, _, protocol = port.partition("/")
+    parts = port.rsplit(":", 2)
+    if len(parts) < 2 or not parts[-2]:
+        return None
+    host_ip = parts[0].strip("[]") if len(parts) == 3 else ""
+    return PortBinding(lab, node, host_ip, int(parts[-2]), protocol or "tcp")
+
+
+def class_attribute(cls: type, name: str, default=None):
+    """Get the value a definition class gives a config attribute, without creating the definition."""
+    for attribute in cls.schema():
+        if attribute.name == name:
+            return attribute.default
+    return default
+
+
+def node_ports(lab: "Lab") -> typing.Iterator[tuple[str, str]]:
+    """Get the ports of a lab's nodes from the lab's classes.
+
+    The services and nodes aren't created, so their `created` hooks don't run.
+
+    Yields:
+        tuple[str, str]: The node name and one of its ports.
+    """
+    for service_class in getattr(type(lab), "services", {}).values():
+        service_ports = class_attribute(service_class, "ports") or {}
+        for node_name, node_class in (class_attribute(service_class, "nodes") or {}).items():
+            for port in [*service_ports.get(node_name, []), *(class_attribute(node_class, "ports") or [])]:
+                yield node_name, port
+
+
+def find_conflicts(labs: list["Lab"]) -> list[str]:
+    """Find the settings that prevent the labs from running at the same time.
+
+    Only the labs' classes and settings are read, so the labs can be
+    constructed with `lazy=True`.
+
+    Args:
+        labs (list[Lab]): The labs that should run together.
+
+    Returns:
+        list[str]: A description of each conflict.
+    """
+    conflicts = []
+    seen = {}
+    for lab in labs:
+        if lab.name in seen:
+            conflicts.append(f"{lab.name} is listed more than once")
+        seen[lab.name] = lab
+
+    subnets = []
+    for lab in labs:
+        subnet = getattr(lab, "ipv4_subnet", None)
+        if subnet:
+            network = ipaddress.ip_network(subnet)
+            for other, other_network in subnets:
+                if network.overlaps(other_network):
+                    conflicts.append(f"{lab.name} ({network}) and {other} ({other_network}) have overlapping subnets")
+            subnets.append((lab.name, network))
+
+    # labs with a custom management subnet all declare the same docker network,
+    # so they can't run together whether or not their subnets overlap
+    networks = {}
+    for lab in labs:
+        network = (lab.mgmt or {}).get("network")
+        if network:
+            for other in networks.get(network, []):
+                conflicts.append(f"{lab.name} and {other} both use the {network} management network")
+            networks.setdefault(network, []).append(lab.name)
+
+    bindings = []
+    for lab in labs:
+        for node_name, port in node_ports(lab):
+            binding = parse_port(lab.name, node_name, port)
+            if binding is None:
+                continue
+            for other in bindings:
+                if binding.conflicts(other):
+                    conflicts.append(
+                        f"{binding.lab}/{binding.node} and {other.lab}/{other.node} both publish "
+                        f"{binding.host_ip or '*'}:{binding.host_port}/{binding.protocol}"
+                    )
+            bindings.append(binding)
+    return conflicts
+
+
+class PrefixWriter:
+    """Prefix every line written to a stream with the lab's name."""
+
+    def __init__(self, prefix: str, stream: typing.TextIO):
+        self.prefix = prefix
+        self.stream = stream
+        self._line_start = True
+
+    def write(self, text: str) -> int:
+        for line in text.splitlines(keepends=True):
+            if self._line_start:
+                self.stream.write(f"{self.prefix}: ")
+            self.stream.write(line)
+            self._line_start = line.endswith("\n")
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def run_action(action: str, path: str, base_dir: str) -> tuple[str, bool, str]:
+    """Run an action on one lab (in a worker process).
+
+    Args:
+        action (str): One of `up`, `down` or `status`.
+        path (str): The lab module's path.
+        base_dir (str): The directory the lab keeps its state in.
+
+    Returns:
+        tuple[str, bool, str]: The lab path, whether the action succeeded and a summary.
+    """
+    lab = load_lab(path)(base_dir=base_dir, lazy=True)
+    with (
+        contextlib.redirect_stdout(PrefixWriter(lab.name, sys.stdout)),
+        contextlib.redirect_stderr(PrefixWriter(lab.name, sys.stderr)),
+    ):
+        try:
+            if action == "up":
+                lab.start()
+                return path, True, f"{lab.name} is up"
+            if action == "down":
+                lab.stop()
+                return path, True, f"{lab.name} is down"
+            containers = lab.running_containers
+            state = "running" if lab.running else "stopped" if not containers else "partially running"
+            # the report succeeded, whatever state the lab is in
+            return path, True, f"{lab.name} is {state} ({len(containers)} container(s))"
+        except Exception as ex:
+            return path, False, f"{lab.name} failed to {action}: {ex}"
+
+
+def run(action: str, paths: list[str], base_dir: str = None, jobs: int = None, check: bool = True) -> int:
+    """Run an action on several labs concurrently.
+
+    Args:
+        action (str): One of `up`, `down` or `status`.
+        paths (list[str]): The lab modules' paths.
+        base_dir (str, optional): The directory the labs keep their state in.
+            Defaults to the user's data directory.
+        jobs (int, optional): The maximum number of labs to handle at once.
+            Defaults to all of them.
+        check (bool, optional): Check the labs for conflicts before bringing them up.
+
+    Returns:
+        int: The exit status: 0 when the action succeeded for every lab, 1 when
+        it failed for any lab and 2 when the labs conflict.
+    """
+    base_dir = base_dir or default_base_dir()
+    if action == "up" and check:
+        conflicts = find_conflicts([load_lab(path)(base_dir=base_dir, lazy=True) for path in paths])
+        if conflicts:
+            for conflict in conflicts:
+                print(f"Conflict: {conflict}", file=sys.stderr)
+            return 2
+
+    # the process pool machinery is only needed once the labs are handled
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    status = 0
+    with ProcessPoolExecutor(max_workers=jobs or len(paths)) as executor:
+        futures = [executor.submit(run_action, action, path, base_dir) for path in paths]
+        for future in as_completed(futures):
+            try:
+                _, ok, summary = future.result()
+            except Exception as ex:
+                ok, summary = False, f"failed: {ex}"
+            print(("ok    " if ok else "FAIL  ") + summary)
+            if not ok:
+                status = 1
+    return status
+
+
+def run_batch(path: str, script: str, base_dir: str = None, output: str = None, keep_going: bool = False) -> int:
+    """Run a batch script against a lab.
+
+    Args:
+        path (str): The lab module's path.
+        script (str): The batch script's path, or `-` to read it from stdin.
+        base_dir (str, optional): The directory the lab keeps its state in.
+            Defaults to the user's data directory.
+        output (str, optional): The file the step results are written to.
+            Defaults to stdout.
+        keep_going (bool, optional): Continue after a step fails.
+
+    Returns:
+        int: The exit status: 0 when every step succeeded, 1 when a step
+        failed and 2 when the script isn't valid.
+    """
+    try:
+        if script == "-":
+            steps = parse_script(sys.stdin)
+        else:
+            with open(script, encoding="utf-8") as file:
+                steps = parse_script(file)
+    except (OSError, BatchError) as ex:
+        print(f"Error: {ex}", file=sys.stderr)
+        return 2
+
+    lab = load_lab(path)(base_dir=base_dir or default_base_dir(), lazy=True)
+    with contextlib.ExitStack() as stack:
+        stream = stack.enter_context(open(output, "w", encoding="utf-8")) if output else None
+        ok = Batch(lab, output=stream, keep_going=keep_going).run(steps)
+    return 0 if ok else 1
+
+
+def list_labs(prefix: str = "", names: bool = False, as_json: bool = False) -> int:
+    """Print the labs found by the discovery index.
+
+    Args:
+        prefix (str, optional): Only list the labs whose names start with the prefix.
+        names (bool, optional): Only print the names, one per line (for shell completion).
+        as_json (bool, optional): Print the labs as JSON.
+    """
+    from lab_builder.discovery import LabIndex
+
+    labs = LabIndex().matching(prefix)
+    if as_json:
+        print(json.dumps([asdict(lab) for lab in labs], indent=2))
+    elif names:
+        for lab in labs:
+            print(lab.name)
+    else:
+        width = max([len(lab.name) for lab in labs], default=0)
+        for lab in labs:
+            print(f"{lab.name:<{width}}  {lab.path}")
+            if lab.description:
+                print(f"{'':<{width}}  {lab.description}")
+    return 0
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the non-interactive commands."""
+    parser = argparse.ArgumentParser(prog="python -m lab_builder", description="Manage labs non-interactively.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for action, description in zip(ACTIONS, ["start the labs", "stop the labs", "report on the labs"]):
+        command = commands.add_parser(action, help=description)
+        command.add_argument("labs", nargs="+", help="names of the labs or paths of the lab modules")
+        command.add_argument("--jobs", "-j", type=int, help="the maximum number of labs to handle at once")
+        command.add_argument("--base-dir", help="the directory labs keep their state in")
+        command.add_argument("--ignore-conflicts", action="store_true", help="skip the subnet and port checks")
+    command = commands.add_parser("batch", help="run a batch script against a lab")
+    command.add_argument("lab", help="name of the lab or path of the lab module")
+    command.add_argument("script", help="path of the batch script, or - for stdin")
+    command.add_argument("--base-dir", help="the directory the lab keeps its state in")
+    command.add_argument("--output", "-o", help="write the step results to a file instead of stdout")
+    command.add_argument("--keep-going", action="store_true", help="continue after a step fails")
+    command = commands.add_parser("list", help="list the labs that ship with lab_builder")
+    command.add_argument("prefix", nargs="?", default="", help="only list the labs whose names start with this")
+    command.add_argument("--names", action="store_true", help="only print the names of the labs")
+    command.add_argument("--json", action="store_true", help="print the labs as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        return list_labs(args.prefix, names=args.names, as_json=args.json)
+    if args.command == "batch":
+        return run_batch(args.lab, args.script, args.base_dir, args.output, args.keep_going)
+    return run(args.command, args.labs, base_dir=args.base_dir, jobs=args.jobs, check=not args.ignore_conflicts)
@@ -0,0 +1,86 @@
+"""Tab-completion index for the lab runner.
+
+Completing `run <service> <node> ...` used to look up each level's
+commands (with `inspect.getmembers`) and children on every keystroke. The
+completion index walks the lab's definitions once and keeps the commands
+and child names of every level in a sorted list, so completing a word is a
+dictionary lookup per level and a binary search at the last one, however
+many nodes the lab has. The lab discards its index whenever its definitions
+change, and the index is built again on the next completion.
+"""
+import bisect
+from dataclasses import dataclass, field
+import functools
+import inspect
+import typing
+
+
+@functools.cache
+def class_commands(cls: type) -> tuple[str, ...]:
+    """Get the names of the commands (`do_*` methods) a definition class provides."""
+    return tuple(
+        name.removeprefix("do_")
+        for name, member in inspect.getmembers(cls)
+        if name.startswith("do_") and inspect.isfunction(member)
+    )
+
+
+@dataclass
+class CompletionNode:
+    """The commands and children of one definition."""
+
+    definition: typing.Any
+    commands: frozenset[str]
+    children: dict[str, "CompletionNode"] = field(default_factory=dict)
+    # the command and child names, sorted for prefix searches
+    names: list[str] = field(default_factory=list)
+
+    def matches(self, prefix: str) -> list[str]:
+        """Get the command and child names that start with a prefix."""
+        matches = []
+        for name in self.names[bisect.bisect_left(self.names, prefix):]:
+            if not name.startswith(prefix):
+                break
+            matches.append(name)
+        return matches
+
+
+def build_node(definition: typing.Any) -> CompletionNode:
+    """Build the completion trie of a definition and its children."""
+    commands = frozenset(class_commands(definition.__class__))
+    children = {name: build_node(child) for name, child in definition.children.items()}
+    return CompletionNode(definition, commands, children, sorted({*commands, *children}))
+
+
+class CompletionIndex:
+    """The precomputed completions of a lab."""
+
+    def __init__(self, definition: typing.Any):
+        """Build the index.
+
+        Args:
+            definition (Definition): The top most definition (usually the lab).
+        """
+        self.root = build_node(definition)
+
+    def complete(self, commands: list[str], command: str, text: str) -> list[str]:
+        """Perform the tab-completion, like `Definition.complete`.
+
+        Args:
+            commands (list[str]): commands split from the command line by spaces.
+            command (str): The trailing command, to be looked up.
+            text (str): The completion text.
+
+        Returns:
+            list[str]: List of possible completions
+        """
+        node = self.root
+        for index, name in enumerate(commands):
+            if name in node.commands:
+                # commands can complete their own arguments
+                complete = getattr(node.definition, f"complete_{name}", None)
+                return complete(commands[index + 1:], command, text) if complete else []
+            if name not in node.children:
+                break
+            node = node.children[name]
+        return [text + match[len(command):] for match in node.matches(command)]
@@ -1,5 +1,30 @@
+"""Decorators for lab definitions."""
+
 
 def command(method_to_decorate: callable):
     cls = method_to_decorate.__class__
 
     return method_to_decorate
+
+
+def after(*names: str):
+    """Order a lifecycle hook after the same hook of other definitions.
+
+    Lifecycle hooks (such as `started`) of independent definitions may run
+    concurrently. This decorator adds ordering hints on top of the ordering
+    already implied by node `dependencies`. Names are looked up among the
+    definition's siblings first and then among all of the lab's nodes.
+
+    Example:
+        class NautobotWithGitService(NautobotService):
+            @after("suzieq")
+            def started(self):
+                ...
+
+    Args:
+        names (str): Names of the definitions whose hooks must finish first.
+    """
+    def decorator(method):
+        method.after = names
+        return method
+    return decorator
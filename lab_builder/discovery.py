@@ -0,0 +1,224 @@
+"""Discovery of the labs that ship with `lab_builder`.
+
+The lab modules in `lab_builder.labs` are found by parsing them, not by
+importing them: importing a lab module builds its service tree and imports
+whatever the services need (jinja2, ...). A module is a lab module when it
+assigns a `Lab` subclass to its `lab` variable, which is what `load_lab`
+uses, and the lab's `name` and `description` are read from the class
+body, or the lab classes it extends.
+
+What was parsed from each file is cached on disk along with the file's
+modification time and size, so only new and changed files are parsed again.
+"""
+import ast
+from dataclasses import dataclass
+import json
+import os
+import typing
+
+# Bumped when the format of the cached entries changes
+INDEX_VERSION = 1
+
+LABS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "labs")
+
+
+@dataclass
+class LabInfo:
+    """A lab found by the discovery index."""
+
+    name: str
+    description: str
+    # the lab module's path, as accepted by `load_lab` (`lab_builder/labs/ldap/labs.py`)
+    path: str
+    class_name: str
+
+
+def _string(node: ast.AST) -> typing.Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _base_name(node: ast.AST) -> typing.Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def package_root(directory: str) -> str:
+    """Get the directory that a package's top-level package is in."""
+    while os.path.isfile(os.path.join(directory, "__init__.py")):
+        directory = os.path.dirname(directory)
+    return directory
+
+
+def scan_file(path: str) -> dict:
+    """Parse a python file for its classes and its `lab` variable.
+
+    Returns:
+        dict: The file's classes (their bases, `name`, `description` and
+        docstring) and the name of the class assigned to `lab`, if any.
+    """
+    with open(path, encoding="utf-8") as file:
+        try:
+            tree = ast.parse(file.read(), filename=path)
+        except SyntaxError:
+            return {"classes": {}, "lab": None}
+
+    classes = {}
+    lab = None
+    for statement in tree.body:
+        if isinstance(statement, ast.ClassDef):
+            attributes = {}
+            for item in statement.body:
+                if isinstance(item, ast.Assign):
+                    targets, value = item.targets, item.value
+                elif isinstance(item, ast.AnnAssign) and item.value is not None:
+                    targets, value = [item.target], item.value
+                else:
+                    continue
+                for target in targets:
+                    if isinstance(target, ast.Name) and target.id in ["name", "description"]:
+                        attributes[target.id] = _string(value)
+            docstring = ast.get_docstring(statement)
+            classes[statement.name] = {
+                "bases": [name for name in map(_base_name, statement.bases) if name],
+                "docstring": docstring.splitlines()[0] if docstring else None,
+                **attributes,
+            }
+        elif isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Name):
+            if any(isinstance(target, ast.Name) and target.id == "lab" for target in statement.targets):
+                lab = statement.value.id
+    return {"classes": classes, "lab": lab}
+
+
+class LabIndex:
+    """An index of the lab modules in a directory, cached on disk."""
+
+    def __init__(self, cache_file: str = None, directory: str = LABS_DIRECTORY):
+        """Initialize the index.
+
+        Args:
+            cache_file (str, optional): The file the index is cached in. Defaults
+                to `discovery.json` in the user's lab_builder data directory.
+            directory (str, optional): The directory to scan. Defaults to the
+                `lab_builder.labs` package.
+        """
+        if cache_file is None:
+            from lab_builder.loader import default_base_dir
+
+            cache_file = os.path.join(default_base_dir(), "discovery.json")
+        self.cache_file = cache_file
+        self.directory = directory
+        self._labs = None
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_file, encoding="utf-8") as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != INDEX_VERSION or cache.get("directory") != self.directory:
+            return {}
+        return cache.get("files", {})
+
+    def _save_cache(self, files: dict):
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump({"version": INDEX_VERSION, "directory": self.directory, "files": files}, file)
+        os.replace(tmp_file, self.cache_file)
+
+    def scan(self) -> dict[str, dict]:
+        """Scan the directory, parsing only the files that changed since the index was cached.
+
+        Returns:
+            dict[str, dict]: What was parsed from each file, keyed by the file's
+            path relative to the directory.
+        """
+        cached = self._load_cache()
+        files = {}
+        for root, dirs, names in os.walk(self.directory):
+            dirs[:] = sorted(name for name in dirs if not name.startswith((".", "__pycache__")))
+            for name in sorted(names):
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                key = os.path.relpath(path, self.directory)
+                entry = cached.get(key)
+                if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                    entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, **scan_file(path)}
+                files[key] = entry
+        if files != cached:
+            self._save_cache(files)
+        return files
+
+    def labs(self) -> list[LabInfo]:
+        """Get the labs in the directory, sorted by name."""
+        if self._labs is not None:
+            return self._labs
+
+        files = self.scan()
+        classes = {}
+        for entry in files.values():
+            for class_name, info in entry["classes"].items():
+                classes.setdefault(class_name, info)
+
+        def attribute(class_name: str, name: str, seen: set) -> typing.Optional[str]:
+            info = classes.get(class_name)
+            if info is None or class_name in seen:
+                return None
+            seen.add(class_name)
+            if info.get(name) is not None:
+                return info[name]
+            for base in info["bases"]:
+                value = attribute(base, name, seen)
+                if value is not None:
+                    return value
+            return None
+
+        def is_lab(class_name: str, seen: set) -> bool:
+            info = classes.get(class_name)
+            if info is None or class_name in seen:
+                return False
+            seen.add(class_name)
+            return "Lab" in info["bases"] or any(is_lab(base, seen) for base in info["bases"])
+
+        labs = []
+        package = os.path.relpath(self.directory, package_root(self.directory))
+        for key, entry in files.items():
+            class_name = entry["lab"]
+            if class_name is None or class_name not in entry["classes"] or not is_lab(class_name, set()):
+                continue
+            labs.append(
+                LabInfo(
+                    name=attribute(class_name, "name", set()) or class_name,
+                    description=(
+                        attribute(class_name, "description", set())
+                        or attribute(class_name, "docstring", set())
+                        or ""
+                    ),
+                    path=os.path.join(package, key).replace(os.sep, "/"),
+                    class_name=class_name,
+                )
+            )
+        self._labs = sorted(labs, key=lambda lab: lab.name.lower())
+        return self._labs
+
+    def find(self, name: str) -> typing.Optional[LabInfo]:
+        """Find a lab by its name (case insensitive)."""
+        for lab in self.labs():
+            if lab.name.lower() == name.lower():
+                return lab
+        return None
+
+    def matching(self, prefix: str) -> list[LabInfo]:
+        """Get the labs whose names start with a prefix (case insensitive)."""
+        return [lab for lab in self.labs() if lab.name.lower().startswith(prefix.lower())]
+
+    def complete(self, text: str) -> list[str]:
+        """Get the names of the labs that start with `text`."""
+        return [lab.name for lab in self.matching(text)]
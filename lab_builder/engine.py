@@ -0,0 +1,302 @@
+"""A minimal Docker Engine API client.
+
+Running `docker` or `sudo containerlab exec` for every container operation
+pays for a process spawn, `sudo` and the CLI's own startup each time. The
+`DockerEngine` client talks to the Docker Engine HTTP API directly over its
+unix socket instead, keeping a small pool of persistent connections so that
+execs, container listings and health checks are a single HTTP round trip.
+"""
+import contextlib
+import http.client
+import json
+import os
+import queue
+import shlex
+import socket
+import struct
+import typing
+from urllib.parse import quote, urlencode
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+API_VERSION = "v1.41"
+
+
+class EngineError(Exception):
+    """Raised when the Docker Engine API returns an error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker Engine API error {status}: {message}")
+        self.status = status
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection over a unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class EventStream:
+    """A stream of Docker Engine events.
+
+    Iterating the stream blocks until the next event arrives. `close` may be
+    called from another thread to stop an iteration that is waiting.
+    """
+
+    def __init__(self, connection: UnixHTTPConnection, response: http.client.HTTPResponse):
+        self.connection = connection
+        self.response = response
+
+    def __iter__(self) -> typing.Iterator[dict]:
+        try:
+            for line in self.response:
+                if line.strip():
+                    yield json.loads(line)
+        except (OSError, ValueError, http.client.HTTPException, AttributeError):
+            # the stream was closed
+            return
+
+    def close(self):
+        """Stop the stream."""
+        if self.connection.sock is not None:
+            try:
+                self.connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.connection.close()
+
+
+def demultiplex(data: bytes) -> tuple[bytes, bytes]:
+    """Split a multiplexed Docker stream into its stdout and stderr parts.
+
+    Each frame of the stream is an 8 byte header (stream type, three padding
+    bytes and a big-endian payload size) followed by the payload.
+
+    Args:
+        data (bytes): The multiplexed stream.
+
+    Returns:
+        tuple[bytes, bytes]: The stdout and stderr content.
+    """
+    streams = {1: bytearray(), 2: bytearray()}
+    offset = 0
+    while offset + 8 <= len(data):
+        stream_type, size = struct.unpack(">BxxxL", data[offset:offset + 8])
+        offset += 8
+        streams.get(stream_type, streams[1]).extend(data[offset:offset + size])
+        offset += size
+    return bytes(streams[1]), bytes(streams[2])
+
+
+class DockerEngine:
+    """Docker Engine API client using pooled unix socket connections."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, pool_size: int = 4, timeout: float = None):
+        """Initialize the client.
+
+        Args:
+            socket_path (str, optional): Path to the Docker Engine's unix socket.
+            pool_size (int, optional): The maximum number of idle connections to keep
+                open. Defaults to 4.
+            timeout (float, optional): Socket timeout in seconds. Defaults to None (no timeout).
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    @classmethod
+    def from_environment(cls) -> typing.Optional["DockerEngine"]:
+        """Get a client for the local Docker Engine, if it can be reached.
+
+        The socket is taken from `DOCKER_HOST` when it is a `unix://` URL.
+        Setting `LAB_BUILDER_RUNTIME=cli` disables the API client entirely.
+
+        Returns:
+            DockerEngine: The client, or None when the engine is not reachable
+            (in which case the `docker`/`containerlab` commands should be used).
+        """
+        if os.environ.get("LAB_BUILDER_RUNTIME", "") == "cli":
+            return None
+        socket_path = DEFAULT_SOCKET
+        docker_host = os.environ.get("DOCKER_HOST", "")
+        if docker_host:
+            if not docker_host.startswith("unix://"):
+                return None
+            socket_path = docker_host.removeprefix("unix://")
+        if not os.access(socket_path, os.R_OK | os.W_OK):
+            return None
+        engine = cls(socket_path)
+        try:
+            engine.ping()
+        except (OSError, EngineError, http.client.HTTPException):
+            return None
+        return engine
+
+    @contextlib.contextmanager
+    def _connection(self):
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+        try:
+            yield connection
+        except BaseException:
+            connection.close()
+            raise
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, method: str, path: str, params: dict = None, body: dict = None) -> bytes:
+        """Send a request to the engine and return the response body.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API path (without the version prefix).
+            params (dict, optional): Query parameters.
+            body (dict, optional): JSON request body.
+
+        Raises:
+            EngineError: If the engine responds with an error status.
+
+        Returns:
+            bytes: The response body.
+        """
+        url = f"/{API_VERSION}{path}"
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+
+        with self._connection() as connection:
+            connection.request(method, url, body=payload, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        if response.status >= 400:
+            try:
+                message = json.loads(data)["message"]
+            except (ValueError, KeyError):
+                message = data.decode(errors="replace")
+            raise EngineError(response.status, message)
+        return data
+
+    def request_json(self, method: str, path: str, params: dict = None, body: dict = None):
+        """Send a request to the engine and return the decoded JSON response."""
+        data = self.request(method, path, params=params, body=body)
+        if not data:
+            return None
+        return json.loads(data)
+
+    def ping(self) -> bool:
+        """Check that the engine is responding."""
+        return self.request("GET", "/_ping") == b"OK"
+
+    def containers(self, labels: dict[str, str] = None, all_containers: bool = True) -> list[dict]:
+        """List containers, optionally filtered by label.
+
+        Args:
+            labels (dict[str, str], optional): Labels (and their values) the
+                containers must have.
+            all_containers (bool, optional): Include stopped containers. Defaults to True.
+
+        Returns:
+            list[dict]: The engine's container summaries.
+        """
+        params = {"all": "1" if all_containers else "0"}
+        if labels:
+            params["filters"] = json.dumps({"label": [f"{key}={value}" for key, value in labels.items()]})
+        return self.request_json("GET", "/containers/json", params=params)
+
+    def inspect_container(self, container: str) -> dict:
+        """Get the low-level details of a container."""
+        return self.request_json("GET", f"/containers/{quote(container)}/json")
+
+    def health(self, container: str) -> str:
+        """Get a container's health status.
+
+        Returns:
+            str: The health status (`starting`, `healthy` or `unhealthy`) for
+            containers with a health check, otherwise the container's state
+            (`created`, `running`, `exited`, ...).
+        """
+        state = self.inspect_container(container)["State"]
+        if state.get("Health"):
+            return state["Health"]["Status"]
+        return state["Status"]
+
+    def pause(self, container: str):
+        """Freeze all of the processes in a container."""
+        self.request("POST", f"/containers/{quote(container)}/pause")
+
+    def unpause(self, container: str):
+        """Resume the processes of a paused container."""
+        self.request("POST", f"/containers/{quote(container)}/unpause")
+
+    def events(self, filters: dict[str, list[str]]) -> EventStream:
+        """Subscribe to the engine's events.
+
+        The stream uses its own connection rather than one from the pool,
+        since it stays open for as long as events are wanted.
+
+        Args:
+            filters (dict[str, list[str]]): Event filters (for example
+                `{"type": ["container"], "label": ["containerlab=lab"]}`).
+
+        Raises:
+            EngineError: If the engine responds with an error status.
+
+        Returns:
+            EventStream: The events, as they happen.
+        """
+        connection = UnixHTTPConnection(self.socket_path)
+        connection.request("GET", f"/{API_VERSION}/events?{urlencode({'filters': json.dumps(filters)})}")
+        response = connection.getresponse()
+        if response.status >= 400:
+            message = response.read().decode(errors="replace")
+            connection.close()
+            raise EngineError(response.status, message)
+        return EventStream(connection, response)
+
+    def exec(self, container: str, cmd: typing.Union[str, list[str]], working_directory: str = None) -> dict:
+        """Run a command in a container and wait for it to finish.
+
+        Args:
+            container (str): The container name or ID.
+            cmd (typing.Union[str, list[str]]): The command. Strings are split
+                the same way `containerlab exec --cmd` splits them.
+            working_directory (str, optional): The working directory for the command.
+
+        Returns:
+            dict: The result in the same form `containerlab exec --format json`
+            reports it (`return-code`, `stdout` and `stderr`).
+        """
+        if isinstance(cmd, str):
+            cmd = shlex.split(cmd)
+        config = {
+            "AttachStdout": True,
+            "AttachStderr": True,
+            "Tty": False,
+            "Cmd": cmd,
+        }
+        if working_directory:
+            config["WorkingDir"] = working_directory
+        exec_id = self.request_json("POST", f"/containers/{quote(container)}/exec", body=config)["Id"]
+        stdout, stderr = demultiplex(self.request("POST", f"/exec/{exec_id}/start", body={"Detach": False, "Tty": False}))
+        details = self.request_json("GET", f"/exec/{exec_id}/json")
+        return {
+            "cmd": cmd,
+            "return-code": details["ExitCode"],
+            "stdout": stdout.decode(errors="replace"),
+            "stderr": stderr.decode(errors="replace"),
+        }
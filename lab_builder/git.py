@@ -0,0 +1,106 @@
+"""Host-side seeding of bare git repositories.
+
+A git server node serves bare repositories from one of its named binds. The
+repositories are seeded from directories on the host (such as a lab's
+`config-contexts`) with the host's `git`, writing straight into the bound
+bare repository with a private index file. Nothing is run in the container,
+and a directory is only committed again when its tree hash changes.
+"""
+import os
+import subprocess
+import typing
+
+# Who the seeded commits are attributed to
+AUTHOR = {
+    "GIT_AUTHOR_NAME": "Operator",
+    "GIT_AUTHOR_EMAIL": "operator@company.com",
+    "GIT_COMMITTER_NAME": "Operator",
+    "GIT_COMMITTER_EMAIL": "operator@company.com",
+}
+
+# The index is kept in the bare repository, so that `git add` only needs to
+# hash the files that changed since the last sync
+INDEX_FILE = "lab_builder.index"
+
+
+def _git(repository: str, *args: str, work_tree: str = None, index: str = None) -> str:
+    env = {
+        **os.environ,
+        **AUTHOR,
+        "GIT_DIR": repository,
+        # the operator's own configuration (hooks, signing, ...) shouldn't
+        # change what is committed
+        "GIT_CONFIG_NOSYSTEM": "1",
+        "GIT_CONFIG_GLOBAL": os.devnull,
+    }
+    if work_tree:
+        env["GIT_WORK_TREE"] = work_tree
+    if index:
+        env["GIT_INDEX_FILE"] = index
+    process = subprocess.run(
+        ["git", *args],
+        env=env,
+        cwd=work_tree or repository,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    return process.stdout.strip()
+
+
+def is_writable(repository: str) -> bool:
+    """Determine if the current user can commit to a repository.
+
+    Repositories that were seeded in the git server's container are owned by
+    the container's users, so the host's `git` can't add objects or move refs.
+    """
+    for directory, _, _ in os.walk(repository):
+        if not os.access(directory, os.W_OK):
+            return False
+    return True
+
+
+def init_repository(repository: str, branch: str = "main"):
+    """Create a bare repository that the git server's user can read."""
+    os.makedirs(os.path.dirname(repository), exist_ok=True)
+    subprocess.run(
+        ["git", "init", "--quiet", "--bare", "--shared=all", f"--initial-branch={branch}", repository],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+
+
+def sync_repository(source: str, repository: str, branch: str = "main", message: str = None) -> typing.Optional[str]:
+    """Commit the contents of a directory to a bare repository, if they changed.
+
+    Args:
+        source (str): The directory whose contents should be committed.
+        repository (str): The bare repository (created if it doesn't exist).
+        branch (str, optional): The branch to commit to. Defaults to "main".
+        message (str, optional): The commit message. Defaults to "Initial Commit"
+            for the first commit and "Update from <source>" after that.
+
+    Returns:
+        str: The new commit, or None if the directory's tree was already committed.
+    """
+    if not os.path.isdir(repository):
+        init_repository(repository, branch)
+    index = os.path.join(repository, INDEX_FILE)
+    _git(repository, "add", "--all", work_tree=source, index=index)
+    tree = _git(repository, "write-tree", index=index)
+
+    try:
+        parent = _git(repository, "rev-parse", "--verify", "--quiet", f"refs/heads/{branch}")
+    except subprocess.CalledProcessError:
+        parent = None
+    if parent and _git(repository, "rev-parse", f"{parent}^{{tree}}") == tree:
+        return None
+
+    if message is None:
+        message = f"Update from {source}" if parent else "Initial Commit"
+    commit = _git(repository, "commit-tree", tree, *(["-p", parent] if parent else []), "-m", message)
+    # only move the branch if nothing else did in the meantime
+    _git(repository, "update-ref", f"refs/heads/{branch}", commit, parent or "")
+    return commit
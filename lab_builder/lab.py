@@ -1,17 +1,37 @@
 """This module provides the basic framework for lab definitions."""
+import functools
 import glob
 import inspect
 import json
 import os
+import shlex
 import shutil
 import subprocess
+import sys
+import time
+from dataclasses import dataclass
 from types import NoneType
 import typing
 
-import cmd2
+from lab_builder.build import ImageBuilder
+from lab_builder.completion import CompletionIndex, class_commands
+from lab_builder.engine import DockerEngine
+from lab_builder.lifecycle import HookScheduler, definition_path
+from lab_builder.readiness import ReadinessWatcher
+from lab_builder.topology import (
+    TopologyDiff,
+    diff_manifests,
+    iter_topology,
+    read_manifest,
+    topology_digest,
+    topology_manifest,
+    write_topology,
+)
+from lab_builder.tracing import Tracer
 
 if typing.TYPE_CHECKING:
     from lab_builder.node import Node, Dependency, Service
+    from lab_builder.snapshot import Snapshots
 
 def deep_merge(lhs, rhs):
     if type(lhs) != type(rhs):
@@ -32,9 +52,276 @@ def deep_merge(lhs, rhs):
     elif hasattr(lhs, "extend"):
         lhs.extend(rhs)
 
+# Container directories that images populate themselves. Binding a directory
+# over one of these would hide the image's files, so globs bound into them
+# stay one bind per file.
+SHARED_DIRECTORIES = ["/bin", "/etc", "/home", "/lib", "/opt", "/root", "/sbin", "/srv", "/usr", "/var"]
+
+
+def is_shared_directory(path: str) -> bool:
+    """Determine if a container path is in a directory that images populate."""
+    path = os.path.normpath(path)
+    return path == "/" or any(path == shared or path.startswith(f"{shared}/") for shared in SHARED_DIRECTORIES)
+
+
+def copy_value(value):
+    """Copy the (possibly nested) dictionaries and lists of a config value.
+
+    Anything other than a dictionary or list is shared rather than copied.
+    Tracked values are copied into plain dictionaries and lists.
+    """
+    if isinstance(value, dict):
+        return {key: copy_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_value(item) for item in value]
+    return value
+
+
+def track(value, owner: "Definition"):
+    """Wrap the (possibly nested) dictionaries and lists of a config value.
+
+    Changing a tracked value in place (`node.binds.append(...)`,
+    `node.environment["KEY"] = ...`) signals that its owner `changed`, the
+    same way that assigning the attribute does.
+
+    Args:
+        value: The config value.
+        owner (Definition): The definition the value belongs to.
+
+    Returns:
+        The tracked value, or the value itself if it isn't a dictionary or list.
+    """
+    if isinstance(value, (TrackedDict, TrackedList)) and value._owner is owner:
+        return value
+    if isinstance(value, dict):
+        return TrackedDict(owner, {key: track(item, owner) for key, item in value.items()})
+    if isinstance(value, list):
+        return TrackedList(owner, [track(item, owner) for item in value])
+    return value
+
+
+def _tracked_method(base: type, name: str):
+    method = getattr(base, name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._owner.changed()
+        return result
+
+    return wrapper
+
+
+class TrackedDict(dict):
+    """A dictionary that signals its owner when it changes (see `track`)."""
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "Definition", items: dict):
+        super().__init__(items)
+        self._owner = owner
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, track(value, self._owner))
+        self._owner.changed()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            super().__setitem__(key, track(value, self._owner))
+        self._owner.changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    # copies (including deep copies and pickles) are plain dictionaries
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __reduce__(self):
+        return dict, (copy_value(self),)
+
+
+for _name in ["__delitem__", "pop", "popitem", "clear"]:
+    setattr(TrackedDict, _name, _tracked_method(dict, _name))
+
+
+class TrackedList(list):
+    """A list that signals its owner when it changes (see `track`)."""
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "Definition", items: list):
+        super().__init__(items)
+        self._owner = owner
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [track(item, self._owner) for item in value]
+        else:
+            value = track(value, self._owner)
+        super().__setitem__(index, value)
+        self._owner.changed()
+
+    def append(self, value):
+        super().append(track(value, self._owner))
+        self._owner.changed()
+
+    def insert(self, index, value):
+        super().insert(index, track(value, self._owner))
+        self._owner.changed()
+
+    def extend(self, values):
+        super().extend(track(value, self._owner) for value in values)
+        self._owner.changed()
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    # copies (including deep copies and pickles) are plain lists
+    def copy(self) -> list:
+        return list(self)
+
+    def __reduce__(self):
+        return list, (copy_value(self),)
+
+
+for _name in ["__delitem__", "__imul__", "pop", "remove", "clear", "sort", "reverse"]:
+    setattr(TrackedList, _name, _tracked_method(list, _name))
+
+
+def _config_type(value) -> type:
+    # tracked values have the type of the value they wrap
+    if isinstance(value, dict):
+        return dict
+    if isinstance(value, list):
+        return list
+    return type(value)
+
+
+def merge_attribute(attr_name: str, current, value):
+    """Merge a value into a config attribute's current value.
+
+    Dictionaries are merged key by key (nested dictionaries are updated and
+    nested lists extended), lists are extended and any other value replaces
+    the current value.
+
+    Args:
+        attr_name (str): The name of the attribute (used for error messages).
+        current: The attribute's current value. Dictionaries and lists are
+            updated in place.
+        value: The value that should be merged into the attribute.
+
+    Raises:
+        ValueError: If the input value type does not match the attribute value type.
+
+    Returns:
+        The merged value.
+    """
+    if value is None:
+        return current
+
+    if _config_type(current) != _config_type(value):
+        raise ValueError(f"{attr_name}: Mismatch type {type(current)} != {type(value)}")
+
+    if hasattr(current, "keys"):
+        updated_keys = set()
+        for key in current.keys():
+            if key in value:
+                if hasattr(current[key], "update"):
+                    current[key].update(value[key])
+                elif hasattr(current[key], "extend"):
+                    current[key].extend(value[key])
+                else:
+                    current[key] = value[key]
+            updated_keys.add(key)
+        for key in value.keys():
+            if key not in updated_keys:
+                current[key] = value[key]
+        return current
+    if hasattr(current, "extend"):
+        current.extend(value)
+        return current
+    return value
+
+
+@dataclass
+class Attribute:
+    """A compiled configuration attribute of a `Definition` class."""
+
+    name: str
+    type_hint: type
+    # The values assigned to the attribute by classes in the MRO, top most first
+    class_values: list
+    # The result of merging all of the class values
+    default: typing.Any
+
+
 class Definition:
     """Definition is a top-level lab configuration/definition class."""
 
+    # Bind a whole directory instead of each of its files when a glob
+    # (`./fixtures/*:/fixtures`) matches everything in it
+    coalesce_binds = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        try:
+            cls._compile_schema()
+        except NameError:
+            # Annotations that reference classes which haven't been defined
+            # yet (`Layer` refers to `lab_builder.node`) are compiled when the
+            # class is first instantiated instead
+            pass
+
+    @classmethod
+    def _compile_schema(cls) -> list[Attribute]:
+        """Compile the configuration attributes of this class.
+
+        The class hierarchy's type hints determine which attributes a definition
+        has and their types. Each attribute's class level values are merged in
+        MRO order, starting from the top most class, so that layers that extend
+        a layer can do overrides.
+
+        Returns:
+            list[Attribute]: The class's attributes.
+        """
+        # Layer annotations reference `lab_builder.node` classes by name, so
+        # resolve them with that module's namespace available (once it exists)
+        localns = None
+        if "lab_builder.node" in sys.modules:
+            localns = vars(sys.modules["lab_builder.node"])
+
+        schema = []
+        for attr_name, type_hint in typing.get_type_hints(cls, localns=localns).items():
+            class_values = [
+                _class.__dict__[attr_name]
+                for _class in reversed(cls.__mro__)
+                if attr_name in _class.__dict__
+            ]
+            default = type_hint()
+            for class_value in class_values:
+                default = merge_attribute(attr_name, default, copy_value(class_value))
+            schema.append(Attribute(attr_name, type_hint, class_values, default))
+        cls._schema = schema
+        return schema
+
+    @classmethod
+    def schema(cls) -> list[Attribute]:
+        """Get the compiled configuration attributes of this class."""
+        schema = cls.__dict__.get("_schema")
+        if schema is None:
+            from lab_builder import node  # noqa: F401
+
+            schema = cls._compile_schema()
+        return schema
+
     def __init__(
             self,
             name: str,
@@ -55,31 +342,44 @@ class Definition:
         """
         self.name = name
         self.parent = parent
-        type_hints = {}
         self.base_dir = base_dir
         if self.base_dir is None:
             self.base_dir = os.getcwd()
-        for _class in reversed(self.__class__.__mro__):
-            type_hints.update(typing.get_type_hints(_class))
 
-        for attr_name, type_hint in type_hints.items():
-            attr_value = kwargs.pop(attr_name, None)
-            setattr(self, attr_name, type_hint())
-            
+        for attribute in self.schema():
+            attr_value = kwargs.pop(attribute.name, None)
             if attr_value:
-                self._update_attribute(attr_name, attr_value)
-
-            # Reverse the MRO so that we always start
-            # from the top most level first. This allows
-            # Layers that extend a layer to do overrides
-            for _class in reversed(self.__class__.__mro__):
-                if attr_name in _class.__dict__ and _class.__dict__[attr_name] is not getattr(self, attr_name):
-                    self._update_attribute(attr_name, getattr(_class, attr_name))
+                # Keyword arguments come first, so the class level values
+                # are merged on top of them
+                value = merge_attribute(attribute.name, attribute.type_hint(), copy_value(attr_value))
+                for class_value in attribute.class_values:
+                    value = merge_attribute(attribute.name, value, copy_value(class_value))
+            else:
+                value = copy_value(attribute.default)
+            setattr(self, attribute.name, value)
         keys = list(kwargs.keys())
 
         if keys:
             raise TypeError(f"{self.__class__.__name__}.__init__() got an unexpected keyword argument '{keys[0]}'")
 
+    def __setattr__(self, name, value):
+        if not name.startswith("_"):
+            value = track(value, self)
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            self.changed()
+
+    def changed(self):
+        """Signal that this definition's configuration has changed.
+
+        Setting an attribute, or changing an attribute's dictionaries and
+        lists in place (see `track`), signals automatically so that cached
+        results, like the lab's topology, are regenerated.
+        """
+        parent = self.__dict__.get("parent")
+        if parent is not None:
+            parent.changed()
+
     def _resolve_binds(self, binds):
         """Resolve compute absolute paths for the local directory in a list of binds.
 
@@ -93,6 +393,11 @@ class Definition:
             * named - A bind that is neither relative nor absolute is considered "named". The
             named bind will be rooted in the layer's state directory and will be read-write.
 
+        Globs in the local path are expanded to one bind per match. When a glob
+        (`./fixtures/*`) matches every entry of a directory, the directory itself
+        is bound instead, unless `coalesce_binds` is off or the container path is
+        in one of the `SHARED_DIRECTORIES`.
+
         Args:
             layer (Layer): The layer where the binds need to be calculated
             binds (list[str]): The list of volume binds (in `local:remote` format)
@@ -127,8 +432,12 @@ class Definition:
                 elif not local.startswith(self.state_directory):
                     read_only = ":ro"
                 
-                matches = glob.glob(local)
-                if len(matches) == 1 and matches[0] == local:
+                matches, directory = self._glob(local)
+                if directory is not None and self.coalesce_binds and not is_shared_directory(remote):
+                    # the glob covers the whole directory, so bind the directory
+                    # itself instead of each of its files
+                    resolved_binds.append(f"{directory}:{remote}{read_only}")
+                elif len(matches) == 1 and matches[0] == local:
                     resolved_binds.append(f"{local}:{remote}{read_only}")
                 else:
                     for match in matches:
@@ -136,14 +445,37 @@ class Definition:
                         resolved_binds.append(f"{match}:{match_remote}{read_only}")
         return resolved_binds
 
+    def _glob(self, pattern: str) -> tuple[list[str], typing.Optional[str]]:
+        """Expand the local side of a bind.
+
+        The results are cached while the lab is being built, since the same
+        patterns are resolved by a service and then again by each of its nodes.
+
+        Returns:
+            tuple[list[str], typing.Optional[str]]: The matching paths, and the
+            directory when the pattern (`directory/*`) matches every entry in it.
+        """
+        cache = getattr(self.lab, "_glob_cache", None)
+        if cache is not None and pattern in cache:
+            return cache[pattern]
+
+        matches = glob.glob(pattern)
+        directory = None
+        if matches and pattern.endswith("/*") and not any(char in pattern[:-2] for char in "*?["):
+            try:
+                entries = os.listdir(pattern[:-2])
+            except OSError:
+                entries = None
+            # `*` doesn't match hidden files, which a directory bind would expose
+            if entries is not None and sorted(entries) == sorted(os.path.basename(match) for match in matches):
+                directory = pattern[:-2]
+        if cache is not None:
+            cache[pattern] = (matches, directory)
+        return matches, directory
+
     def _update_attribute(self, attr_name: str, value: typing.Union[dict, list, NoneType]):
         """Update a layer instance's config attribute.
 
-        This method examine's the class hierarchy's type hinting
-        and will initialize a config attribute instance to the proper
-        type and will then update the attribute based on the input
-        value.
-
         Args:
             attr_name (str): The layer's config attribute to update.
             value (typing.Union[dict, list, NoneType]): The value that should be updated
@@ -152,34 +484,13 @@ class Definition:
         Raises:
             ValueError: If the input value type does not match the attribute value type.
         """
-        if value is None:
-            return
-
-        self_value = getattr(self, attr_name)
-
-        if type(self_value) != type(value):
-            raise ValueError(f"{attr_name}: Mismatch type {type(self_value)} != {type(value)}")
-
-        if hasattr(self_value, "keys"):
-            updated_keys = set()
-            for key in self_value.keys():
-                if key in value:
-                    if hasattr(self_value[key], "update"):
-                        self_value[key].update(value[key])
-                    elif hasattr(self_value[key], "extend"):
-                        self_value[key].extend(value[key])
-                    else:
-                        self_value[key] = value[key]
-                updated_keys.add(key)
-            for key in value.keys():
-                if key not in updated_keys:
-                    self_value[key] = value[key]
-        elif hasattr(self_value, "extend"):
-            self_value.extend(value)
-        else:
-            setattr(self, attr_name, value)
+        setattr(self, attr_name, merge_attribute(attr_name, getattr(self, attr_name), value))
 
     def _emit(self, signal):
+        scheduler = getattr(self.lab, "_scheduler", None)
+        if scheduler is not None and scheduler.signal == signal:
+            # the scheduler is already running every child's hook
+            return
         for child in self.children.values():
             getattr(child, signal)()
 
@@ -197,11 +508,7 @@ class Definition:
         finds those methods and returns their names. This is mostly used
         for tab-completion.
         """
-        members = []
-        for name, _ in inspect.getmembers(self.__class__):
-            if name.startswith("do_") and inspect.ismethod(getattr(self, name)):
-                members.append(name.removeprefix("do_"))
-        return members
+        return list(class_commands(self.__class__))
 
     def get_command(self, commands: list[str]):
         if len(commands) == 0:
@@ -337,10 +644,55 @@ class Lab(Layer):
     description: str = "A Simple lab with nothing in it."
     services: dict[str, Service]
 
-    def __init__(self, base_dir=None):
+    # The maximum number of `started` hooks to run concurrently
+    hook_workers = 8
+    # The maximum number of container images to build concurrently
+    build_workers = 4
+    # How long (in seconds) `started` hooks wait for their node to be ready
+    ready_timeout = 600
+    # Write the topology file without indentation (much smaller for big labs)
+    compact_topology = False
+
+    def __init__(self, base_dir=None, lazy=False):
+        """Initialize the lab.
+
+        Args:
+            base_dir (str, optional): The base directory to use for storing state. Defaults to None.
+            lazy (bool, optional): Defer creating the lab's services and nodes
+                until they are first needed (see `materialize`). Defaults to False.
+        """
         super().__init__(self.__class__.name, base_dir=base_dir)
+        self._inspection = None
+        self._scheduler = None
+        self._materialized = False
+        self._completion = None
         self.services = {}
+        if not lazy:
+            self.materialize()
+
+    @property
+    def materialized(self) -> bool:
+        """Determine if the lab's services and nodes have been created."""
+        return self._materialized
 
+    def materialize(self):
+        """Create the lab's services and nodes, if that hasn't happened yet.
+
+        Creating the nodes resolves their binds and templates, which is wasted
+        effort for commands (like `inspect` and `stop`) that only talk to
+        containerlab. Labs constructed with `lazy=True` call this the first
+        time their children, nodes or topology are needed.
+        """
+        if self._materialized:
+            return
+        self._materialized = True
+        self._glob_cache = {}
+        try:
+            self._create_services()
+        finally:
+            self._glob_cache = None
+
+    def _create_services(self):
         for service_name, service_class in getattr(self.__class__, "services", {}).items():
             dependencies = getattr(self, "dependencies", None)
             service = service_class(
@@ -353,6 +705,33 @@ class Lab(Layer):
             self.services[service_name] = service
         self.created()
 
+    @functools.cached_property
+    def engine(self) -> typing.Optional[DockerEngine]:
+        """Get the Docker Engine API client used for container operations.
+
+        When the Docker Engine's socket can't be reached, this is None and
+        the `docker` and `containerlab` commands are used instead.
+        """
+        return DockerEngine.from_environment()
+
+    @functools.cached_property
+    def tracer(self) -> Tracer:
+        """Get the tracer that records the lab's lifecycle spans."""
+        return Tracer()
+
+    @functools.cached_property
+    def readiness(self) -> ReadinessWatcher:
+        """Get the watcher that tracks when the lab's nodes are ready."""
+        return ReadinessWatcher(self)
+
+    @functools.cached_property
+    def snapshots(self) -> "Snapshots":
+        """Get the lab's warm-state snapshots."""
+        # only the snapshot commands need the snapshot module
+        from lab_builder.snapshot import Snapshots
+
+        return Snapshots(self)
+
     def run_cmd(self, cmd: list[str], **process_kwargs) -> subprocess.CompletedProcess:
         """Run a command using `subprocess.run`.
 
@@ -364,13 +743,14 @@ class Lab(Layer):
             subprocess.CompletedProcess: The result of the command's execution.
         """
         process_kwargs.setdefault("stdout", subprocess.PIPE)
+        process_kwargs.setdefault("check", True)
         if "cmd_input" in process_kwargs:
             if process_kwargs["cmd_input"] is not None:
                 process_kwargs["input"] = process_kwargs.pop("cmd_input")
                 process_kwargs["text"] = True
             else:
                 process_kwargs.pop("cmd_input")
-        return subprocess.run(cmd, check=True, **process_kwargs)
+        return subprocess.run(cmd, **process_kwargs)
 
 
     def run_clab_cmd(self, cmd: list[str], cmd_input=None) -> subprocess.CompletedProcess:
@@ -388,16 +768,20 @@ class Lab(Layer):
         Returns:
             subprocess.CompletedProcess: The result of the command/process completion.
         """
-        cmd = [
-            "sudo",
-            "-E",
-            shutil.which("containerlab"),
-            *cmd,
-        ]
-        env = {
-            "CLAB_LABDIR_BASE": self.state_directory,
-        }
-        return self.run_cmd(cmd, cmd_input=cmd_input, env=env)
+        with self.tracer.span(f"containerlab {cmd[0]}", "containerlab", cmd=shlex.join(cmd)):
+            cmd = [
+                "sudo",
+                "-E",
+                shutil.which("containerlab"),
+                *cmd,
+            ]
+            # `sudo -E` only preserves what is in this environment, so pass the
+            # caller's along (PATH, proxies) and not just the lab directory.
+            env = {
+                **os.environ,
+                "CLAB_LABDIR_BASE": self.state_directory,
+            }
+            return self.run_cmd(cmd, cmd_input=cmd_input, env=env)
 
     def run_docker_cmd(self, cmd: list[str], **process_kwargs) -> subprocess.CompletedProcess:
         cmd = [
@@ -407,37 +791,166 @@ class Lab(Layer):
         return self.run_cmd(cmd, **process_kwargs)
 
     def start(self):
-        """Start the current lab."""
+        """Start the current lab.
+
+        Each phase of the start (image builds, containerlab commands, hooks
+        and so on) is traced, and the trace is written to the lab's state
+        directory in Chrome trace-event format.
+        """
+        started_at = time.time()
+        try:
+            with self.tracer.span("start", "lab", lab=self.name):
+                self._start()
+        finally:
+            if os.path.isdir(self.state_directory):
+                cls = self.__class__
+                self.tracer.write(self.state_directory, since=started_at, metadata={
+                    "lab": self.name,
+                    "lab_class": f"{cls.__module__}.{cls.__qualname__}",
+                    "topology": self.topology_digest,
+                })
+
+    def _start(self):
         super().start()
-        cmd = ["deploy", "--topo", self.topology_file]
-        reconfigure = self.needs_reconfigure
-        if reconfigure:
-            cmd.extend(["--reconfigure"])
-
-        if reconfigure or not os.path.exists(self.topology_file):
-            with open(self.topology_file, "w", encoding="utf-8") as file:
-                file.write(self.topology_str)
-
-        if reconfigure or not self.running:
-            print("Starting", self.lab.name)
-            self.run_clab_cmd(cmd)
-            self.started()
-        else:
+        ImageBuilder(self, max_workers=self.build_workers).build(self.nodes)
+        diff = self.topology_diff
+        if diff is None:
+            self.write_topology()
+
+        if not diff and self.running:
             print(self.lab.name, "is already running")
+            return
+
+        # the containers are only watched while they are deployed and their
+        # `started` hooks run
+        with self.readiness.watching():
+            if diff and not diff.full and self._can_reconfigure_nodes(diff):
+                print("Reconfiguring", self.lab.name, "nodes:", ", ".join(sorted({*diff.destroy, *diff.recreate})))
+                self.reconfigure_nodes(diff)
+            else:
+                cmd = ["deploy", "--topo", self.topology_file]
+                if diff:
+                    cmd.extend(["--reconfigure"])
+                    self.write_topology()
+                print("Starting", self.lab.name)
+                self.run_clab_cmd(cmd)
+            self.invalidate_inspection()
+            HookScheduler(
+                self,
+                max_workers=self.hook_workers,
+                readiness=self.readiness,
+                ready_timeout=self.ready_timeout,
+            ).run("started")
+
+    def write_topology(self):
+        """Write the lab's containerlab topology file (and its manifest)."""
+        manifest = write_topology(self.topology, self.topology_file, compact=self.compact_topology)
+        self._topology_digest = manifest["digest"]
+
+    def _can_reconfigure_nodes(self, diff: TopologyDiff) -> bool:
+        """Determine if only the nodes that differ can be recreated.
+
+        Every node that is in both the deployed and the new topology must
+        have a running container, since only the nodes that differ are
+        deployed; otherwise the whole lab is deployed with `--reconfigure`,
+        which brings the missing containers back.
+        """
+        # containers may have exited or been removed since the snapshot was taken
+        containers = self._containers(self.inspect(refresh=True))
+        if not containers:
+            return False
+        for node in self.nodes:
+            if node.name in diff.added:
+                continue
+            container = containers.get(node.name)
+            if container is None or container.get("state", "running") != "running":
+                return False
+        return True
+
+    def reconfigure_nodes(self, diff: TopologyDiff):
+        """Recreate only the nodes that differ from the deployed topology.
+
+        Changed and removed nodes, and the peers that are linked to them, are
+        destroyed using the deployed topology, then the new topology is written
+        and the changed and added nodes and their peers are deployed from it.
+        The links between the peers and the nodes that kept running are then
+        created again. Every other container is left running. If containerlab
+        refuses to deploy a subset of an already deployed lab, the whole lab
+        is redeployed with `--reconfigure` instead.
+
+        Args:
+            diff (TopologyDiff): The differences from the deployed topology.
+        """
+        if diff.destroy:
+            self.run_clab_cmd([
+                "destroy",
+                "--topo", self.topology_file,
+                "--node-filter", ",".join(diff.destroy),
+            ])
+        self.write_topology()
+        if diff.recreate:
+            try:
+                self.run_clab_cmd([
+                    "deploy",
+                    "--topo", self.topology_file,
+                    "--node-filter", ",".join(diff.recreate),
+                ])
+                for endpoints in diff.relink:
+                    self.run_clab_cmd([
+                        "tools", "veth", "create",
+                        "-a", f"clab-{self.name}-{endpoints[0]}",
+                        "-b", f"clab-{self.name}-{endpoints[1]}",
+                    ])
+            except subprocess.CalledProcessError:
+                print("Partial deploy failed, redeploying", self.lab.name)
+                self.run_clab_cmd(["deploy", "--topo", self.topology_file, "--reconfigure"])
 
     def stop(self):
-        """If running, stop the current lab."""
-        if self.running:
+        """Destroy the lab's containers, if it has any, and signal that the lab has stopped.
+
+        The `stopped` hooks always run, which creates the lab's services and
+        nodes if that hasn't happened yet.
+        """
+        if "readiness" in self.__dict__:
+            self.readiness.stop()
+        if self.containers:
             topology = self.inspect().get("topology_file", None)
             if topology:
-                self.run_clab_cmd(["--topo", topology, "destroy", "--graceful"])
+                self.run_clab_cmd(["destroy", "--topo", topology, "--graceful"])
+            self.invalidate_inspection()
         self.stopped()
 
     def destroy(self):
+        self.invalidate_inspection()
         self.destroyed()
 
-    def inspect(self) -> dict:
-        """Run the containerlab inspect command and return the parsed result."""
+    def inspect(self, refresh: bool = False) -> dict:
+        """Return the parsed result of the containerlab inspect command.
+
+        The result is kept as a snapshot so that repeated questions about the
+        lab's containers (`running`, `running_containers`, `stop`, ...) only
+        cost a single `containerlab inspect`. The snapshot is discarded when
+        the lab is started, stopped or destroyed, or when
+        `invalidate_inspection` is called.
+
+        Args:
+            refresh (bool, optional): Discard the current snapshot and inspect
+                the lab again. Defaults to False.
+
+        Returns:
+            dict: The parsed inspection output.
+        """
+        if refresh or self._inspection is None:
+            self._inspection = self.query_inspection()
+        return self._inspection
+
+    def query_inspection(self) -> dict:
+        """Inspect the lab's containers, without using or replacing the inspection snapshot.
+
+        This is safe to call from other threads (like the readiness watcher's).
+        """
+        if self.engine is not None:
+            return self._inspect_engine()
         proc = self.run_clab_cmd([
             "inspect",
             "--name",
@@ -445,12 +958,54 @@ class Lab(Layer):
             "--format",
             "json",
         ])
+        inspection = {}
         if proc.stdout:
-            stdout = json.loads(proc.stdout)
-            if stdout["containers"]:
-                stdout["topology_file"] = stdout["containers"][0]["labPath"]
-            return stdout
-        return {}
+            inspection = json.loads(proc.stdout)
+            if inspection["containers"]:
+                inspection["topology_file"] = inspection["containers"][0]["labPath"]
+        return inspection
+
+    def _inspect_engine(self) -> dict:
+        """Build the `containerlab inspect` result from the Docker Engine API."""
+        containers = []
+        for container in self.engine.containers(labels={"containerlab": self.name}):
+            labels = container["Labels"]
+            containers.append({
+                "lab_name": labels["containerlab"],
+                "labPath": labels.get("clab-topo-file", ""),
+                "name": container["Names"][0].lstrip("/"),
+                "container_id": container["Id"][:12],
+                "image": container["Image"],
+                "kind": labels.get("clab-node-kind", ""),
+                "state": container["State"],
+                "status": container["Status"],
+            })
+        inspection = {"containers": containers}
+        if containers:
+            inspection["topology_file"] = containers[0]["labPath"]
+        return inspection
+
+    def invalidate_inspection(self):
+        """Discard the inspection snapshot so the next `inspect` queries containerlab."""
+        self._inspection = None
+
+    @property
+    def containers(self) -> dict[str, dict]:
+        """Get the lab's containers (from the inspection snapshot) keyed by node name."""
+        return self._containers(self.inspect())
+
+    def query_containers(self) -> dict[str, dict]:
+        """Get the lab's containers keyed by node name, without using the inspection snapshot."""
+        return self._containers(self.query_inspection())
+
+    @staticmethod
+    def _containers(inspection: dict) -> dict[str, dict]:
+        containers = {}
+        for container in inspection.get("containers", []):
+            # remove clab- and lab name
+            name = container["name"][6+len(container["lab_name"]):]
+            containers[name] = container
+        return containers
 
     @property
     def topology_file(self):
@@ -469,25 +1024,51 @@ class Lab(Layer):
     @property
     def running_containers(self):
         """Get a list of container names that are currently running for this lab."""
-        containers = []
-        for container in self.inspect().get("containers", []):
-            # remove clab- and lab name
-            name = container["name"][6+len(container["lab_name"]):]
-            containers.append(name)
-        return containers
+        return list(self.containers.keys())
+
+    @property
+    def file_binds(self) -> dict[str, list[str]]:
+        """Get the binds of individual files, by node (`service/node`).
+
+        Every bind is a separate mount in the node's container, so these are
+        the binds worth turning into directory binds.
+        """
+        file_binds = {}
+        for node in self.nodes:
+            binds = [bind for bind in node.binds if os.path.isfile(bind.split(":", 1)[0])]
+            if binds:
+                file_binds[definition_path(node)] = binds
+        return file_binds
 
     @property
     def needs_reconfigure(self):
         """Determine if the lab needs to be reconfigured."""
-        if os.path.exists(self.topology_file):
-            with open(self.topology_file, encoding="utf-8") as topology_file:
-                existing_topology = topology_file.read()
-                if existing_topology != self.topology_str:
-                    return True
-        return False
+        return bool(self.topology_diff)
+
+    @property
+    def topology_diff(self) -> typing.Optional[TopologyDiff]:
+        """Compare the lab's topology with the topology file that was last deployed.
+
+        Returns:
+            TopologyDiff: The differences, or None if the topology file doesn't exist.
+        """
+        if not os.path.exists(self.topology_file):
+            return None
+        deployed = read_manifest(self.topology_file)
+        if deployed is not None and deployed["digest"] == self.topology_digest:
+            return TopologyDiff()
+        if deployed is None:
+            # the file was written without a manifest (or edited since)
+            try:
+                with open(self.topology_file, encoding="utf-8") as topology_file:
+                    deployed = topology_manifest(json.load(topology_file))
+            except ValueError:
+                return TopologyDiff(full=True)
+        return diff_manifests(deployed, topology_manifest(self.topology))
 
     @property
     def children(self) -> dict[str, typing.Any]:
+        self.materialize()
         return self.services
 
     @property
@@ -500,16 +1081,55 @@ class Lab(Layer):
         Yields:
             Node: Nodes belonging to services in the lab.
         """
+        self.materialize()
         for service in self.services.values():
             yield from service.nodes.values()
 
+    def changed(self):
+        """Discard the generated topology when anything in the lab changes."""
+        super().changed()
+        self._topology = None
+        self._topology_digest = None
+        self._completion = None
+
+    @property
+    def completion(self) -> CompletionIndex:
+        """Get the lab's tab-completion index, building it if the lab changed since it was last built."""
+        if getattr(self, "_completion", None) is None:
+            self._completion = CompletionIndex(self)
+        return self._completion
+
+    def complete(self, commands: list[str], command: str, text: str):
+        """Perform the tab-completion with the lab's completion index (see `Definition.complete`)."""
+        return self.completion.complete(commands, command, text)
+
     @property
     def topology_str(self):
-        """Get a string representation of the containerlab topology for this lab."""
-        return json.dumps(self.topology, indent=2)
+        """Get a string representation of the containerlab topology for this lab.
+
+        This builds the whole file in memory, `write_topology` streams it instead.
+        """
+        return "".join(iter_topology(self.topology, compact=self.compact_topology))
+
+    @property
+    def topology_digest(self) -> str:
+        """Get the digest of the lab's topology file contents."""
+        if self._topology_digest is None:
+            self._topology_digest = topology_digest(self.topology, compact=self.compact_topology)
+        return self._topology_digest
 
     @property
     def topology(self):
+        """Get the containerlab topology for this lab.
+
+        The topology is generated once and then reused until a definition in
+        the lab signals that it `changed`.
+        """
+        if self._topology is None:
+            self._topology = self._generate_topology()
+        return self._topology
+
+    def _generate_topology(self):
         """Generate the containerlab topology for this lab."""
         links = []
         for node in self.nodes:
@@ -525,9 +1145,16 @@ class Lab(Layer):
               "links": links,
             }
         }
-        if getattr(self, "ipv4_subnet", None):
-            topology["mgmt"] = {
-                "network": "custom_mgmt",
-                "ipv4-subnet": self.ipv4_subnet,
-            }
+        if self.mgmt is not None:
+            topology["mgmt"] = self.mgmt
         return topology
+
+    @property
+    def mgmt(self) -> typing.Optional[dict]:
+        """Get the lab's custom management network, if it has a management subnet."""
+        if not getattr(self, "ipv4_subnet", None):
+            return None
+        return {
+            "network": "custom_mgmt",
+            "ipv4-subnet": self.ipv4_subnet,
+        }
@@ -1,4 +1,10 @@
-from lab_builder.node import HealthCheck, LinuxNode, NetworkNode
+import ipaddress
+import os
+import typing
+
+from lab_builder.git import is_writable, sync_repository
+from lab_builder.lab import Service
+from lab_builder.node import HealthCheck, LinuxNode, NetworkNode, Node
 
 
 class CEOS(NetworkNode):
@@ -45,7 +51,12 @@ class Redis(LinuxNode):
     }
 
 class GitServer(LinuxNode):
-    """Simple git server node."""
+    """Simple git server node.
+
+    The repositories are seeded from the directories bound into `/repos` when
+    the node has started. Changes made to those directories afterwards are
+    only committed by the node's `sync` command.
+    """
 
     containerfile = "containers/git-server/Containerfile"
 
@@ -53,22 +64,150 @@ class GitServer(LinuxNode):
         "repos:/internal/repos",
     ]
 
+    def repositories(self) -> dict[str, str]:
+        """Get the host directories that the server's repositories are seeded from.
+
+        Every directory bound into `/repos` (either bound individually as
+        `/repos/<name>` or as part of a bind of `/repos` itself) becomes the
+        repository `<name>.git`.
+
+        Returns:
+            dict[str, str]: The host directory of each repository, by name.
+        """
+        sources = {}
+        root = self.host_path("/repos")
+        if root is not None and os.path.isdir(root):
+            for entry in os.listdir(root):
+                if os.path.isdir(os.path.join(root, entry)):
+                    sources[entry] = os.path.join(root, entry)
+        for bind in self.binds:
+            local, remote = bind.split(":", 2)[:2]
+            if os.path.dirname(remote.rstrip("/")) == "/repos" and os.path.isdir(local):
+                sources[os.path.basename(remote.rstrip("/"))] = local
+        return dict(sorted(sources.items()))
+
+    def sync(self) -> dict[str, typing.Optional[str]]:
+        """Commit the changes in the source directories to the server's repositories.
+
+        Returns:
+            dict[str, typing.Optional[str]]: The new commit of each repository,
+            or None for the repositories that were already up to date.
+        """
+        commits = {}
+        with self.lab.tracer.span("seed repositories", "hook", node=self.name):
+            for name, source in self.repositories().items():
+                repository = self.host_path(f"/internal/repos/{name}.git")
+                if os.path.isdir(repository) and not is_writable(repository):
+                    self.claim_repository(f"/internal/repos/{name}.git", repository)
+                commits[name] = sync_repository(source, repository)
+                if commits[name]:
+                    print(f"{self.name}: committed {source} to {name}.git ({commits[name][:12]})")
+        return commits
+
+    def claim_repository(self, container_path: str, host_path: str):
+        """Give a repository that was created in the container to the host's user.
+
+        Labs created before the repositories were seeded from the host have
+        repositories owned by the container's users. Their ownership is
+        changed once (from within the container, which runs as root), after
+        which they are synced like any other repository.
+
+        Raises:
+            PermissionError: If the repository still can't be written.
+        """
+        print(f"{self.name}: taking ownership of {container_path}")
+        self.run_cmd(["chown", "-R", f"{os.getuid()}:{os.getgid()}", container_path])
+        if not is_writable(host_path):
+            raise PermissionError(f"{self.name}: {host_path} is not writable")
+
     def started(self):
         super().started()
-        self.run_cmd(["git", "config", "--global", "user.email", "operator@company.com"])
-        self.run_cmd(["git", "config", "--global", "user.name" "Operator"])
-        for repo_name in self.list_dir("/repos"):
-            if not self.path_exists(f"/internal/repos/{repo_name}.git"):
-                print(f"/internal/repos/{repo_name}.git does not exist")
-                self.run_cmd([
-                    "git", "init", "--bare", f"/internal/repos/{repo_name}.git", "--initial-branch=main",
-                ])
-
-                self.run_cmd(["cp", "-r", f"/repos/{repo_name}", f"/tmp/{repo_name}"])
-                self.run_cmd(["git", "init"], working_directory=f"/tmp/{repo_name}")
-                self.run_cmd(["git", "add", "."], working_directory=f"/tmp/{repo_name}")
-                self.run_cmd(["git", "commit", "-m", "Initial Commit"], working_directory=f"/tmp/{repo_name}")
-                self.run_cmd(["git", "branch", "-M", "main"], working_directory=f"/tmp/{repo_name}")
-                self.run_cmd(["git", "remote", "add", "origin", f"/internal/repos/{repo_name}.git"], working_directory=f"/tmp/{repo_name}")
-                self.run_cmd(["git", "push", "-u", "origin", "main"], working_directory=f"/tmp/{repo_name}")
-                self.run_cmd(["chown", "-R", "git", f"/internal/repos/{repo_name}.git"])
+        self.sync()
+
+    def do_sync(self):
+        """Commit changes in the repository source directories to the git server."""
+        if not any(self.sync().values()):
+            print(f"{self.name}: repositories are up to date")
+
+
+class LeafSpineFabric(Service):
+    """A leaf/spine fabric generated from its dimensions.
+
+    Each leaf has `uplinks_per_leaf` uplinks, spread round robin across the
+    spines: uplink `k` uses the leaf's `eth{k+1}` and the next free interface
+    of spine `k % spines`. Management addresses are allocated from the lab's
+    `ipv4_subnet` (when it has one), spines starting at `spine_address_offset`
+    and leaves at `leaf_address_offset`. The same dimensions always generate
+    the same nodes, links and addresses, and adding leaves only appends to
+    them (existing interfaces and addresses never move), so topology diffs
+    stay small as the fabric grows.
+    """
+
+    spines = 2
+    leaves = 2
+    uplinks_per_leaf = 2
+    node_class = CEOS
+    name_prefix = "dc1"
+    spine_address_offset = 2
+    leaf_address_offset = 10
+
+    def spine_name(self, index: int) -> str:
+        """Get the name of a spine (numbered from 1)."""
+        return f"{self.name_prefix}-spine-{index}"
+
+    def leaf_name(self, index: int) -> str:
+        """Get the name of a leaf (numbered from 1)."""
+        return f"{self.name_prefix}-leaf-{index}"
+
+    def _addresses(self, count: int, offset: int) -> list[str]:
+        subnet = getattr(self.lab, "ipv4_subnet", None)
+        if not subnet:
+            return [None] * count
+        network = ipaddress.ip_network(subnet)
+        # the last address of the subnet is the broadcast address
+        if offset < 1 or offset + count >= network.num_addresses:
+            raise ValueError(f"{self.name}: {subnet} is too small for {count} nodes at offset {offset}")
+        return [str(network[offset + index]) for index in range(count)]
+
+    def generate(self) -> tuple[dict[str, type[Node]], dict[str, dict[str, str]], dict[str, str]]:
+        """Generate the fabric's nodes, links and management addresses.
+
+        Raises:
+            ValueError: If the dimensions are invalid, or the spine and leaf
+                addresses would overlap or not fit in the lab's subnet.
+
+        Returns:
+            tuple[dict[str, type[Node]], dict[str, dict[str, str]], dict[str, str]]:
+            The node classes, the links (keyed by spine name and interface) and
+            the management address of each node.
+        """
+        if self.spines < 1 or self.leaves < 1 or self.uplinks_per_leaf < 1:
+            raise ValueError(f"{self.name}: a fabric needs at least one spine, leaf and uplink per leaf")
+        if self.spine_address_offset + self.spines > self.leaf_address_offset:
+            raise ValueError(f"{self.name}: the spine addresses overlap the leaf addresses")
+
+        spines = [self.spine_name(index + 1) for index in range(self.spines)]
+        leaves = [self.leaf_name(index + 1) for index in range(self.leaves)]
+        nodes = {name: self.node_class for name in [*spines, *leaves]}
+        links = {spine: {} for spine in spines}
+        for leaf in leaves:
+            for uplink in range(self.uplinks_per_leaf):
+                spine_links = links[spines[uplink % self.spines]]
+                spine_links[f"eth{len(spine_links) + 1}"] = f"{leaf}:eth{uplink + 1}"
+
+        addresses = {
+            **dict(zip(spines, self._addresses(len(spines), self.spine_address_offset))),
+            **dict(zip(leaves, self._addresses(len(leaves), self.leaf_address_offset))),
+        }
+        return nodes, links, addresses
+
+    def created(self):
+        nodes, links, addresses = self.generate()
+        # nodes and links declared by a subclass are kept alongside the fabric
+        self.nodes = {**nodes, **self.nodes}
+        for node_name, node_links in links.items():
+            self.links[node_name] = {**node_links, **self.links.get(node_name, {})}
+        super().created()
+        for node_name, address in addresses.items():
+            if address is not None:
+                self.nodes[node_name].mgmt_ipv4 = address
@@ -1,4 +1,7 @@
 #!/bin/sh
 
 set -e
+# the repositories are written by the lab builder on the host, so they
+# aren't owned by the git user
+git config --global --add safe.directory '*'
 git-http-server -p 3000 /internal/repos
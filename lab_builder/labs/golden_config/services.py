@@ -1,7 +1,7 @@
 """Golden config lab services."""
 from lab_builder.lab import Service
 from lab_builder.node import LinuxNode
-from lab_builder.labs.common import CEOS
+from lab_builder.labs.common import LeafSpineFabric
 
 class Suzieq(LinuxNode):
     """Suzieq Poller Node."""
@@ -25,34 +25,9 @@ class SuzieqService(Service):
         """Start the SuzieQ CLI."""
         self.nodes["suzieq"].run_cmd("/usr/local/bin/suzieq-cli", working_directory="/home/suzieq", interactive=True)
 
-class LeafSpineNetwork(Service):
+class LeafSpineNetwork(LeafSpineFabric):
     """A simple leaf/spine network of CEOS switches."""
 
-    nodes = {
-        "dc1-spine-1": CEOS,
-        "dc1-spine-2": CEOS,
-        "dc1-leaf-1": CEOS,
-        "dc1-leaf-2": CEOS,
-        "dc1-leaf-3": CEOS,
-    }
-
-    links = {
-        "dc1-spine-1": {
-            "eth1": "dc1-leaf-1:eth1",
-            "eth2": "dc1-leaf-2:eth1",
-            "eth3": "dc1-leaf-3:eth1",
-        },
-        "dc1-spine-2": {
-            "eth1": "dc1-leaf-1:eth2",
-            "eth2": "dc1-leaf-2:eth2",
-            "eth3": "dc1-leaf-3:eth2",
-        },
-    }
-
-    def created(self):
-        super().created()
-        self.nodes["dc1-spine-1"].mgmt_ipv4 = "172.100.100.2"
-        self.nodes["dc1-spine-2"].mgmt_ipv4 = "172.100.100.3"
-        self.nodes["dc1-leaf-1"].mgmt_ipv4 = "172.100.100.10"
-        self.nodes["dc1-leaf-2"].mgmt_ipv4 = "172.100.100.11"
-        self.nodes["dc1-leaf-3"].mgmt_ipv4 = "172.100.100.12"
+    spines = 2
+    leaves = 3
+    uplinks_per_leaf = 2
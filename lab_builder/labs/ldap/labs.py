@@ -1,4 +1,4 @@
-from lab_builder import Lab
+from lab_builder.lab import Lab
 from .services import NautobotWithLDAPService
 
 
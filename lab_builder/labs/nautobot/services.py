@@ -1,28 +1,180 @@
+from dataclasses import dataclass
+from enum import Enum
 import inspect
 import os
-
-from jinja2 import Environment, FileSystemLoader
+import re
+import shlex
+import sys
+import typing
 
 from lab_builder.lab import Service
 from lab_builder.labs.common import DB, Redis
+from lab_builder.ledger import Ledger, directory_identity, dump_directory_digest, file_digest
 from lab_builder.node import Dependency, DependencyState, HealthCheck, LinuxNode
 
 class NautobotBase(LinuxNode):
     """Nautobot application node."""
     image = "ghcr.io/nautobot/nautobot:2.0"
 
+@dataclass
+class FixtureResult:
+    """The outcome of loading a single fixture file."""
+
+    path: str
+    objects: int = 0
+    ok: bool = True
+
+
+def parse_loaddata_output(fixtures: list[str], output: str) -> list[FixtureResult]:
+    """Compute per-file object counts from verbose `loaddata` output.
+
+    `loaddata --verbosity 3` announces each fixture as it is installed and
+    then reports a running count of the objects processed from it.
+
+    Args:
+        fixtures (list[str]): The fixture paths passed to `loaddata`.
+        output (str): The output of the `loaddata` command.
+
+    Returns:
+        list[FixtureResult]: A result for every fixture, in order.
+    """
+    results = {os.path.splitext(os.path.basename(fixture))[0]: FixtureResult(fixture) for fixture in fixtures}
+    current = None
+    for match in re.finditer(r"Installing \w+ fixture '([^']+)'|Processed (\d+) object\(s\)", output):
+        if match.group(1) is not None:
+            current = results.get(match.group(1))
+        elif current is not None:
+            current.objects = int(match.group(2))
+    return list(results.values())
+
+
+class DumpFormat(Enum):
+    """The database dump formats `NautobotService.restore_db` understands."""
+
+    SQL = "sql"
+    GZIP = "gzip"
+    CUSTOM = "custom"
+    DIRECTORY = "directory"
+
+
+def dump_format_of(container_path: str, host_path: str = None) -> DumpFormat:
+    """Determine the format of a database dump.
+
+    The dump's content is checked when it is available on the host (custom
+    format dumps start with `PGDMP`, gzip files with `1f 8b` and directory
+    format dumps have a `toc.dat`), otherwise the file extension is used.
+
+    Args:
+        container_path (str): The dump's path within the container.
+        host_path (str, optional): The dump's path on the host, if it is bound from the host.
+
+    Returns:
+        DumpFormat: The dump's format.
+
+    Raises:
+        ValueError: If the dump is a directory without a `toc.dat`.
+    """
+    if host_path is not None and os.path.isdir(host_path):
+        if not os.path.isfile(os.path.join(host_path, "toc.dat")):
+            raise ValueError(f"{host_path} is a directory but not a directory format dump (it has no toc.dat)")
+        return DumpFormat.DIRECTORY
+    if host_path is not None and os.path.isfile(host_path):
+        with open(host_path, "rb") as dump:
+            magic = dump.read(5)
+        if magic == b"PGDMP":
+            return DumpFormat.CUSTOM
+        if magic[:2] == b"\x1f\x8b":
+            return DumpFormat.GZIP
+        return DumpFormat.SQL
+    if container_path.endswith(".gz"):
+        return DumpFormat.GZIP
+    if container_path.endswith((".dump", ".backup", ".pgdump")):
+        return DumpFormat.CUSTOM
+    return DumpFormat.SQL
+
+
 class NautobotApp(NautobotBase):
     def started(self):
         super().started()
         self.load_fixtures()
 
-    def load_fixtures(self):
-        fixtures = sorted(self.list_dir("/fixtures"))
-        for fixture in fixtures:
+    def fixture_ledger(self) -> Ledger:
+        """Get the record of the fixtures that have been loaded into the current database."""
+        db = self.parent.nodes.get("db") if self.parent is not None else None
+        data_directory = db.host_path("/var/lib/postgresql/data") if db is not None else None
+        return Ledger(
+            os.path.join(self.state_directory, "fixtures.json"),
+            identity=directory_identity(data_directory) if data_directory else None,
+        )
+
+    def forget_fixtures(self):
+        """Forget which fixtures were loaded, so they are all loaded on the next start."""
+        ledger = self.fixture_ledger()
+        ledger.entries.clear()
+        ledger.save()
+
+    def fixture_digest(self, container_path: str) -> typing.Optional[str]:
+        """Get the digest of a fixture file that is bound from the host."""
+        host_path = self.host_path(container_path)
+        if host_path is None or not os.path.isfile(host_path):
+            return None
+        return file_digest(host_path)
+
+    def load_fixtures(self) -> list[FixtureResult]:
+        """Load the new and changed fixtures found in the node's `/fixtures` directory.
+
+        Fixtures are loaded in filename order by a single `loaddata` process
+        (and therefore a single transaction), so Nautobot only starts up once
+        no matter how many fixture files there are. If the bulk load fails,
+        the fixtures are loaded one at a time to find the one that failed.
+
+        The content hash of every loaded fixture is recorded in the node's
+        state directory, and fixtures that are unchanged since they were
+        loaded into the current database are skipped.
+
+        Returns:
+            list[FixtureResult]: The result for each fixture file that was loaded.
+        """
+        fixtures = []
+        for fixture in sorted(self.list_dir("/fixtures")):
             _, ext = os.path.splitext(fixture)
             if ext in [".yaml", ".yml", ".json"]:
-                fixture = os.path.join("/fixtures", fixture)
-                self.load_fixture(fixture)
+                fixtures.append(os.path.join("/fixtures", fixture))
+        ledger = self.fixture_ledger()
+        digests = {fixture: self.fixture_digest(fixture) for fixture in fixtures}
+        skipped = [fixture for fixture in fixtures if ledger.applied(fixture, digests[fixture])]
+        fixtures = [fixture for fixture in fixtures if fixture not in skipped]
+        if skipped:
+            print(f"{self.name}: {len(skipped)} fixture(s) are already loaded")
+        if not fixtures:
+            return []
+
+        with self.lab.tracer.span("load_fixtures", "hook", node=self.name, fixtures=len(fixtures)):
+            results = self.run_script([
+                ["nautobot-server", "loaddata", "--verbosity", "3", *fixtures],
+            ], stderr=None)
+        # no result means the script itself failed (the exec failed, or its
+        # output couldn't be parsed), which is handled like a failed load
+        result = results[0] if results else None
+        if result is not None and result.ok:
+            results = parse_loaddata_output(fixtures, result.stdout)
+            for fixture in results:
+                print(f"{self.name}: loaded {fixture.objects} object(s) from {fixture.path}")
+                ledger.record(fixture.path, digests[fixture.path])
+            ledger.save()
+            print(f"{self.name}: loaded {len(results)} fixture(s) in {result.elapsed:.1f}s")
+            return results
+
+        print(f"{self.name}: loading fixtures failed, loading them one at a time", file=sys.stderr)
+        results = []
+        for fixture in fixtures:
+            output = self.load_fixture(fixture)
+            results.append(FixtureResult(fixture, ok=output["return-code"] == 0))
+            if not results[-1].ok:
+                break
+            ledger.record(fixture, digests[fixture])
+        ledger.save()
+        return results
 
     def load_fixture(self, container_path: str):
         """Load a single fixture file into the Nautobot server.
@@ -30,6 +182,9 @@ class NautobotApp(NautobotBase):
         Args:
             container_path (str): The path (within the container) to the
               fixture file.
+
+        Returns:
+            dict: The result of the `loaddata` command.
         """
         cmd = [
             "nautobot-server",
@@ -37,7 +192,7 @@ class NautobotApp(NautobotBase):
             container_path,
         ]
 
-        self.run_cmd(cmd)
+        return self.run_cmd(cmd)
 
 class Worker(NautobotBase):
     """Nautobot worker node."""
@@ -106,22 +261,33 @@ class NautobotService(Service):
         "nautobot": ["127.0.0.1:8080:8080/tcp"],
     }
 
+    # The number of parallel jobs `pg_restore` uses to restore a database
+    restore_jobs = 4
+
     def start(self):
         super().start()
         extra_config = ""
-        if config_template := getattr(self.__class__, "extra_nautobot_config", None):
-            extra_config = self.load_template(config_template).render()
-
-        if config_template := getattr(self.__class__, "nautobot_config", None):
-            template = self.load_template(config_template)
-            lab_config = os.path.join(self.state_directory, "nautobot_config.py")
-            with open(lab_config, "w", encoding="utf-8") as output:
-                output.write(template.render(extra_config=extra_config))
-            self.nodes["nautobot"].binds.append(f"{lab_config}:/opt/nautobot/nautobot_config.py")
-            self.nodes["worker"].binds.append(f"{lab_config}:/opt/nautobot/nautobot_config.py")
-            self.nodes["scheduler"].binds.append(f"{lab_config}:/opt/nautobot/nautobot_config.py")
+        with self.lab.tracer.span("render nautobot_config.py", "template", service=self.name):
+            if config_template := getattr(self.__class__, "extra_nautobot_config", None):
+                extra_config = self.load_template(config_template).render()
+
+            if config_template := getattr(self.__class__, "nautobot_config", None):
+                template = self.load_template(config_template)
+                lab_config = os.path.join(self.state_directory, "nautobot_config.py")
+                with open(lab_config, "w", encoding="utf-8") as output:
+                    output.write(template.render(extra_config=extra_config))
+
+        if config_template:
+            config_bind = f"{lab_config}:/opt/nautobot/nautobot_config.py"
+            for node_name in ["nautobot", "worker", "scheduler"]:
+                node = self.nodes[node_name]
+                if config_bind not in node.binds:
+                    node.binds.append(config_bind)
 
     def load_template(self, name):
+        # only the services that render templates need jinja2
+        from jinja2 import Environment, FileSystemLoader
+
         searchpath = []
         for _class in self.__class__.mro():
             if _class is not object:
@@ -129,21 +295,95 @@ class NautobotService(Service):
         loader = FileSystemLoader(searchpath=searchpath)
         return Environment(loader=loader).get_template(name)
 
-    def restore_db(self, container_path: str):
-        """Drop the nautobot database and recreate it.
+    def restore_db(self, container_path: str) -> bool:
+        """Drop the nautobot database and recreate it from a dump.
 
-        This command will drop the existing Nautobot database and recreate it from
-        the provided `.sql` file.
+        Plain SQL dumps (optionally gzip compressed) are piped through `psql`,
+        while custom and directory format dumps (`pg_dump -Fc`/`-Fd`) are
+        restored by `pg_restore` with `restore_jobs` parallel jobs.
+
+        When the dump is bound from the host, its hash (for a directory dump,
+        the hash of its `toc.dat` and its files' sizes and modification times)
+        is recorded in the service's state directory and an unchanged dump is
+        not restored again, unless the database's data directory has been
+        recreated since.
 
         Args:
-            container_path (str): The full path (including filename) to the `.sql` file
+            container_path (str): The full path (including filename) to the dump
               to be imported in the new Nautobot database. This should be the absolute
               path within the container, not within the host filesystem.
+
+        Returns:
+            bool: True if the database was restored, False if the restore was
+            skipped or failed.
         """
-        self.nodes["db"].run_cmd(["/usr/bin/dropdb", "-U", "nautobot", "-f", "nautobot"])
-        self.nodes["db"].run_cmd(["/usr/bin/createdb", "-U", "nautobot", "nautobot"])
-        self.nodes["db"].run_cmd([
-            "/bin/sh",
-            "-c",
-            f"psql -h localhost -U nautobot < {container_path}",
-        ])
+        db = self.nodes["db"]
+        host_path = db.host_path(container_path)
+        digest = None
+        if host_path is not None and os.path.isfile(host_path):
+            digest = file_digest(host_path)
+        elif host_path is not None and os.path.isfile(os.path.join(host_path, "toc.dat")):
+            digest = dump_directory_digest(host_path)
+        data_directory = db.host_path("/var/lib/postgresql/data")
+        ledger = Ledger(
+            os.path.join(self.state_directory, "restore_db.json"),
+            identity=directory_identity(data_directory) if data_directory else None,
+        )
+        if ledger.applied(container_path, digest):
+            print(f"{self.name}: {container_path} has already been restored")
+            return False
+
+        try:
+            dump_format = dump_format_of(container_path, host_path)
+        except ValueError as ex:
+            # don't drop the database for a dump that can't be restored
+            print(f"{self.name}: {ex}")
+            return False
+        span = self.lab.tracer.span("restore_db", "hook", service=self.name, dump=container_path, format=dump_format.value)
+        with span:
+            results = db.run_script([
+                ["/usr/bin/dropdb", "-U", self.db_user, "-f", self.db_name],
+                ["/usr/bin/createdb", "-U", self.db_user, self.db_name],
+                self.restore_command(container_path, dump_format),
+            ], stop_on_error=False)
+
+        if len(results) < 3 or not results[-1].ok:
+            ledger.forget(container_path)
+            ledger.save()
+            return False
+        print(f"{self.name}: restored {container_path} in {results[-1].elapsed:.1f}s")
+        # the fixtures that were loaded went with the old database
+        for node in self.nodes.values():
+            if isinstance(node, NautobotApp):
+                node.forget_fixtures()
+        if digest is not None:
+            ledger.record(container_path, digest)
+            ledger.save()
+        return True
+
+    @property
+    def db_user(self) -> str:
+        """Get the database user."""
+        return self.shared_environment["NAUTOBOT_DB_USER"]
+
+    @property
+    def db_name(self) -> str:
+        """Get the database name."""
+        return self.shared_environment["NAUTOBOT_DB_NAME"]
+
+    def restore_command(self, container_path: str, dump_format: DumpFormat) -> list[str]:
+        """Get the command that restores a dump of the given format into the (empty) database."""
+        if dump_format in [DumpFormat.CUSTOM, DumpFormat.DIRECTORY]:
+            return [
+                "pg_restore",
+                "-h", "localhost",
+                "-U", self.db_user,
+                "-d", self.db_name,
+                "--no-owner",
+                "-j", str(self.restore_jobs),
+                container_path,
+            ]
+        psql = shlex.join(["psql", "-h", "localhost", "-U", self.db_user, self.db_name])
+        if dump_format == DumpFormat.GZIP:
+            return ["/bin/sh", "-c", f"gunzip -c {shlex.quote(container_path)} | {psql}"]
+        return ["/bin/sh", "-c", f"{psql} < {shlex.quote(container_path)}"]
@@ -0,0 +1,127 @@
+"""Records of the work that has already been applied to a node's state.
+
+Restoring a database dump or loading fixtures is only needed when the
+input changed, or when the state it was applied to (a database's data
+directory) was recreated. A `Ledger` keeps the content hash of every input
+that has been applied, along with the identity of the state it was applied
+to, in a small JSON file in a state directory.
+"""
+import hashlib
+import json
+import os
+import typing
+import uuid
+
+# Suffix of the file, next to a directory, that holds the directory's identity
+IDENTITY_SUFFIX = ".identity"
+
+
+def file_digest(path: str) -> str:
+    """Compute the sha256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dump_directory_digest(path: str) -> str:
+    """Compute a digest of a directory format database dump.
+
+    The table of contents (`toc.dat`) is hashed along with the name, size
+    and modification time of every other file, so a large dump isn't read
+    in full to find out that it hasn't changed.
+    """
+    digest = hashlib.sha256()
+    digest.update(file_digest(os.path.join(path, "toc.dat")).encode())
+    for name in sorted(os.listdir(path)):
+        stat = os.stat(os.path.join(path, name))
+        if name != "toc.dat":
+            digest.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def create_directory(path: str) -> bool:
+    """Create a directory (and its parents) and give it a new identity.
+
+    Args:
+        path (str): The directory to create.
+
+    Returns:
+        bool: True if the directory was created, False if it already existed.
+    """
+    try:
+        os.makedirs(path)
+    except FileExistsError:
+        return False
+    with open(f"{path.rstrip('/')}{IDENTITY_SUFFIX}", "w", encoding="utf-8") as file:
+        file.write(uuid.uuid4().hex)
+    return True
+
+
+def directory_identity(path: str) -> typing.Optional[str]:
+    """Identify a directory so that recreating it can be noticed.
+
+    The identity is assigned by `create_directory` and kept in a file next
+    to the directory, so a directory that is removed and created again gets
+    a new identity, while one that is copied along with its identity file
+    (such as by a snapshot) keeps it.
+
+    Returns:
+        str: The identity, or None if the directory doesn't exist or wasn't
+        created by `create_directory`.
+    """
+    if not os.path.isdir(path):
+        return None
+    try:
+        with open(f"{path.rstrip('/')}{IDENTITY_SUFFIX}", encoding="utf-8") as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class Ledger:
+    """The content hashes of the inputs applied to some state."""
+
+    def __init__(self, path: str, identity: str = None):
+        """Load the ledger.
+
+        Args:
+            path (str): The ledger's file.
+            identity (str, optional): The identity of the state the entries
+                apply to (see `directory_identity`). When it differs from the
+                identity the ledger was saved with, or the state has no
+                identity, the ledger starts empty.
+        """
+        self.path = path
+        self.identity = identity
+        self.entries: dict[str, str] = {}
+        if identity is None:
+            # without an identity there's no telling if the state was recreated
+            return
+        try:
+            with open(path, encoding="utf-8") as file:
+                saved = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return
+        if saved.get("identity") == identity:
+            self.entries = saved.get("entries", {})
+
+    def applied(self, key: str, digest: str) -> bool:
+        """Determine if the input with this digest has already been applied."""
+        return digest is not None and self.entries.get(key) == digest
+
+    def record(self, key: str, digest: str):
+        """Record that an input has been applied (call `save` to keep it)."""
+        self.entries[key] = digest
+
+    def forget(self, key: str):
+        """Forget an input, so that it is applied again."""
+        self.entries.pop(key, None)
+
+    def save(self):
+        """Write the ledger to its file."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as file:
+            json.dump({"identity": self.identity, "entries": self.entries}, file, indent=2)
+        os.replace(f"{self.path}.tmp", self.path)
@@ -0,0 +1,233 @@
+"""Concurrent execution of lifecycle hooks.
+
+Lifecycle signals are normally delivered by `Definition._emit`, which calls
+each child's hook one after another. For hooks that do real work in the
+containers (loading fixtures, seeding repositories, restoring databases)
+that serializes a lot of independent waiting. The `HookScheduler` instead
+builds a dependency graph of every definition in the lab and runs the hooks
+of independent definitions concurrently.
+
+A definition's hook runs after:
+    * the hooks of its children (the same order `super().started()` gives),
+    * the hooks of the nodes it lists in its `dependencies`, and
+    * the hooks named with the `lab_builder.decorators.after` decorator.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import sys
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from lab_builder.lab import Definition, Lab
+    from lab_builder.readiness import ReadinessWatcher
+
+
+class HookError(Exception):
+    """Raised when one or more lifecycle hooks failed."""
+
+
+@dataclass
+class HookTiming:
+    """How long a definition's hook took to run."""
+
+    name: str
+    elapsed: float = 0.0
+    error: Exception = None
+    skipped: bool = False
+
+
+def definition_path(definition: "Definition") -> str:
+    """Get a definition's path within its lab (`service/node`)."""
+    names = []
+    while definition.parent is not None:
+        names.append(definition.name)
+        definition = definition.parent
+    return "/".join(reversed(names)) or definition.name
+
+
+class HookScheduler:
+    """Run a lifecycle hook across a lab, concurrently where possible."""
+
+    def __init__(
+            self,
+            lab: "Lab",
+            max_workers: int = 8,
+            readiness: "ReadinessWatcher" = None,
+            ready_timeout: float = None,
+        ):
+        """Initialize the scheduler.
+
+        Args:
+            lab (Lab): The lab whose definitions should be signaled.
+            max_workers (int, optional): The maximum number of hooks to run at
+                the same time. Defaults to 8.
+            readiness (ReadinessWatcher, optional): When given, the hooks of the
+                `gated` nodes only run once the node is ready. Defaults to None.
+            ready_timeout (float, optional): How long to wait for a node to be
+                ready before its hook fails. Defaults to None (no limit).
+        """
+        self.lab = lab
+        self.max_workers = max_workers
+        self.readiness = readiness
+        self.ready_timeout = ready_timeout
+        self.signal = None
+        self.timings: list[HookTiming] = []
+        # the nodes whose hook waits for the node to be ready
+        self.gated: set["Definition"] = set()
+
+    def _definitions(self) -> list["Definition"]:
+        definitions = []
+        pending = [self.lab]
+        while pending:
+            definition = pending.pop(0)
+            definitions.append(definition)
+            pending.extend(definition.children.values())
+        return definitions
+
+    def _resolve(self, definition: "Definition", name: str, nodes: dict[str, "Definition"]):
+        if definition.parent is not None and name in definition.parent.children:
+            return definition.parent.children[name]
+        if name in nodes:
+            return nodes[name]
+        raise HookError(f"{definition_path(definition)}: unknown hook dependency '{name}'")
+
+    def graph(self, signal: str) -> dict["Definition", set["Definition"]]:
+        """Compute the hooks each definition's hook must wait for.
+
+        This also determines which nodes are `gated`: a node's hook only waits
+        for the node to be ready when the node overrides the hook, or when
+        another hook depends on the node (with `dependencies` or `after`).
+
+        Args:
+            signal (str): The lifecycle hook (e.g. `started`).
+
+        Returns:
+            dict[Definition, set[Definition]]: The prerequisites of every definition.
+        """
+        definitions = self._definitions()
+        nodes = {node.name: node for node in self.lab.nodes}
+        graph = {}
+        depended = set()
+        for definition in definitions:
+            prerequisites = set(definition.children.values())
+            explicit = set()
+            dependencies = getattr(definition, "dependencies", None)
+            if isinstance(dependencies, list):
+                for dependency in dependencies:
+                    if dependency.name in nodes:
+                        explicit.add(nodes[dependency.name])
+            hook = getattr(type(definition), signal)
+            for name in getattr(hook, "after", ()):
+                explicit.add(self._resolve(definition, name, nodes))
+            explicit.discard(definition)
+            depended |= explicit
+            graph[definition] = (prerequisites | explicit) - {definition}
+
+        # `Definition`'s own hook only signals the children, which a node doesn't have
+        from lab_builder.lab import Definition
+
+        self.gated = {
+            node for node in nodes.values()
+            if node in depended or getattr(type(node), signal) is not getattr(Definition, signal)
+        }
+        return graph
+
+    def _run_hook(self, definition: "Definition") -> HookTiming:
+        timing = HookTiming(definition_path(definition))
+        start = time.monotonic()
+        try:
+            with self.lab.tracer.span(f"{self.signal} {timing.name}", "hook"):
+                self._call_hook(definition)
+        except Exception as ex:
+            timing.error = ex
+        timing.elapsed = time.monotonic() - start
+        return timing
+
+    def _call_hook(self, definition: "Definition"):
+        if self.readiness is not None and definition in self.gated:
+            if not self.readiness.wait([definition.name], timeout=self.ready_timeout):
+                if self.readiness.exited([definition.name]):
+                    raise HookError(f"{definition.name} exited before it was ready")
+                raise HookError(f"{definition.name} was not ready after {self.ready_timeout}s")
+        getattr(definition, self.signal)()
+
+    def run(self, signal: str = "started"):
+        """Run the hook of every definition in the lab.
+
+        Hooks whose prerequisites failed are skipped. Once every other hook
+        has finished, a `HookError` is raised for the failures.
+
+        Args:
+            signal (str, optional): The lifecycle hook to run. Defaults to "started".
+
+        Raises:
+            HookError: If any of the hooks failed.
+        """
+        graph = self.graph(signal)
+        self.signal = signal
+        self.timings = []
+        self.lab._scheduler = self
+        try:
+            self._run(graph)
+        finally:
+            self.lab._scheduler = None
+            self.signal = None
+
+        self.print_summary(signal)
+        failures = [timing for timing in self.timings if timing.error is not None]
+        if failures:
+            names = ", ".join(timing.name for timing in failures)
+            raise HookError(f"{signal} hooks failed: {names}") from failures[0].error
+
+    def _run(self, graph: dict["Definition", set["Definition"]]):
+        remaining = {definition: set(prerequisites) for definition, prerequisites in graph.items()}
+        failed = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while remaining or running:
+                for definition in [definition for definition, prerequisites in remaining.items() if not prerequisites]:
+                    del remaining[definition]
+                    running[executor.submit(self._run_hook, definition)] = definition
+
+                if not running:
+                    # everything left is waiting on a failed (or cyclic) prerequisite
+                    blocked = set(failed)
+                    changed = True
+                    while changed:
+                        changed = False
+                        for definition, prerequisites in remaining.items():
+                            if definition not in blocked and prerequisites & blocked:
+                                blocked.add(definition)
+                                changed = True
+                    for definition in remaining:
+                        if definition not in blocked:
+                            raise HookError(f"{definition_path(definition)}: hook dependency cycle")
+                        self.timings.append(HookTiming(definition_path(definition), skipped=True))
+                    return
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    definition = running.pop(future)
+                    timing = future.result()
+                    self.timings.append(timing)
+                    if timing.error is not None:
+                        failed.add(definition)
+                        continue
+                    for prerequisites in remaining.values():
+                        prerequisites.discard(definition)
+
+    def print_summary(self, signal: str, file=None):
+        """Print how long each hook took, slowest first (to the current stdout by default)."""
+        if not self.timings:
+            return
+        file = file or sys.stdout
+        width = max(len(timing.name) for timing in self.timings)
+        print(f"{signal} hooks:", file=file)
+        for timing in sorted(self.timings, key=lambda timing: timing.elapsed, reverse=True):
+            status = ""
+            if timing.skipped:
+                status = "skipped"
+            elif timing.error is not None:
+                status = f"failed: {timing.error}"
+            print(f"  {timing.name:<{width}}  {timing.elapsed:7.2f}s  {status}".rstrip(), file=file)
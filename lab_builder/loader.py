@@ -0,0 +1,38 @@
+"""Loading lab definitions by path."""
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from lab_builder.lab import Lab
+
+
+def module_name(path: str) -> str:
+    """Convert a lab path (`lab_builder/labs/ldap/labs.py`) to its module name."""
+    return path.replace("/", ".").removesuffix(".py")
+
+
+def load_lab(path: str) -> type["Lab"]:
+    """Import a lab module and get its lab class.
+
+    Args:
+        path (str): The lab module's path (`lab_builder/labs/ldap/labs.py`),
+            dotted module name (`lab_builder.labs.ldap.labs`) or the name of
+            one of the labs in `lab_builder.labs` (`LDAPAuth`).
+
+    Returns:
+        type[Lab]: The class assigned to the module's `lab` variable.
+    """
+    if "/" not in path and "." not in path:
+        from lab_builder.discovery import LabIndex
+
+        lab = LabIndex().find(path)
+        if lab is not None:
+            path = lab.path
+    return importlib.import_module(module_name(path)).lab
+
+
+def default_base_dir() -> str:
+    """Get the directory that labs keep their state in."""
+    import platformdirs
+
+    return platformdirs.user_data_dir(appname="lab_builder", ensure_exists=True)
@@ -1,12 +1,15 @@
+import base64
 from enum import Enum
 import json
 import os
 import shlex
 import shutil
 import sys
-from typing import TypedDict
+from typing import TypedDict, Union
 from dataclasses import dataclass
+from lab_builder.build import image_tag
 from lab_builder.lab import Definition
+from lab_builder.ledger import create_directory
 
 
 def command(method):
@@ -71,6 +74,131 @@ class Dependency:
         return {"node": self.name, "state": self.state.value}
 
 
+@dataclass
+class Step:
+    """A single command of a script run by `Node.run_script`."""
+
+    cmd: Union[str, list[str]]
+    working_directory: str = None
+
+    @property
+    def shell_command(self) -> str:
+        """Get the step as a shell command string."""
+        cmd = self.cmd
+        if isinstance(cmd, str):
+            cmd = [cmd]
+        shell_command = shlex.join(cmd)
+        if self.working_directory:
+            shell_command = f"cd {shlex.quote(self.working_directory)} && {shell_command}"
+        return shell_command
+
+
+@dataclass
+class StepResult:
+    """The outcome of a single `Step` run by `Node.run_script`."""
+
+    step: Step
+    return_code: int
+    stdout: str
+    stderr: str
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        """Determine if the step succeeded."""
+        return self.return_code == 0
+
+
+# Markers used to frame each step's results in the output of a script
+STEP_MARKER = "@@lab_builder-step"
+STDERR_MARKER = "@@lab_builder-stderr"
+END_MARKER = "@@lab_builder-end"
+
+
+def build_script(steps: list[Step], stop_on_error: bool = True) -> str:
+    """Build a shell script that runs the steps and reports each step's results.
+
+    Each step's stdout and stderr are captured to temporary files and then
+    printed base64 encoded between markers, along with the return code and
+    start/end timestamps, so that `parse_script_output` can recover them.
+
+    Args:
+        steps (list[Step]): The steps to run, in order.
+        stop_on_error (bool, optional): Stop at the first step that fails. Defaults to True.
+
+    Returns:
+        str: The shell script.
+    """
+    lines = [
+        "_lb_out=$(mktemp)",
+        "_lb_err=$(mktemp)",
+        "_lb_status=0",
+    ]
+    for index, step in enumerate(steps):
+        lines.extend([
+            "_lb_start=$(date +%s.%N)",
+            f'( {step.shell_command} ) >"$_lb_out" 2>"$_lb_err"',
+            "_lb_rc=$?",
+            "_lb_end=$(date +%s.%N)",
+            f'echo "{STEP_MARKER} {index} $_lb_rc $_lb_start $_lb_end"',
+            'base64 "$_lb_out"',
+            f"echo {STDERR_MARKER}",
+            'base64 "$_lb_err"',
+            f"echo {END_MARKER}",
+            '[ "$_lb_rc" -eq 0 ] || _lb_status=$_lb_rc',
+        ])
+        if stop_on_error:
+            lines.append('[ "$_lb_rc" -eq 0 ] || { rm -f "$_lb_out" "$_lb_err"; exit "$_lb_rc"; }')
+    lines.extend([
+        'rm -f "$_lb_out" "$_lb_err"',
+        'exit "$_lb_status"',
+    ])
+    return "\n".join(lines)
+
+
+def _elapsed(start: str, end: str) -> float:
+    # not every `date` supports %N, so fall back to whole seconds
+    try:
+        return float(end) - float(start)
+    except ValueError:
+        return float(end.split(".")[0]) - float(start.split(".")[0])
+
+
+def parse_script_output(steps: list[Step], output: str) -> list[StepResult]:
+    """Recover the per-step results from the output of a `build_script` script.
+
+    Args:
+        steps (list[Step]): The steps the script was built from.
+        output (str): The script's stdout.
+
+    Returns:
+        list[StepResult]: The results of the steps that ran, in order.
+    """
+    results = []
+    lines = iter(output.splitlines())
+    for line in lines:
+        if not line.startswith(STEP_MARKER):
+            continue
+        _, index, return_code, start, end = line.split(" ")
+        streams = {"stdout": [], "stderr": []}
+        stream = streams["stdout"]
+        for line in lines:
+            if line == STDERR_MARKER:
+                stream = streams["stderr"]
+            elif line == END_MARKER:
+                break
+            else:
+                stream.append(line)
+        results.append(StepResult(
+            step=steps[int(index)],
+            return_code=int(return_code),
+            stdout=base64.b64decode("".join(streams["stdout"])).decode(errors="replace"),
+            stderr=base64.b64decode("".join(streams["stderr"])).decode(errors="replace"),
+            elapsed=_elapsed(start, end),
+        ))
+    return results
+
+
 NodeConfig = TypedDict(
     "NodeConfig",
     {
@@ -148,10 +276,7 @@ class Node(Definition, ConfigObjectMixin):
         for bind in self.binds:
             local, _ = bind.split(":", 1)
             if local.startswith(self.state_directory):
-                try:
-                    os.makedirs(local)
-                except FileExistsError:
-                    pass
+                create_directory(local)
 
     def created(self):
         super().created()
@@ -164,23 +289,41 @@ class Node(Definition, ConfigObjectMixin):
             raise ValueError(f"Both containerfile and image are set for {self.__class__.__name__}. Choose only one.")
         
         if container_file:
-            container_file = os.path.join(self.definition_directory, container_file)
-            self.image = f"lab_builder/{self.__class__.__name__.lower()}:latest"
-            cmd = [
-                "docker",
-                "image",
-                "build",
-                "--tag",
-                self.image,
-                "--file",
-                container_file,
-                os.path.dirname(container_file),
-            ]
-            self.lab.run_cmd(cmd)
+            # The image itself is built by the lab's `ImageBuilder` when the
+            # lab is started
+            self.container_file_path = os.path.join(self.definition_directory, container_file)
+            self.image = image_tag(self.__class__.__name__, self.container_file_path)
 
     def destroyed(self):
         shutil.rmtree(self.state_directory)
 
+    @property
+    def container_name(self) -> str:
+        """Get the name of the node's container."""
+        return f"clab-{self.lab.name}-{self.name}"
+
+    def host_path(self, container_path: str) -> Union[str, None]:
+        """Get the host path that is bound to a path in the container.
+
+        Args:
+            container_path (str): The absolute path within the container.
+
+        Returns:
+            str: The path on the host, or None if the path isn't within one of
+            the node's binds.
+        """
+        matched_remote = None
+        host_path = None
+        for bind in self.binds:
+            local, remote = bind.split(":", 2)[:2]
+            if container_path != remote and not container_path.startswith(remote.rstrip("/") + "/"):
+                continue
+            # the most specific bind is the one that is visible in the container
+            if matched_remote is None or len(remote) > len(matched_remote):
+                matched_remote = remote
+                host_path = local + container_path[len(remote):]
+        return host_path
+
     def run_cmd(self, cmd, working_directory=None, interactive=False, stderr=sys.stderr):
         if isinstance(cmd, str):
             cmd = [cmd]
@@ -194,7 +337,7 @@ class Node(Definition, ConfigObjectMixin):
             if working_directory:
                 cmd.extend(["-w", working_directory])
             cmd.extend([
-                f"clab-{self.lab.name}-{self.name}",
+                self.container_name,
                 shell_command,
             ])
             self.lab.run_docker_cmd(cmd, stdout=sys.stdout)
@@ -207,16 +350,7 @@ class Node(Definition, ConfigObjectMixin):
                 shlex.quote(" ".join(["cd", working_directory, "&&", shell_command])),
             ])
 
-        cmd = [
-            "exec",
-            "--label", f"clab-node-name={self.name}",
-            "--format", "json",
-            "--cmd", shell_command,
-        ]
-
-        process = self.lab.run_clab_cmd(cmd)
-        output = json.loads(process.stdout)
-        output = next(iter(output.values())).pop()
+        output = self._exec(shell_command)
         if output["return-code"] != 0 and stderr:
             print(f"{self.name} Command Failed:", shell_command, file=stderr)
             print(output["stderr"], file=stderr)
@@ -224,6 +358,52 @@ class Node(Definition, ConfigObjectMixin):
             
         return output
 
+    def run_script(self, steps: list[Step], stop_on_error=True, stderr=sys.stderr) -> list[StepResult]:
+        """Run several commands in the node with a single exec.
+
+        The steps are run in order by one shell in the container, so a
+        multi-command setup costs one round trip instead of one per command.
+
+        Args:
+            steps (list[Step]): The commands to run. Plain strings and lists are
+                accepted as steps without a working directory.
+            stop_on_error (bool, optional): Skip the remaining steps once a step
+                fails. Defaults to True.
+            stderr (optional): Where to report failed steps. Defaults to sys.stderr.
+
+        Returns:
+            list[StepResult]: The results of the steps that ran, in order.
+        """
+        steps = [step if isinstance(step, Step) else Step(step) for step in steps]
+        script = build_script(steps, stop_on_error=stop_on_error)
+        output = self._exec(shlex.join(["sh", "-c", script]))
+        results = parse_script_output(steps, output["stdout"])
+        for result in results:
+            if not result.ok and stderr:
+                print(f"{self.name} Command Failed:", result.step.shell_command, file=stderr)
+                print(result.stderr, file=stderr)
+                print(result.stdout, file=stderr)
+        return results
+
+    def _exec(self, shell_command: str) -> dict:
+        """Execute a shell command in the node and return containerlab's result."""
+        with self.lab.tracer.span(f"exec {self.name}", "exec", cmd=shell_command):
+            if self.lab.engine is not None:
+                return self.lab.engine.exec(self.container_name, shell_command)
+
+            cmd = [
+                "exec",
+                # other labs can have nodes with the same name
+                "--label", f"containerlab={self.lab.name}",
+                "--label", f"clab-node-name={self.name}",
+                "--format", "json",
+                "--cmd", shell_command,
+            ]
+
+            process = self.lab.run_clab_cmd(cmd)
+            output = json.loads(process.stdout)
+            return next(iter(output.values())).pop()
+
 class NetworkNode(Node):
     """A containerlab network device node."""
 
@@ -0,0 +1,302 @@
+"""Tracking of when a lab's nodes are ready.
+
+Containerlab's `wait-for` stages and the nodes' health check intervals only
+order container creation, they don't tell the lab when a node can actually
+be used. The `ReadinessWatcher` keeps an in-memory map of every node's
+container state, fed by the Docker Engine's health status events (or by
+polling `containerlab inspect` when the engine API isn't available), so
+that hooks and commands can wait for exactly the nodes they need.
+
+A node is ready when its container is healthy or, for nodes without a
+health check, when its container is running. A node whose container has
+exited (for longer than a recreated container takes to replace it) won't
+become ready, so waiting for it fails straight away.
+
+The watcher only runs while something needs it (see `watching`): while the
+lab is deployed and its `started` hooks run, and while `wait` waits.
+"""
+import contextlib
+from dataclasses import dataclass
+from datetime import datetime
+import http.client
+import re
+import subprocess
+import sys
+import threading
+import time
+import typing
+
+from lab_builder.engine import EngineError
+from lab_builder.tracing import Span
+
+if typing.TYPE_CHECKING:
+    from lab_builder.lab import Lab
+
+
+@dataclass
+class Readiness:
+    """The readiness state of a single node."""
+
+    node: str
+    status: str = "unknown"
+    # Wall clock times (seconds since the epoch)
+    created: float = None
+    ready_at: float = None
+    needs_health: bool = False
+    # When the status last changed (`time.monotonic`)
+    changed_at: float = None
+
+    @property
+    def ready(self) -> bool:
+        """Determine if the node is ready."""
+        if self.needs_health:
+            return self.status == "healthy"
+        return self.status in ["running", "healthy"]
+
+    @property
+    def exited(self) -> bool:
+        """Determine if the node's container has stopped."""
+        return self.status in ["exited", "dead"]
+
+    @property
+    def startup_time(self) -> typing.Optional[float]:
+        """Get how long the node took to go from created to ready."""
+        if self.created is None or self.ready_at is None:
+            return None
+        return max(self.ready_at - self.created, 0.0)
+
+
+def parse_time(value: str) -> typing.Optional[float]:
+    """Parse a Docker timestamp (RFC 3339 with nanoseconds) into epoch seconds."""
+    match = re.match(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(\.\d+)?(Z|[+-]\d\d:\d\d)", value or "")
+    if not match:
+        return None
+    seconds, fraction, zone = match.groups()
+    zone = "+00:00" if zone == "Z" else zone
+    timestamp = datetime.fromisoformat(f"{seconds}{zone}").timestamp()
+    if fraction:
+        timestamp += float(fraction)
+    return timestamp
+
+
+class ReadinessWatcher:
+    """Keep track of the readiness of a lab's nodes."""
+
+    def __init__(self, lab: "Lab", poll_interval: float = 2.0, exit_grace: float = 5.0):
+        """Initialize the watcher.
+
+        Args:
+            lab (Lab): The lab to watch.
+            poll_interval (float, optional): How often to poll `containerlab inspect`
+                when the engine API isn't available. Defaults to 2.0.
+            exit_grace (float, optional): How long a node's container must have been
+                exited before waiting for the node fails (a container that is being
+                recreated is briefly exited). Defaults to 5.0.
+        """
+        self.lab = lab
+        self.poll_interval = poll_interval
+        self.exit_grace = exit_grace
+        self.nodes: dict[str, Readiness] = {}
+        self._condition = threading.Condition()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stream = None
+        self._stopping = threading.Event()
+        # how many callers are inside `watching`
+        self._watchers = 0
+        # whether the readiness map was seeded since the watcher started
+        self._seeded = False
+        self._lab_nodes = None
+
+    def _readiness(self, name: str) -> Readiness:
+        if name not in self.nodes:
+            if self._lab_nodes is None:
+                self._lab_nodes = {node.name: node for node in self.lab.nodes}
+            node = self._lab_nodes.get(name)
+            health_check = getattr(node, "health_check", None)
+            self.nodes[name] = Readiness(name, needs_health=bool(health_check and health_check.test))
+        return self.nodes[name]
+
+    def update(self, name: str, status: str, timestamp: float = None, created: float = None):
+        """Record a node's container status.
+
+        Args:
+            name (str): The node name.
+            status (str): The container's health status or state.
+            timestamp (float, optional): When the status was observed. Defaults to now.
+            created (float, optional): When the container was created.
+        """
+        timestamp = timestamp or time.time()
+        with self._condition:
+            readiness = self._readiness(name)
+            if status == "created" or created is not None:
+                readiness.created = created or timestamp
+                readiness.ready_at = None
+            if readiness.status != status:
+                readiness.changed_at = time.monotonic()
+            readiness.status = status
+            if readiness.ready and readiness.ready_at is None:
+                readiness.ready_at = timestamp
+                if readiness.created is not None:
+                    self.lab.tracer.add(Span(f"ready {name}", "health", readiness.created, timestamp))
+            self._condition.notify_all()
+
+    def handle_event(self, event: dict):
+        """Update the readiness map from a Docker Engine container event."""
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        name = attributes.get("clab-node-name")
+        if not name:
+            return
+        action = event.get("Action", event.get("status", ""))
+        timestamp = event.get("timeNano", 0) / 1e9 or event.get("time") or None
+        if action == "create":
+            self.update(name, "created", timestamp)
+        elif action == "start":
+            self.update(name, "running", timestamp)
+        elif action.startswith("health_status:"):
+            self.update(name, action.split(":", 1)[1].strip(), timestamp)
+        elif action in ["die", "destroy"]:
+            self.update(name, "exited", timestamp)
+
+    def refresh(self, containers: dict[str, dict] = None):
+        """Seed the readiness map from the current state of the lab's containers.
+
+        Args:
+            containers (dict[str, dict], optional): The lab's containers, keyed by
+                node name. Defaults to the containers in the lab's inspection snapshot.
+        """
+        if containers is None:
+            containers = self.lab.containers
+        for name, container in containers.items():
+            created = None
+            if self.lab.engine is not None:
+                details = self.lab.engine.inspect_container(container["name"])
+                state = details["State"]
+                status = state.get("Health", {}).get("Status") or state["Status"]
+                created = parse_time(details.get("Created"))
+            else:
+                # `containerlab inspect` reports the health in the status (`Up 2 minutes (healthy)`)
+                match = re.search(r"\((healthy|unhealthy|health: starting)\)", container.get("status", ""))
+                status = container.get("state", "unknown")
+                if match:
+                    status = "starting" if match.group(1) == "health: starting" else match.group(1)
+            with self._condition:
+                readiness = self._readiness(name)
+                if created is not None and readiness.created is None:
+                    readiness.created = created
+            if readiness.status != status:
+                self.update(name, status)
+
+    def _watch_events(self):
+        while not self._stopping.is_set():
+            try:
+                self._stream = self.lab.engine.events({
+                    "type": ["container"],
+                    "label": [f"containerlab={self.lab.name}"],
+                })
+            except (OSError, EngineError, http.client.HTTPException) as ex:
+                print(f"{self.lab.name}: unable to watch container events: {ex}", file=sys.stderr)
+                self._stopping.wait(self.poll_interval)
+                continue
+            for event in self._stream:
+                self.handle_event(event)
+            self._stream.close()
+
+    def _poll(self):
+        while not self._stopping.is_set():
+            try:
+                # inspect into a result of our own, the lab's snapshot belongs
+                # to the command that is running
+                self.refresh(self.lab.query_containers())
+            except (OSError, subprocess.CalledProcessError, ValueError) as ex:
+                print(f"{self.lab.name}: unable to inspect containers: {ex}", file=sys.stderr)
+            self._stopping.wait(self.poll_interval)
+
+    @contextlib.contextmanager
+    def watching(self):
+        """Watch the lab's containers until every caller that is watching is done."""
+        with self._lock:
+            self._watchers += 1
+            self.start()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._watchers -= 1
+                if self._watchers == 0:
+                    self.stop()
+
+    def start(self):
+        """Start watching the lab's containers (if not already watching)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._seeded = False
+        target = self._poll
+        if self.lab.engine is not None:
+            target = self._watch_events
+        self._thread = threading.Thread(target=target, name=f"{self.lab.name}-readiness", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching the lab's containers."""
+        self._stopping.set()
+        if self._stream is not None:
+            self._stream.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def wait(self, names: typing.Iterable[str] = None, timeout: float = None) -> bool:
+        """Wait for nodes to become ready.
+
+        Args:
+            names (typing.Iterable[str], optional): The nodes to wait for.
+                Defaults to all of the lab's nodes.
+            timeout (float, optional): The maximum number of seconds to wait.
+                Defaults to None (no limit).
+
+        Returns:
+            bool: True if the nodes are ready, False if the timeout expired or
+            one of the nodes exited first (see `exited`).
+        """
+        if names is None:
+            names = [node.name for node in self.lab.nodes]
+        names = list(names)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.watching():
+            if self.lab.engine is not None and not self._seeded:
+                # events only report changes, so start from the current state
+                # (once, rather than for every node that is waited for)
+                self._seeded = True
+                self.refresh(self.lab.query_containers())
+            with self._condition:
+                while True:
+                    nodes = [self._readiness(name) for name in names]
+                    if all(readiness.ready for readiness in nodes):
+                        return True
+                    now = time.monotonic()
+                    if self._exited(nodes, now) or (deadline is not None and now >= deadline):
+                        return False
+                    # check again at the deadline, or once an exited node has been exited for long enough
+                    wakeup = [deadline - now] if deadline is not None else []
+                    wakeup.extend(
+                        (readiness.changed_at or now) + self.exit_grace - now for readiness in nodes if readiness.exited
+                    )
+                    self._condition.wait(min(wakeup) if wakeup else None)
+
+    def _exited(self, nodes: list[Readiness], now: float) -> list[str]:
+        return [
+            readiness.node for readiness in nodes
+            if readiness.exited and now - (readiness.changed_at or now) >= self.exit_grace
+        ]
+
+    def exited(self, names: typing.Iterable[str]) -> list[str]:
+        """Get the nodes whose containers have been exited for longer than `exit_grace`."""
+        with self._condition:
+            return self._exited([self._readiness(name) for name in names], time.monotonic())
+
+    def startup_times(self) -> dict[str, typing.Optional[float]]:
+        """Get how long each node took to go from created to ready."""
+        with self._condition:
+            return {name: readiness.startup_time for name, readiness in self.nodes.items()}
@@ -1,15 +1,19 @@
 """The lab runner definition."""
 
 import cmd2
-import importlib
+import functools
 from pprint import pprint
+import time
+import typing
 
-import platformdirs
+from .loader import default_base_dir, load_lab
 
-from .lab import Lab
+if typing.TYPE_CHECKING:
+    from .lab import Lab
 
 def check_running(func):
     """Method decorator that makes sure the lab is already running before continuing to the decorated method."""
+    @functools.wraps(func)
     def decorator(self: "LabRunner", *args, **kwargs):
         if not self.lab.running:
             print(f"Error: {self.lab.name} is not running.")
@@ -21,19 +25,20 @@ def check_running(func):
 
 
 class LabRunner(cmd2.Cmd):
-    lab: Lab
+    lab: "Lab"
     intro = "Welcome to the lab builder.  Type help or ? to list commands.\n"
     file = None
 
     def __init__(self, lab: str):
-        lab = lab.replace("/", ".").removesuffix(".py")
-        # sys.path.append(os.path.join(os.curdir, ".."))
-        # importlib.import_module("labs")
-        module = importlib.import_module(lab)
-        base_dir = platformdirs.user_data_dir(appname="lab_builder", ensure_exists=True)
-        self.lab: Lab = module.lab(base_dir=base_dir)
+        # The lab's services and nodes are only created once a command needs them
+        self.lab: "Lab" = load_lab(lab)(base_dir=default_base_dir(), lazy=True)
         super().__init__()
 
+    def precmd(self, statement: cmd2.Statement) -> cmd2.Statement:
+        """Start every command with a fresh lab inspection snapshot."""
+        self.lab.invalidate_inspection()
+        return statement
+
     @property
     def prompt(self):
         """Display the command line prompt."""
@@ -59,6 +64,144 @@ class LabRunner(cmd2.Cmd):
         print()
         return True
 
+    def do_timings(self, _):
+        """Summarize the time spent in each traced phase of the lab's lifecycle."""
+        rows = self.lab.tracer.summary()
+        if not rows:
+            print("Nothing has been traced yet.")
+            return
+        width = max(len(name) for _, name, *_ in rows)
+        print(f"{'category':<12} {'name':<{width}} {'count':>5} {'total':>9} {'max':>9}")
+        for category, name, count, total, maximum in rows:
+            print(f"{category:<12} {name:<{width}} {count:>5} {total:>8.2f}s {maximum:>8.2f}s")
+
+    def do_binds(self, statement: cmd2.Statement):
+        """Report the nodes' binds of individual files: binds [--all]."""
+        file_binds = self.lab.file_binds
+        if not file_binds:
+            print("No node binds individual files.")
+            return
+        for path, binds in sorted(file_binds.items(), key=lambda item: (-len(item[1]), item[0])):
+            print(f"  {path:<30} {len(binds):>4} file mount(s)")
+            if "--all" in statement.arg_list:
+                for bind in binds:
+                    print(f"    {bind}")
+        print(f"{sum(len(binds) for binds in file_binds.values())} file mount(s) in total")
+
+    @check_running
+    def do_wait(self, statement: cmd2.Statement):
+        """Wait for nodes to be ready: wait [node...] [--timeout SECONDS].
+
+        The timeout defaults to the lab's `ready_timeout`.
+        """
+        args = list(statement.arg_list)
+        timeout = self.lab.ready_timeout
+        if "--timeout" in args:
+            index = args.index("--timeout")
+            try:
+                timeout = float(args[index + 1])
+            except (IndexError, ValueError):
+                print("Error: --timeout requires a number of seconds")
+                return
+            del args[index:index + 2]
+        unknown = sorted(set(args) - {node.name for node in self.lab.nodes})
+        if unknown:
+            print(f"Error: unknown nodes {', '.join(unknown)}")
+            return
+        names = args or None
+        readiness = self.lab.readiness
+        if readiness.wait(names, timeout=timeout):
+            print("Ready")
+        else:
+            print(f"Timed out after {timeout}s")
+        for name, readiness in sorted(readiness.nodes.items()):
+            if names is None or name in names:
+                startup_time = "" if readiness.startup_time is None else f"{readiness.startup_time:.1f}s"
+                print(f"  {name:<20} {readiness.status:<10} {startup_time}")
+
+    def do_list(self, statement: cmd2.Statement):
+        """List the labs that ship with lab_builder: list [prefix]."""
+        from .discovery import LabIndex
+
+        prefix = statement.arg_list[0] if statement.arg_list else ""
+        for lab in LabIndex().matching(prefix):
+            current = "*" if lab.class_name == self.lab.__class__.__name__ else " "
+            print(f"{current} {lab.name:<20} {lab.path}")
+
+    def complete_list(self, text: str, line: str, begidx: int, endidx: int):
+        from .discovery import LabIndex
+
+        return LabIndex().complete(text)
+
+    def do_batch(self, statement: cmd2.Statement):
+        """Run the steps of a batch script, reporting each step as JSON: batch <script> [--keep-going]."""
+        from .batch import Batch, BatchError, parse_script
+
+        args = list(statement.arg_list)
+        keep_going = "--keep-going" in args
+        if keep_going:
+            args.remove("--keep-going")
+        if len(args) != 1:
+            print("Usage: batch <script> [--keep-going]")
+            return
+        try:
+            with open(args[0], encoding="utf-8") as file:
+                steps = parse_script(file)
+        except (OSError, BatchError) as ex:
+            print(f"Error: {ex}")
+            return
+        Batch(self.lab, keep_going=keep_going).run(steps)
+
+    def do_snapshot(self, statement: cmd2.Statement):
+        """Snapshot the nodes' state directories: snapshot [name [service/node...] [--replace]] | --delete <name>."""
+        from .snapshot import SnapshotError
+
+        args = list(statement.arg_list)
+        if not args:
+            for snapshot in self.lab.snapshots.available():
+                created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot["created"]))
+                print(f"  {snapshot['name']:<20} {created}  {len(snapshot['nodes'])} node(s)")
+            return
+        if args[0] == "--delete":
+            if len(args) != 2:
+                print("Usage: snapshot --delete <name>")
+                return
+            try:
+                self.lab.snapshots.delete(args[1])
+            except SnapshotError as ex:
+                print(f"Error: {ex}")
+                return
+            print(f"Deleted {args[1]}")
+            return
+        replace = "--replace" in args
+        if replace:
+            args.remove("--replace")
+        try:
+            snapshot = self.lab.snapshots.take(args[0], args[1:], replace=replace)
+        except SnapshotError as ex:
+            print(f"Error: {ex}")
+            return
+        print(f"Captured {len(snapshot['nodes'])} node(s) in {snapshot['elapsed']:.1f}s")
+
+    def do_restore(self, statement: cmd2.Statement):
+        """Restore the nodes' state directories from a snapshot: restore <name>."""
+        from .snapshot import SnapshotError
+
+        if len(statement.arg_list) != 1:
+            print("Usage: restore <name>")
+            return
+        try:
+            snapshot = self.lab.snapshots.restore(statement.arg_list[0])
+        except SnapshotError as ex:
+            print(f"Error: {ex}")
+            return
+        if snapshot["topology"] != self.lab.topology_digest:
+            print("Warning: the lab's topology has changed since the snapshot was taken")
+        print(f"Restored {len(snapshot['nodes'])} node(s), start the lab to use them")
+
+    def complete_restore(self, text: str, line: str, begidx: int, endidx: int):
+        return [snapshot["name"] for snapshot in self.lab.snapshots.available() if snapshot["name"].startswith(text)]
+
     @check_running
     def do_run(self, statement: cmd2.Statement):
         command, command_args = self.lab.get_command(statement.arg_list)
@@ -0,0 +1,211 @@
+"""Warm-state snapshots of a lab's node directories.
+
+Seeding a lab (running migrations, restoring databases and loading
+fixtures) can take much longer than starting its containers. A snapshot
+captures the state directories of a lab's nodes, which hold their named
+binds (`data:/var/lib/postgresql/data`, ...), once the lab is seeded, so
+that a freshly created lab can be put back into that state before it is
+started.
+
+The directories are copied with `cp --reflink=auto`, which clones the
+files on filesystems that support it (btrfs, XFS, ...) and copies them
+elsewhere. Hardlinks are deliberately not used: databases update their
+files in place, which would change the snapshot along with the lab.
+"""
+import contextlib
+import json
+import os
+import time
+import typing
+
+from lab_builder.lifecycle import definition_path
+
+if typing.TYPE_CHECKING:
+    from lab_builder.lab import Lab
+    from lab_builder.node import Node
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot can't be taken or restored."""
+
+
+class Snapshots:
+    """Take and restore snapshots of a lab's node directories."""
+
+    metadata_file = "snapshot.json"
+
+    def __init__(self, lab: "Lab"):
+        """Initialize the snapshots.
+
+        Args:
+            lab (Lab): The lab whose nodes are snapshotted.
+        """
+        self.lab = lab
+        self.directory = os.path.join(os.path.abspath(lab.base_dir), "snapshots", lab.name)
+
+    def path(self, name: str) -> str:
+        """Get the directory of a snapshot."""
+        if not name or os.sep in name or name.startswith("."):
+            raise SnapshotError(f"Invalid snapshot name {name!r}")
+        return os.path.join(self.directory, name)
+
+    def available(self) -> list[dict]:
+        """Get the metadata of the lab's snapshots, oldest first."""
+        snapshots = []
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                try:
+                    with open(os.path.join(self.directory, name, self.metadata_file), encoding="utf-8") as file:
+                        snapshots.append(json.load(file))
+                except (OSError, ValueError):
+                    continue
+        return sorted(snapshots, key=lambda snapshot: snapshot["created"])
+
+    def select(self, paths: typing.Iterable[str] = None) -> list["Node"]:
+        """Get the nodes with the given paths (`service/node`), or all nodes.
+
+        Raises:
+            SnapshotError: If a path doesn't name a node of the lab.
+        """
+        nodes = {definition_path(node): node for node in self.lab.nodes}
+        if not paths:
+            return list(nodes.values())
+        unknown = [path for path in paths if path not in nodes]
+        if unknown:
+            raise SnapshotError(f"Unknown nodes: {', '.join(unknown)}")
+        return [nodes[path] for path in paths]
+
+    def _copy(self, source: str, destination: str):
+        # containers own most of the files in their binds, so copy as root
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        self.lab.run_cmd(["sudo", "cp", "-a", "--reflink=auto", source, destination], stdout=None)
+
+    def _remove(self, path: str):
+        if os.path.lexists(path):
+            self.lab.run_cmd(["sudo", "rm", "-rf", path], stdout=None)
+
+    @contextlib.contextmanager
+    def _paused(self, nodes: list["Node"]):
+        """Pause the nodes' running containers so their files are consistent.
+
+        Only the containers that were paused are unpaused, even if pausing
+        one of them fails.
+        """
+        containers = self.lab.containers
+        names = [node.container_name for node in nodes if node.name in containers]
+        paused = []
+        try:
+            for name in names:
+                if self.lab.engine is not None:
+                    self.lab.engine.pause(name)
+                else:
+                    self.lab.run_docker_cmd(["pause", name], stdout=None)
+                paused.append(name)
+            yield
+        finally:
+            if paused:
+                if self.lab.engine is not None:
+                    for name in paused:
+                        self.lab.engine.unpause(name)
+                else:
+                    self.lab.run_docker_cmd(["unpause", *paused], stdout=None)
+
+    def take(self, name: str, paths: typing.Iterable[str] = None, replace: bool = False) -> dict:
+        """Snapshot the state directories of the lab's nodes.
+
+        Files kept by the nodes' services (such as the record of which
+        database dump was restored) are captured along with the nodes.
+
+        Args:
+            name (str): The snapshot's name.
+            paths (typing.Iterable[str], optional): The nodes (`service/node`)
+                to capture. Defaults to all of the lab's nodes.
+            replace (bool, optional): Replace an existing snapshot of the same name.
+
+        Raises:
+            SnapshotError: If the snapshot already exists and isn't being replaced.
+
+        Returns:
+            dict: The snapshot's metadata.
+        """
+        directory = self.path(name)
+        if os.path.exists(directory) and not replace:
+            raise SnapshotError(f"Snapshot {name} already exists")
+        nodes = [node for node in self.select(paths) if os.path.isdir(node.state_directory)]
+
+        started = time.time()
+        staging = f"{directory}.tmp"
+        self._remove(staging)
+        with self.lab.tracer.span(f"snapshot {name}", "snapshot", nodes=len(nodes)), self._paused(nodes):
+            services = {node.parent for node in nodes}
+            for service in services:
+                for entry in os.listdir(service.state_directory):
+                    source = os.path.join(service.state_directory, entry)
+                    if os.path.isfile(source):
+                        self._copy(source, os.path.join(staging, service.name, entry))
+            for node in nodes:
+                self._copy(node.state_directory, os.path.join(staging, node.parent.name, node.name))
+
+        os.makedirs(staging, exist_ok=True)
+        metadata = {
+            "name": name,
+            "lab": self.lab.name,
+            "created": started,
+            "elapsed": time.time() - started,
+            "nodes": [definition_path(node) for node in nodes],
+            "topology": self.lab.topology_digest,
+        }
+        with open(os.path.join(staging, self.metadata_file), "w", encoding="utf-8") as file:
+            json.dump(metadata, file, indent=2)
+        self._remove(directory)
+        os.replace(staging, directory)
+        return metadata
+
+    def restore(self, name: str) -> dict:
+        """Put the lab's nodes back into the state captured by a snapshot.
+
+        The snapshotted nodes must not have containers, restore the snapshot
+        before starting the lab.
+
+        Args:
+            name (str): The snapshot's name.
+
+        Raises:
+            SnapshotError: If the snapshot doesn't exist, or one of its nodes has a container.
+
+        Returns:
+            dict: The snapshot's metadata.
+        """
+        directory = self.path(name)
+        try:
+            with open(os.path.join(directory, self.metadata_file), encoding="utf-8") as file:
+                metadata = json.load(file)
+        except FileNotFoundError as ex:
+            raise SnapshotError(f"Snapshot {name} does not exist") from ex
+
+        nodes = self.select(metadata["nodes"])
+        containers = self.lab.containers
+        running = [definition_path(node) for node in nodes if node.name in containers]
+        if running:
+            raise SnapshotError(f"Stop the lab before restoring {name} ({', '.join(running)} are running)")
+
+        with self.lab.tracer.span(f"restore {name}", "snapshot", nodes=len(nodes)):
+            for service in {node.parent for node in nodes}:
+                os.makedirs(service.state_directory, exist_ok=True)
+                for entry in os.listdir(os.path.join(directory, service.name)):
+                    source = os.path.join(directory, service.name, entry)
+                    if os.path.isfile(source):
+                        destination = os.path.join(service.state_directory, entry)
+                        self._remove(destination)
+                        self._copy(source, destination)
+            for node in nodes:
+                self._remove(node.state_directory)
+                self._copy(os.path.join(directory, node.parent.name, node.name), node.state_directory)
+        return metadata
+
+    def delete(self, name: str):
+        """Delete a snapshot."""
+        directory = self.path(name)
+        if not os.path.isdir(directory):
+            raise SnapshotError(f"Snapshot {name} does not exist")
+        self._remove(directory)
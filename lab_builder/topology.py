@@ -0,0 +1,237 @@
+"""Serialization and change detection for containerlab topologies.
+
+Redeploying a lab with `containerlab deploy --reconfigure` recreates every
+container, even when only one node's definition changed. This module
+fingerprints each node's definition and each link so that the exact set of
+nodes that need to be recreated can be computed.
+
+Topologies are written a node (and link) at a time, so a lab with thousands
+of nodes never holds its whole topology file in memory. A digest of the
+written file and the fingerprints are kept in a manifest next to it, which
+lets an unchanged lab be recognized by comparing digests rather than text.
+"""
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+import typing
+
+# Values nested deeper than this (the individual nodes and links) are
+# encoded in one piece, everything above them is streamed
+_STREAM_DEPTH = 3
+
+
+def fingerprint(value) -> str:
+    """Compute a stable digest of a JSON serializable value."""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def link_key(link: dict) -> tuple[str, ...]:
+    """Get an order independent identifier for a topology link."""
+    return tuple(sorted(link["endpoints"]))
+
+
+def _iter_json(value, depth: int, compact: bool) -> typing.Iterator[str]:
+    if depth >= _STREAM_DEPTH or not isinstance(value, (dict, list)) or not value:
+        if compact:
+            yield json.dumps(value, separators=(",", ":"))
+        else:
+            # JSON strings can't contain a literal newline, so this only
+            # indents the value's own lines
+            yield json.dumps(value, indent=2).replace("\n", "\n" + "  " * depth)
+        return
+
+    opening, closing = "{}" if isinstance(value, dict) else "[]"
+    items = value.items() if isinstance(value, dict) else ((None, item) for item in value)
+    yield opening
+    for index, (key, item) in enumerate(items):
+        separator = "," if index else ""
+        if compact:
+            yield separator if key is None else f"{separator}{json.dumps(key)}:"
+        else:
+            indent = "  " * (depth + 1)
+            yield f"{separator}\n{indent}" if key is None else f"{separator}\n{indent}{json.dumps(key)}: "
+        yield from _iter_json(item, depth + 1, compact)
+    yield closing if compact else f"\n{'  ' * depth}{closing}"
+
+
+def iter_topology(topology: dict, compact: bool = False) -> typing.Iterator[str]:
+    """Encode a topology as JSON, a piece at a time.
+
+    Args:
+        topology (dict): The containerlab topology.
+        compact (bool, optional): Leave out the indentation and whitespace.
+            Defaults to False, which gives the same output as
+            `json.dumps(topology, indent=2)`.
+
+    Yields:
+        str: The next piece of the encoded topology.
+    """
+    yield from _iter_json(topology, 0, compact)
+
+
+def topology_digest(topology: dict, compact: bool = False) -> str:
+    """Compute the digest of a topology's encoding without building the whole string."""
+    digest = hashlib.sha256()
+    for chunk in iter_topology(topology, compact):
+        digest.update(chunk.encode())
+    return digest.hexdigest()
+
+
+def topology_manifest(topology: dict) -> dict:
+    """Summarize a topology by fingerprinting its parts.
+
+    Returns:
+        dict: The lab name, the fingerprints of the management network and
+        of each node, and the endpoints of each link.
+    """
+    return {
+        "name": topology.get("name"),
+        "mgmt": fingerprint(topology.get("mgmt")),
+        "nodes": {name: fingerprint(node) for name, node in topology.get("topology", {}).get("nodes", {}).items()},
+        "links": sorted(list(link_key(link)) for link in topology.get("topology", {}).get("links", [])),
+    }
+
+
+def manifest_path(path: str) -> str:
+    """Get the path of the manifest kept alongside a topology file."""
+    return f"{path.removesuffix('.json')}.manifest.json"
+
+
+def write_topology(topology: dict, path: str, compact: bool = False) -> dict:
+    """Write a topology file, and its manifest, a piece at a time.
+
+    The file is written under a temporary name and then moved into place,
+    so containerlab never sees a partially written topology.
+
+    Args:
+        topology (dict): The containerlab topology.
+        path (str): The topology file to write.
+        compact (bool, optional): Leave out the indentation and whitespace. Defaults to False.
+
+    Returns:
+        dict: The manifest, including the `digest` of the written file.
+    """
+    digest = hashlib.sha256()
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        for chunk in iter_topology(topology, compact):
+            file.write(chunk)
+            digest.update(chunk.encode())
+    os.replace(f"{path}.tmp", path)
+
+    stat = os.stat(path)
+    manifest = {
+        "digest": digest.hexdigest(),
+        # the manifest only describes the file while the file is unchanged
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        **topology_manifest(topology),
+    }
+    with open(manifest_path(path), "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+    return manifest
+
+
+def read_manifest(path: str) -> typing.Optional[dict]:
+    """Read the manifest of a topology file.
+
+    Returns:
+        dict: The manifest, or None if there isn't one or the topology file
+        has changed since the manifest was written.
+    """
+    try:
+        with open(manifest_path(path), encoding="utf-8") as file:
+            manifest = json.load(file)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("size") != stat.st_size or manifest.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    return manifest
+
+
+@dataclass
+class TopologyDiff:
+    """The differences between a deployed topology and a new one."""
+
+    added: set[str] = field(default_factory=set)
+    removed: set[str] = field(default_factory=set)
+    changed: set[str] = field(default_factory=set)
+    # Unchanged nodes that are directly linked to an added, removed or changed
+    # node. Destroying a node removes its links, and deploying a subset of the
+    # nodes only creates the links between them, so these are recreated as well.
+    peers: set[str] = field(default_factory=set)
+    # The links between a peer and a node that keeps running, which go with the
+    # peer and aren't created by the partial deploy, so they are created again
+    relink: list[tuple[str, str]] = field(default_factory=list)
+    # Set when something other than the nodes and links changed (the lab
+    # name or management network), requiring the whole lab to be redeployed
+    full: bool = False
+
+    def __bool__(self):
+        return self.full or bool(self.added or self.removed or self.changed)
+
+    @property
+    def recreate(self) -> list[str]:
+        """Get the nodes that need to be (re)created from the new topology."""
+        return sorted(self.added | self.changed | self.peers)
+
+    @property
+    def destroy(self) -> list[str]:
+        """Get the nodes that need to be destroyed using the old topology."""
+        return sorted(self.removed | self.changed | self.peers)
+
+
+def diff_topologies(old: dict, new: dict) -> TopologyDiff:
+    """Compute which nodes differ between two topologies.
+
+    A node is changed when its definition differs. Since links are created
+    along with their nodes, the nodes at both ends of an added or removed
+    link are also considered changed, and the nodes that are linked to a
+    changed, added or removed node are its peers.
+
+    Args:
+        old (dict): The topology that is currently deployed.
+        new (dict): The topology that should be deployed.
+
+    Returns:
+        TopologyDiff: The differences.
+    """
+    return diff_manifests(topology_manifest(old), topology_manifest(new))
+
+
+def diff_manifests(old: dict, new: dict) -> TopologyDiff:
+    """Compute which nodes differ between two topology manifests (see `diff_topologies`)."""
+    diff = TopologyDiff()
+    if old["name"] != new["name"] or old["mgmt"] != new["mgmt"]:
+        diff.full = True
+
+    old_nodes = old["nodes"]
+    new_nodes = new["nodes"]
+    diff.added = set(new_nodes) - set(old_nodes)
+    diff.removed = set(old_nodes) - set(new_nodes)
+    for name in set(old_nodes) & set(new_nodes):
+        if old_nodes[name] != new_nodes[name]:
+            diff.changed.add(name)
+
+    old_links = {tuple(link) for link in old["links"]}
+    new_links = {tuple(link) for link in new["links"]}
+    for endpoints in old_links ^ new_links:
+        for endpoint in endpoints:
+            name = endpoint.split(":", 1)[0]
+            if name in old_nodes and name in new_nodes:
+                diff.changed.add(name)
+
+    affected = diff.added | diff.removed | diff.changed
+    for endpoints in old_links | new_links:
+        names = {endpoint.split(":", 1)[0] for endpoint in endpoints}
+        if names & affected:
+            diff.peers.update(name for name in names - affected if name in old_nodes)
+
+    recreated = set(diff.recreate)
+    diff.relink = sorted(
+        endpoints for endpoints in new_links
+        if len({endpoint.split(":", 1)[0] for endpoint in endpoints} & recreated) == 1
+    )
+    return diff
@@ -0,0 +1,156 @@
+"""Lifecycle tracing.
+
+A `Tracer` records spans (a name, a start time and a duration) around the
+slow phases of a lab's lifecycle: image builds, containerlab commands,
+command execution in nodes, template rendering and lifecycle hooks. The
+spans can be summarized, or written as a Chrome trace-event file which can
+be loaded into `chrome://tracing` or Perfetto to compare runs.
+
+Only the most recent spans are kept, so a long running session doesn't grow
+without bound; the summary covers every span that was recorded. Likewise,
+only the most recent trace files are kept in a directory.
+"""
+from collections import deque
+import contextlib
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+import os
+import threading
+import time
+
+# The number of spans a tracer keeps (a start records a few per node)
+MAX_SPANS = 10_000
+# The number of trace files kept in a directory
+MAX_TRACE_FILES = 10
+
+
+@dataclass
+class Span:
+    """A timed phase of the lab's lifecycle."""
+
+    name: str
+    category: str
+    # Wall clock times (seconds since the epoch)
+    start: float
+    end: float = None
+    thread: int = 0
+    args: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """Get the span's duration in seconds."""
+        if self.end is None:
+            return 0.0
+        return self.end - self.start
+
+    def as_event(self, pid: int) -> dict:
+        """Get the span as a Chrome trace "complete" event."""
+        return {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": int(self.start * 1e6),
+            "dur": int(self.duration * 1e6),
+            "pid": pid,
+            "tid": self.thread,
+            "args": self.args,
+        }
+
+
+class Tracer:
+    """Collect lifecycle spans."""
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        """Initialize the tracer.
+
+        Args:
+            max_spans (int, optional): The number of recent spans to keep.
+        """
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+        # the count, total duration and maximum duration of each kind of span
+        self._totals: dict[tuple[str, str], tuple[int, float, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "lab", **args):
+        """Record a span around a block of code.
+
+        Args:
+            name (str): The span name.
+            category (str, optional): The span's category. Defaults to "lab".
+            args: Details (such as the command being run) to record with the span.
+
+        Yields:
+            Span: The span being recorded.
+        """
+        span = Span(name, category, time.time(), thread=threading.get_native_id(), args=args)
+        try:
+            yield span
+        except BaseException as ex:
+            span.args["error"] = str(ex)
+            raise
+        finally:
+            span.end = time.time()
+            self.add(span)
+
+    def add(self, span: Span):
+        """Record a span that has already finished."""
+        with self._lock:
+            self.spans.append(span)
+            count, total, maximum = self._totals.get((span.category, span.name), (0, 0.0, 0.0))
+            self._totals[(span.category, span.name)] = (count + 1, total + span.duration, max(maximum, span.duration))
+
+    def chrome_trace(self, since: float = None, metadata: dict = None) -> dict:
+        """Get the spans in Chrome trace-event format.
+
+        Args:
+            since (float, optional): Only include spans that started at or
+                after this time. Defaults to None (all spans).
+            metadata (dict, optional): Extra information to record with the trace.
+
+        Returns:
+            dict: The trace.
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = [span for span in self.spans if since is None or span.start >= since]
+        return {
+            "traceEvents": [span.as_event(pid) for span in sorted(spans, key=lambda span: span.start)],
+            "displayTimeUnit": "ms",
+            "otherData": metadata or {},
+        }
+
+    def write(self, directory: str, since: float = None, metadata: dict = None, keep: int = MAX_TRACE_FILES) -> str:
+        """Write a Chrome trace-event file, removing the oldest ones beyond `keep`.
+
+        Args:
+            directory (str): The directory to write the trace file to.
+            since (float, optional): Only include spans that started at or after this time.
+            metadata (dict, optional): Extra information to record with the trace.
+            keep (int, optional): The number of trace files to keep in the directory.
+
+        Returns:
+            str: The path of the trace file.
+        """
+        timestamp = datetime.fromtimestamp(since or time.time()).strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(directory, f"trace-{timestamp}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.chrome_trace(since=since, metadata=metadata), file)
+        # the timestamps sort the files from oldest to newest
+        traces = sorted(name for name in os.listdir(directory) if name.startswith("trace-") and name.endswith(".json"))
+        for name in traces[:-keep]:
+            os.remove(os.path.join(directory, name))
+        return path
+
+    def summary(self) -> list[tuple[str, str, int, float, float]]:
+        """Summarize the spans by category and name.
+
+        Returns:
+            list[tuple[str, str, int, float, float]]: The category, name, count,
+            total duration and maximum duration of each kind of span, with the
+            largest total first.
+        """
+        with self._lock:
+            rows = [(category, name, *values) for (category, name), values in self._totals.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
@@ -0,0 +1,126 @@
+import io
+import json
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from lab_builder.batch import Batch, BatchError, group_steps, parse_script
+
+
+SCRIPT = """
+# bring the lab up
+start
+wait --timeout 10
+run nautobot nautobot echo "hello world"
+& run nautobot worker echo worker
+& run nautobot scheduler echo scheduler
+stop
+"""
+
+
+def results(output: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_parse_script():
+    steps = parse_script(SCRIPT.splitlines())
+    assert [step.action for step in steps] == ["start", "wait", "run", "run", "run", "stop"]
+    assert steps[2].args == ["nautobot", "nautobot", "echo", "hello world"]
+    assert steps[2].line == 5
+    assert [step.parallel for step in steps] == [False, False, False, True, True, False]
+    assert [len(group) for group in group_steps(steps)] == [1, 1, 1, 2, 1]
+
+
+@pytest.mark.parametrize("script", ["deploy", "& start", "run", "run 'unterminated"])
+def test_parse_script_errors(script):
+    with pytest.raises(BatchError):
+        parse_script([script])
+
+
+def test_batch():
+    lab = Mock(running=True, needs_reconfigure=False)
+    commands = []
+
+    def get_command(args):
+        return (lambda *args: (print(" ".join(args)), commands.append(args)), args[2:])
+
+    lab.get_command.side_effect = get_command
+    output = io.StringIO()
+    assert Batch(lab, output=output).run(parse_script(SCRIPT.splitlines()))
+
+    lab.start.assert_called_once()
+    lab.stop.assert_called_once()
+    lab.readiness.wait.assert_called_once_with(None, timeout=10.0)
+    assert len(commands) == 3
+    steps = results(output)
+    assert [step["status"] for step in steps] == ["ok"] * 6
+    assert steps[2]["output"] == "echo hello world\n"
+    assert {step["output"] for step in steps[3:5]} == {"echo worker\n", "echo scheduler\n"}
+
+
+def test_batch_verifies_running_once():
+    lab = Mock(running=True, needs_reconfigure=False)
+    lab.get_command.return_value = (Mock(), [])
+    running = Mock(return_value=True)
+    type(lab).running = property(lambda _: running())
+    script = ["run a b c", "run a b c", "start", "run a b c"]
+    assert Batch(lab, output=io.StringIO()).run(parse_script(script))
+    assert running.call_count == 2
+
+
+def test_batch_failure():
+    lab = Mock(running=False)
+    output = io.StringIO()
+    assert not Batch(lab, output=output).run(parse_script(["run a b c", "stop"]))
+    steps = results(output)
+    assert steps[0]["status"] == "failed"
+    assert "is not running" in steps[0]["error"]
+    assert steps[1]["status"] == "skipped"
+    lab.stop.assert_not_called()
+
+    output = io.StringIO()
+    assert not Batch(lab, output=output, keep_going=True).run(parse_script(["run a b c", "stop"]))
+    assert [step["status"] for step in results(output)] == ["failed", "ok"]
+
+
+def test_batch_parallel():
+    lab = Mock(running=True, needs_reconfigure=False)
+    barrier = threading.Barrier(2, timeout=5)
+    lab.get_command.return_value = (barrier.wait, [])
+    output = io.StringIO()
+    assert Batch(lab, output=output).run(parse_script(["& run a b c", "& run a b d"]))
+
+
+def test_batch_output_from_other_threads(capsys):
+    lab = Mock(running=True, needs_reconfigure=False)
+
+    def hook(*args):
+        thread = threading.Thread(target=print, args=["from a hook"])
+        thread.start()
+        thread.join()
+
+    lab.get_command.return_value = (hook, [])
+    output = io.StringIO()
+    assert Batch(lab, output=output).run(parse_script(["run a b c", "& run a b c", "& run a b c"]))
+    steps = results(output)
+    # a single step owns everything printed while it runs
+    assert steps[0]["output"] == "from a hook\n"
+    # what can't be attributed to one of the parallel steps goes to stderr
+    assert [step["output"] for step in steps[1:]] == ["", ""]
+    assert capsys.readouterr().err == "from a hook\n" * 2
+
+
+def test_batch_wait():
+    lab = Mock(ready_timeout=600, nodes=[Mock()])
+    lab.nodes[0].name = "node1"
+    output = io.StringIO()
+    assert Batch(lab, output=output).run(parse_script(["wait", "wait node1"]))
+    assert lab.readiness.wait.call_args_list[0].kwargs == {"timeout": 600}
+    assert lab.readiness.wait.call_args_list[1].args == (["node1"],)
+
+    lab.readiness.wait.return_value = False
+    assert not Batch(lab, output=output).run(parse_script(["wait node2", "wait node1"]))
+    steps = results(output)[-2:]
+    assert "unknown nodes node2" in steps[0]["error"]
+    assert steps[1]["status"] == "skipped"
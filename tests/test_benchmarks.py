@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from benchmarks import startup
+from benchmarks.bench import run_benchmark, synthetic_lab
+
+
+def test_synthetic_lab():
+    """Confirm synthetic labs have the requested number of nodes and chained links."""
+    lab = synthetic_lab(120)()
+    assert len(list(lab.nodes)) == 120
+    assert len(lab.services) == 3
+    assert len(lab.topology["topology"]["links"]) == 117
+
+
+def test_benchmark_subprocesses():
+    """Confirm the subprocesses spawned by `start`, `run` and `stop` are counted."""
+    report = run_benchmark([10], repeat=1)
+    result = report["results"][0]
+    assert result["nodes"] == 10
+    for name in ["init", "topology", "topology_str", "needs_reconfigure"]:
+        assert result[name]["median"] > 0
+
+    assert result["start"]["commands"]["containerlab deploy"] == 1
+    assert result["run"]["commands"] == {"containerlab exec": 1, "containerlab inspect": 1}
+    assert result["stop"]["commands"] == {"containerlab destroy": 1, "containerlab inspect": 1}
+
+
+def test_startup_deferred():
+    """Confirm the entry points import without the deferred modules."""
+    report = startup.run_benchmark(repeat=1)
+    assert [result["module"] for result in report["results"]] == list(startup.BUDGETS)
+    assert {result["module"]: result["deferred_loaded"] for result in report["results"]} == {
+        module: [] for module in startup.BUDGETS
+    }
+
+
+# Import times depend on the machine and its load, so the budgets are only
+# checked by the benchmark job (`LAB_BUILDER_BENCHMARKS=1 pytest tests/test_benchmarks.py`)
+@pytest.mark.skipif(not os.environ.get("LAB_BUILDER_BENCHMARKS"), reason="set LAB_BUILDER_BENCHMARKS=1 to check")
+def test_startup_budget():
+    """Confirm the entry points import within their budgets."""
+    report = startup.run_benchmark(repeat=3)
+    assert startup.failures(report) == []
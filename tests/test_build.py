@@ -0,0 +1,65 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from lab_builder.build import ImageBuilder, context_digest, image_tag
+from lab_builder.lab import Lab, Service
+from lab_builder.labs.common import GitServer
+
+
+def test_context_digest():
+    """Confirm the digest follows the content of the build context."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        container_file = os.path.join(tmp_dir, "Containerfile")
+        with open(container_file, "w") as file:
+            file.write("FROM scratch\n")
+        first = context_digest(container_file)
+        assert context_digest(container_file) == first
+
+        with open(os.path.join(tmp_dir, "entrypoint.sh"), "w") as file:
+            file.write("#!/bin/sh\n")
+        second = context_digest(container_file)
+        assert second != first
+
+        with open(os.path.join(tmp_dir, "entrypoint.sh"), "w") as file:
+            file.write("#!/bin/bash\n")
+        assert context_digest(container_file) not in [first, second]
+
+
+class GitService(Service):
+    nodes = {
+        "git-server-1": GitServer,
+        "git-server-2": GitServer,
+    }
+
+
+class BuildLab(Lab):
+    name = "BuildLab"
+    services = {
+        "git": GitService,
+    }
+
+
+def test_image_builder():
+    """Confirm each missing image is built once and existing images are skipped."""
+    lab = BuildLab()
+    nodes = list(lab.nodes)
+    tag = image_tag("GitServer", nodes[0].container_file_path)
+    assert nodes[0].image == tag
+    assert nodes[1].image == tag
+
+    builder = ImageBuilder(lab)
+    with (
+        patch.object(ImageBuilder, "image_exists", return_value=False),
+        patch.object(BuildLab, "run_cmd") as run_cmd,
+    ):
+        assert [build.tag for build in builder.build(nodes)] == [tag]
+        assert run_cmd.call_count == 1
+        assert tag in run_cmd.call_args.args[0]
+
+    with (
+        patch.object(ImageBuilder, "image_exists", return_value=True),
+        patch.object(BuildLab, "run_cmd") as run_cmd,
+    ):
+        assert builder.build(nodes) == []
+        run_cmd.assert_not_called()
@@ -0,0 +1,116 @@
+from unittest.mock import patch
+
+import pytest
+
+from lab_builder.cli import find_conflicts, main, parse_port, PortBinding, run_action
+from lab_builder.lab import Lab, Service
+from lab_builder.node import LinuxNode
+
+
+class WebNode(LinuxNode):
+    image = "nginx"
+
+
+class WebService(Service):
+    nodes = {"web": WebNode}
+    ports = {"web": ["127.0.0.1:8080:80/tcp"]}
+
+
+class OtherWebService(Service):
+    nodes = {"web": WebNode}
+    ports = {"web": ["127.0.0.2:8080:80/tcp"]}
+
+
+class FirstLab(Lab):
+    name = "FirstLab"
+    ipv4_subnet = "172.100.100.0/24"
+    services = {"web": WebService}
+
+
+class SecondLab(Lab):
+    name = "SecondLab"
+    ipv4_subnet = "172.100.100.128/25"
+    services = {"web": WebService}
+
+
+class ThirdLab(Lab):
+    name = "ThirdLab"
+    services = {"web": OtherWebService}
+
+
+class FourthLab(Lab):
+    name = "FourthLab"
+    ipv4_subnet = "172.100.101.0/24"
+    services = {"web": OtherWebService}
+
+
+@pytest.mark.parametrize(
+    "port,expected",
+    [
+        ("127.0.0.1:8080:8080/tcp", PortBinding("lab", "node", "127.0.0.1", 8080, "tcp")),
+        ("8080:80", PortBinding("lab", "node", "", 8080, "tcp")),
+        ("[::1]:53:53/udp", PortBinding("lab", "node", "::1", 53, "udp")),
+        ("80", None),
+        ("127.0.0.1::80", None),
+    ],
+)
+def test_parse_port(port, expected):
+    assert parse_port("lab", "node", port) == expected
+
+
+def test_port_conflicts():
+    binding = PortBinding("a", "node", "127.0.0.1", 8080, "tcp")
+    assert binding.conflicts(PortBinding("b", "node", "127.0.0.1", 8080, "tcp"))
+    assert binding.conflicts(PortBinding("b", "node", "0.0.0.0", 8080, "tcp"))
+    assert binding.conflicts(PortBinding("b", "node", "", 8080, "tcp"))
+    assert not binding.conflicts(PortBinding("b", "node", "127.0.0.2", 8080, "tcp"))
+    assert not binding.conflicts(PortBinding("b", "node", "127.0.0.1", 8080, "udp"))
+    assert not binding.conflicts(PortBinding("b", "node", "127.0.0.1", 8081, "tcp"))
+
+
+def test_find_conflicts():
+    conflicts = find_conflicts([FirstLab(), SecondLab()])
+    assert len(conflicts) == 3
+    assert "overlapping subnets" in conflicts[0]
+    assert "custom_mgmt management network" in conflicts[1]
+    assert "127.0.0.1:8080/tcp" in conflicts[2]
+
+    assert find_conflicts([FirstLab(), ThirdLab()]) == []
+    assert find_conflicts([FirstLab(), FirstLab()]) == [
+        "FirstLab is listed more than once",
+        "FirstLab (172.100.100.0/24) and FirstLab (172.100.100.0/24) have overlapping subnets",
+        "FirstLab and FirstLab both use the custom_mgmt management network",
+        "FirstLab/web and FirstLab/web both publish 127.0.0.1:8080/tcp",
+    ]
+
+
+def test_find_conflicts_mgmt_network():
+    # the subnets don't overlap, but both labs declare the same docker network
+    assert find_conflicts([FirstLab(), FourthLab()]) == [
+        "FourthLab and FirstLab both use the custom_mgmt management network",
+    ]
+
+
+def test_find_conflicts_lazy():
+    """Confirm the conflicts are found without creating the labs' services and nodes."""
+    labs = [FirstLab(lazy=True), SecondLab(lazy=True)]
+    assert len(find_conflicts(labs)) == 3
+    assert not any(lab.materialized for lab in labs)
+
+
+def test_status_stopped(tmp_path):
+    """Confirm reporting on a stopped lab succeeds."""
+    with (
+        patch("lab_builder.cli.load_lab", return_value=FirstLab),
+        patch("lab_builder.lab.Lab.inspect", return_value={"containers": []}),
+    ):
+        _, ok, summary = run_action("status", "first", str(tmp_path))
+    assert ok
+    assert summary == "FirstLab is stopped (0 container(s))"
+
+
+def test_conflicts_stop_up(tmp_path):
+    labs = {"first": FirstLab, "second": SecondLab}
+    with patch("lab_builder.cli.load_lab", side_effect=labs.get), patch("concurrent.futures.ProcessPoolExecutor") as pool:
+        assert main(["up", "first", "second", "--base-dir", str(tmp_path)]) == 2
+    pool.assert_not_called()
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+from lab_builder import completion
+from lab_builder.lab import Lab, Service
+from lab_builder.node import LinuxNode
+
+
+class ShellNode(LinuxNode):
+    image = "alpine"
+
+    def do_shell(self):
+        pass
+
+    def do_show(self, *args):
+        pass
+
+    def complete_show(self, commands, command, text):
+        return [text + item[len(command):] for item in ["interfaces", "version"] if item.startswith(command)]
+
+
+class ShellService(Service):
+    nodes = {f"node{index}": ShellNode for index in range(200)}
+
+    def do_sync(self):
+        pass
+
+
+class CompletionLab(Lab):
+    name = "CompletionLab"
+    services = {"shells": ShellService, "sync": ShellService}
+
+
+def test_completion():
+    lab = CompletionLab()
+    assert lab.complete([], "s", "s") == ["shells", "sync"]
+    assert lab.complete([], "", "") == ["shells", "sync"]
+    assert lab.complete(["shells"], "node19", "node19") == ["node19", "node190", "node191", *[
+        f"node19{index}" for index in range(2, 10)
+    ]]
+    assert lab.complete(["shells"], "s", "s") == ["sync"]
+    assert lab.complete(["shells", "node1"], "s", "s") == ["shell", "show"]
+    assert lab.complete(["shells", "node1", "show"], "v", "v") == ["version"]
+    assert lab.complete(["shells", "node1", "shell"], "", "") == []
+    assert lab.complete(["missing"], "s", "s") == ["shells", "sync"]
+
+
+def test_completion_matches_definitions():
+    """Confirm the index completes the same as walking the definitions."""
+    lab = CompletionLab()
+    service = lab.services["shells"]
+    for commands, command in [([], "node"), (["node5"], "s"), (["node5", "show"], "in")]:
+        assert lab.complete(["shells", *commands], command, command) == sorted(
+            service.complete(commands, command, command)
+        )
+    assert sorted(service.nodes["node1"].commands) == ["shell", "show"]
+
+
+def test_completion_index_is_reused():
+    lab = CompletionLab()
+    with patch("lab_builder.completion.build_node", wraps=completion.build_node) as build_node:
+        for prefix in ["n", "node1", "node12"]:
+            lab.complete(["shells"], prefix, prefix)
+        assert build_node.call_count == 1 + 2 + 400
+
+        build_node.reset_mock()
+        lab.services["sync"].nodes["node0"].binds.append("/tmp:/tmp")
+        lab.services["sync"].nodes["node0"].changed()
+        lab.complete([], "", "")
+        assert build_node.call_count == 1 + 2 + 400
@@ -1,4 +1,5 @@
 
+import glob as glob_module
 import json
 import os
 import tempfile
@@ -58,6 +59,24 @@ def test_init(test_case):
     for attr_name, want in test_case.items():
         assert getattr(obj, attr_name) == want
 
+def test_schema_compiled_once():
+    """Confirm the attribute schema is computed per class, not per instance."""
+    with patch("lab_builder.lab.typing.get_type_hints") as get_type_hints:
+        AttrTestChild(name="test1")
+        AttrTestChild(name="test2", mylist=["value2"])
+        get_type_hints.assert_not_called()
+
+
+def test_class_values_unchanged():
+    """Confirm instances never share (and mutate) the class level values."""
+    obj = AttrTestChild(name="test")
+    obj.mylist.append("value2")
+    obj.mydict["key2"] = "value2"
+    assert AttrTestParent.mylist == ["value"]
+    assert AttrTestChild.mylist == ["value1"]
+    assert AttrTestChild.mydict == {"key1": "value1"}
+    assert AttrTestChild(name="test").mylist == ["value", "value1"]
+
 DEFINITION_DIR = "/definitions"
 STATE_DIR = "/state"
 
@@ -120,6 +139,66 @@ def test_resolve_binds(test_case):
         received = layer._resolve_binds(test_case["binds"])
         assert test_case["expected"] == received
 
+def resolve_real_binds(definition_dir: str, binds: list[str], definition_class=Definition) -> list[str]:
+    with patch("lab_builder.lab.Definition.definition_directory", new_callable=PropertyMock) as def_dir:
+        def_dir.return_value = definition_dir
+        return definition_class(name="layer")._resolve_binds(binds)
+
+
+def test_resolve_binds_coalesce(tmp_path):
+    """A glob that matches a whole directory is bound as that directory."""
+    for name in ["1", "2", "3"]:
+        (tmp_path / "fixtures" / name).parent.mkdir(exist_ok=True)
+        (tmp_path / "fixtures" / name).write_text(name)
+    fixtures = tmp_path / "fixtures"
+
+    assert resolve_real_binds(str(tmp_path), ["./fixtures/*:/fixtures"]) == [f"{fixtures}:/fixtures:ro"]
+
+    # the container's own files in shared directories must stay visible
+    assert sorted(resolve_real_binds(str(tmp_path), ["./fixtures/*:/usr/local/bin"])) == [
+        f"{fixtures}/{name}:/usr/local/bin/{name}:ro" for name in ["1", "2", "3"]
+    ]
+
+    class PerFileDefinition(Definition):
+        coalesce_binds = False
+
+    assert len(resolve_real_binds(str(tmp_path), ["./fixtures/*:/fixtures"], PerFileDefinition)) == 3
+
+    # partial matches and hidden files (which `*` doesn't match) keep per file binds
+    assert len(resolve_real_binds(str(tmp_path), ["./fixtures/[12]:/fixtures"])) == 2
+    (fixtures / ".hidden").write_text("hidden")
+    assert sorted(resolve_real_binds(str(tmp_path), ["./fixtures/*:/fixtures"])) == [
+        f"{fixtures}/{name}:/fixtures/{name}:ro" for name in ["1", "2", "3"]
+    ]
+
+
+def test_glob_cache(tmp_path):
+    """Globs are only expanded once while the lab is built."""
+    (tmp_path / "fixtures").mkdir()
+    for name in ["1", "2"]:
+        (tmp_path / "fixtures" / name).write_text(name)
+
+    class GlobNode(Node):
+        image = "hello-world"
+
+    class GlobService(Service):
+        nodes = {f"node{index}": GlobNode for index in range(5)}
+        binds = {f"node{index}": [f"{tmp_path}/fixtures/[12]:/fixtures"] for index in range(5)}
+
+    class GlobLab(Lab):
+        name = "GlobLab"
+        services = {"globs": GlobService}
+
+    with patch("lab_builder.lab.glob.glob", wraps=glob_module.glob) as glob:
+        lab = GlobLab(base_dir=str(tmp_path))
+    patterns = [call.args[0] for call in glob.call_args_list]
+    assert len(patterns) == len(set(patterns))
+    assert lab._glob_cache is None
+    assert {path: len(binds) for path, binds in lab.file_binds.items()} == {
+        f"globs/node{index}": 2 for index in range(5)
+    }
+
+
 def test_name():
     """Test the name property of a definiton."""
     d = Definition(name="My definition")
@@ -278,3 +357,59 @@ def test_links():
     ]
 
     assert expected_links == lab.topology["topology"]["links"]
+
+def test_inspection_snapshot():
+    """Confirm that a single `containerlab inspect` is shared until invalidated."""
+    inspection = {"containers": [
+        {"lab_name": "TestLab", "name": "clab-TestLab-test_node", "labPath": "/tmp/testlab.json"},
+    ]}
+    with (
+        patch("lab_builder.lab.Lab.run_clab_cmd") as run_clab_cmd,
+        patch("lab_builder.lab.DockerEngine.from_environment", return_value=None),
+    ):
+        run_clab_cmd.return_value = Mock(stdout=json.dumps(inspection))
+        lab = TestLab()
+        assert lab.running is True
+        assert lab.running_containers == ["test_node"]
+        assert lab.inspect()["topology_file"] == "/tmp/testlab.json"
+        assert run_clab_cmd.call_count == 1
+
+        lab.invalidate_inspection()
+        assert lab.running is True
+        assert run_clab_cmd.call_count == 2
+
+        lab.stop()
+        # one destroy, and the snapshot is discarded afterwards
+        assert run_clab_cmd.call_count == 3
+        assert lab.running is True
+        assert run_clab_cmd.call_count == 4
+
+def test_lazy_lab():
+    """Confirm lazy labs only create their services and nodes when they are needed."""
+    with (
+        patch("lab_builder.lab.Lab.run_clab_cmd") as run_clab_cmd,
+        patch("lab_builder.lab.DockerEngine.from_environment", return_value=None),
+    ):
+        run_clab_cmd.return_value = Mock(stdout=json.dumps({"containers": []}))
+        lab = TestLab(lazy=True)
+        assert lab.materialized is False
+        lab.inspect()
+        assert lab.materialized is False
+
+        assert [node.name for node in lab.nodes] == ["test_node"]
+        assert lab.materialized is True
+        assert lab.services["test_service"].nodes["test_node"].parent is lab.services["test_service"]
+
+
+def test_lazy_lab_stop():
+    """Confirm stopping a lazy lab still runs the `stopped` hooks."""
+    with (
+        patch("lab_builder.lab.Lab.run_clab_cmd") as run_clab_cmd,
+        patch("lab_builder.lab.DockerEngine.from_environment", return_value=None),
+        patch.object(TestService, "stopped", autospec=True) as stopped,
+    ):
+        run_clab_cmd.return_value = Mock(stdout=json.dumps({"containers": []}))
+        lab = TestLab(lazy=True)
+        lab.stop()
+        assert lab.materialized is True
+        stopped.assert_called_once_with(lab.services["test_service"])
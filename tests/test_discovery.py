@@ -0,0 +1,95 @@
+import os
+import sys
+from unittest.mock import patch
+
+from lab_builder import discovery
+from lab_builder.discovery import LabIndex, LabInfo
+
+
+BASE_LAB = '''
+from lab_builder.lab import Lab
+
+raise RuntimeError("lab modules must not be imported")
+
+
+class BaseLab(Lab):
+    """A lab everything else builds on.
+
+    With more details.
+    """
+    name = "Base"
+
+
+lab = BaseLab
+'''
+
+EXTENDED_LAB = '''
+from lab_builder import lab as lab_module
+from ..base.labs import BaseLab
+
+
+class ExtendedLab(BaseLab):
+    name: str = "Extended"
+    description = "Extends the base lab"
+
+
+class NotALab:
+    name = "NotALab"
+
+
+lab = ExtendedLab
+'''
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def make_labs(tmp_path) -> str:
+    directory = tmp_path / "package" / "labs"
+    write(str(tmp_path / "package" / "__init__.py"), "")
+    write(str(directory / "__init__.py"), "")
+    write(str(directory / "base" / "__init__.py"), "")
+    write(str(directory / "base" / "labs.py"), BASE_LAB)
+    write(str(directory / "extended" / "labs.py"), EXTENDED_LAB)
+    write(str(directory / "broken.py"), "class Broken(:\n")
+    write(str(directory / "other.py"), "from .extended.labs import NotALab\nlab = NotALab\n")
+    return str(directory)
+
+
+def test_lab_index(tmp_path):
+    index = LabIndex(cache_file=str(tmp_path / "discovery.json"), directory=make_labs(tmp_path))
+    assert index.labs() == [
+        LabInfo("Base", "A lab everything else builds on.", "package/labs/base/labs.py", "BaseLab"),
+        LabInfo("Extended", "Extends the base lab", "package/labs/extended/labs.py", "ExtendedLab"),
+    ]
+    assert index.find("extended").class_name == "ExtendedLab"
+    assert index.find("missing") is None
+    assert index.complete("b") == ["Base"]
+    assert not [module for module in sys.modules if module.startswith("package")]
+
+
+def test_lab_index_cache(tmp_path):
+    directory = make_labs(tmp_path)
+    cache_file = str(tmp_path / "discovery.json")
+    LabIndex(cache_file=cache_file, directory=directory).labs()
+
+    with patch("lab_builder.discovery.scan_file", wraps=discovery.scan_file) as scan_file:
+        assert len(LabIndex(cache_file=cache_file, directory=directory).labs()) == 2
+        scan_file.assert_not_called()
+
+        write(os.path.join(directory, "extended", "labs.py"), EXTENDED_LAB.replace('"Extended"', '"Renamed"'))
+        labs = LabIndex(cache_file=cache_file, directory=directory).labs()
+        scan_file.assert_called_once_with(os.path.join(directory, "extended", "labs.py"))
+    assert [lab.name for lab in labs] == ["Base", "Renamed"]
+
+    os.remove(os.path.join(directory, "extended", "labs.py"))
+    assert [lab.name for lab in LabIndex(cache_file=cache_file, directory=directory).labs()] == ["Base"]
+
+
+def test_shipped_labs(tmp_path):
+    """Confirm the labs in `lab_builder.labs` are found."""
+    labs = LabIndex(cache_file=str(tmp_path / "discovery.json")).labs()
+    assert {lab.name: lab.path for lab in labs}["LDAPAuth"] == "lab_builder/labs/ldap/labs.py"
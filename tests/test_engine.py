@@ -0,0 +1,149 @@
+import json
+import os
+import socketserver
+import struct
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from lab_builder.engine import DockerEngine, EngineError, demultiplex
+from lab_builder.lab import Lab
+
+
+def frame(stream_type, payload: bytes):
+    return struct.pack(">BxxxL", stream_type, len(payload)) + payload
+
+
+class FakeEngineHandler(BaseHTTPRequestHandler):
+    """Just enough of the Docker Engine API to exercise the client."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return "fake-engine"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+        if self.path == "/v1.41/_ping":
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"OK")
+        elif self.path.startswith("/v1.41/containers/json"):
+            self.send_json(200, [{
+                "Id": "0123456789abcdef",
+                "Names": ["/clab-TestLab-node"],
+                "Image": "hello-world",
+                "State": "running",
+                "Status": "Up 1 minute",
+                "Labels": {"containerlab": "TestLab", "clab-topo-file": "/tmp/testlab.json"},
+            }])
+        elif self.path == "/v1.41/containers/clab-TestLab-node/json":
+            self.send_json(200, {"State": {"Status": "running", "Health": {"Status": "healthy"}}})
+        elif self.path == "/v1.41/exec/exec1/json":
+            self.send_json(200, {"ExitCode": 2})
+        else:
+            self.send_json(404, {"message": "no such container"})
+
+    def do_POST(self):
+        self.server.requests.append(("POST", self.path))
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"null")
+        if self.path == "/v1.41/containers/clab-TestLab-node/exec":
+            self.server.exec_config = body
+            self.send_json(201, {"Id": "exec1"})
+        elif self.path == "/v1.41/exec/exec1/start":
+            # the engine hijacks the connection for the raw stream
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(frame(1, b"hello ") + frame(2, b"oops\n") + frame(1, b"world\n"))
+            self.close_connection = True
+        else:
+            self.send_json(404, {"message": "no such container"})
+
+
+@pytest.fixture
+def fake_engine():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = os.path.join(tmp_dir, "docker.sock")
+        server = socketserver.ThreadingUnixStreamServer(socket_path, FakeEngineHandler)
+        server.daemon_threads = True
+        server.requests = []
+        server.connections = 0
+        thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        yield server, DockerEngine(socket_path, timeout=5)
+        server.shutdown()
+        server.server_close()
+
+
+def test_demultiplex():
+    """Confirm stdout and stderr frames are separated."""
+    data = frame(1, b"out1") + frame(2, b"err") + frame(1, b"out2")
+    assert demultiplex(data) == (b"out1out2", b"err")
+
+
+def test_exec(fake_engine):
+    """Confirm an exec is created, started and inspected."""
+    server, engine = fake_engine
+    result = engine.exec("clab-TestLab-node", "sh -c 'echo hello world'")
+    assert server.exec_config["Cmd"] == ["sh", "-c", "echo hello world"]
+    assert result == {
+        "cmd": ["sh", "-c", "echo hello world"],
+        "return-code": 2,
+        "stdout": "hello world\n",
+        "stderr": "oops\n",
+    }
+
+
+def test_connection_reuse(fake_engine):
+    """Confirm requests share pooled connections."""
+    server, engine = fake_engine
+    for _ in range(5):
+        assert engine.ping()
+    assert engine.health("clab-TestLab-node") == "healthy"
+    assert server.connections == 1
+
+
+def test_containers(fake_engine):
+    """Confirm label filters are passed to the container list."""
+    server, engine = fake_engine
+    containers = engine.containers(labels={"containerlab": "TestLab"})
+    assert containers[0]["Names"] == ["/clab-TestLab-node"]
+    _, path = server.requests[-1]
+    assert "containerlab%3DTestLab" in path
+
+
+def test_error(fake_engine):
+    """Confirm API errors are raised."""
+    _, engine = fake_engine
+    with pytest.raises(EngineError, match="no such container"):
+        engine.inspect_container("missing")
+
+
+def test_lab_inspect(fake_engine):
+    """Confirm the lab inspection is built from the engine when it is available."""
+    _, engine = fake_engine
+    lab = Lab()
+    lab.name = "TestLab"
+    lab.engine = engine
+    assert lab.running_containers == ["node"]
+    assert lab.inspect()["topology_file"] == "/tmp/testlab.json"
@@ -0,0 +1,74 @@
+import pytest
+
+from lab_builder.lab import Lab
+from lab_builder.labs.common import LeafSpineFabric
+from lab_builder.labs.golden_config.services import LeafSpineNetwork
+from lab_builder.topology import link_key
+
+
+class Fabric(LeafSpineFabric):
+    spines = 4
+    leaves = 64
+    uplinks_per_leaf = 4
+
+
+class FabricLab(Lab):
+    name = "FabricLab"
+    ipv4_subnet = "172.100.100.0/24"
+    services = {
+        "fabric": Fabric,
+    }
+
+
+def test_leaf_spine_network():
+    """Confirm the generated network matches the original hand written one."""
+    class NetworkLab(Lab):
+        name = "NetworkLab"
+        ipv4_subnet = "172.100.100.0/24"
+        services = {"network": LeafSpineNetwork}
+
+    service = NetworkLab().services["network"]
+    assert list(service.nodes) == ["dc1-spine-1", "dc1-spine-2", "dc1-leaf-1", "dc1-leaf-2", "dc1-leaf-3"]
+    assert service.links == {
+        "dc1-spine-1": {"eth1": "dc1-leaf-1:eth1", "eth2": "dc1-leaf-2:eth1", "eth3": "dc1-leaf-3:eth1"},
+        "dc1-spine-2": {"eth1": "dc1-leaf-1:eth2", "eth2": "dc1-leaf-2:eth2", "eth3": "dc1-leaf-3:eth2"},
+    }
+    assert [node.mgmt_ipv4 for node in service.nodes.values()] == [
+        "172.100.100.2", "172.100.100.3", "172.100.100.10", "172.100.100.11", "172.100.100.12",
+    ]
+
+
+def test_fabric_size():
+    """Confirm every leaf uplink is connected and every address is unique."""
+    lab = FabricLab()
+    topology = lab.topology["topology"]
+    assert len(topology["nodes"]) == 68
+    assert len(topology["links"]) == 64 * 4
+    assert len({node["mgmt-ipv4"] for node in topology["nodes"].values()}) == 68
+    # each spine gets one interface per leaf
+    assert lab.services["fabric"].links["dc1-spine-4"]["eth64"] == "dc1-leaf-64:eth4"
+
+
+def test_fabric_growth():
+    """Confirm adding leaves leaves the existing interfaces and addresses alone."""
+    small = FabricLab().topology["topology"]
+    Fabric.leaves = 65
+    try:
+        large = FabricLab().topology["topology"]
+    finally:
+        Fabric.leaves = 64
+    for name, node in small["nodes"].items():
+        assert large["nodes"][name] == node
+    small_links = {link_key(link) for link in small["links"]}
+    large_links = {link_key(link) for link in large["links"]}
+    assert small_links < large_links
+    assert len(large_links - small_links) == 4
+
+
+def test_fabric_too_large():
+    """Confirm a fabric that doesn't fit the lab's subnet is rejected."""
+    class SmallFabricLab(FabricLab):
+        ipv4_subnet = "172.100.100.0/26"
+
+    with pytest.raises(ValueError):
+        SmallFabricLab()
@@ -0,0 +1,96 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from lab_builder.git import sync_repository
+from lab_builder.lab import Lab, Service
+from lab_builder.labs.common import GitServer
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(repository, *args):
+    return subprocess.run(["git", "--git-dir", repository, *args], capture_output=True, text=True, check=True).stdout
+
+
+def test_sync_repository():
+    """Confirm a directory is only committed when its contents change."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "source")
+        repository = os.path.join(tmp_dir, "repos", "source.git")
+        os.makedirs(os.path.join(source, "devices"))
+        with open(os.path.join(source, "devices", "leaf.json"), "w", encoding="utf-8") as file:
+            file.write('{"ntp": "10.0.0.1"}\n')
+
+        first = sync_repository(source, repository)
+        assert first is not None
+        assert git(repository, "show", "main:devices/leaf.json") == '{"ntp": "10.0.0.1"}\n'
+        assert sync_repository(source, repository) is None
+
+        with open(os.path.join(source, "devices", "spine.json"), "w", encoding="utf-8") as file:
+            file.write("{}\n")
+        second = sync_repository(source, repository)
+        assert second is not None
+        assert git(repository, "rev-parse", "main^").strip() == first
+        assert git(repository, "ls-tree", "-r", "--name-only", "main").split() == [
+            "devices/leaf.json",
+            "devices/spine.json",
+        ]
+
+
+def test_git_server_sync():
+    """Confirm the git server seeds a repository for every directory bound into `/repos`."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "config-contexts")
+        os.makedirs(source)
+        with open(os.path.join(source, "README.md"), "w", encoding="utf-8") as file:
+            file.write("# Config contexts\n")
+
+        class GitService(Service):
+            nodes = {"git-server": GitServer}
+            binds = {"git-server": [f"{source}:/repos/config-contexts"]}
+
+        class GitLab(Lab):
+            name = "GitLab"
+            services = {"git": GitService}
+
+        node = GitLab(base_dir=tmp_dir).services["git"].nodes["git-server"]
+        assert node.repositories() == {"config-contexts": source}
+        commits = node.sync()
+        assert list(commits) == ["config-contexts"]
+        repository = node.host_path("/internal/repos/config-contexts.git")
+        assert repository.startswith(node.state_directory)
+        assert git(repository, "rev-parse", "main").strip() == commits["config-contexts"]
+        assert node.sync() == {"config-contexts": None}
+
+
+def test_git_server_claims_container_repositories():
+    """Confirm repositories created in the container are given to the host's user before they are synced."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "config-contexts")
+        os.makedirs(source)
+
+        class GitService(Service):
+            nodes = {"git-server": GitServer}
+            binds = {"git-server": [f"{source}:/repos/config-contexts"]}
+
+        class GitLab(Lab):
+            name = "GitLab"
+            services = {"git": GitService}
+
+        node = GitLab(base_dir=tmp_dir).services["git"].nodes["git-server"]
+        os.makedirs(node.host_path("/internal/repos/config-contexts.git"))
+        with (
+            patch("lab_builder.labs.common.is_writable", side_effect=[False, True]),
+            patch("lab_builder.labs.common.sync_repository") as sync_repository,
+            patch.object(GitServer, "run_cmd") as run_cmd,
+        ):
+            node.sync()
+        run_cmd.assert_called_once_with(
+            ["chown", "-R", f"{os.getuid()}:{os.getgid()}", "/internal/repos/config-contexts.git"]
+        )
+        sync_repository.assert_called_once()
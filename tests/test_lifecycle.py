@@ -0,0 +1,160 @@
+import contextlib
+import io
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from lab_builder.decorators import after
+from lab_builder.lab import Lab, Service
+from lab_builder.lifecycle import HookError, HookScheduler, HookTiming
+from lab_builder.node import Dependency, DependencyState, Node
+
+events = []
+lock = threading.Lock()
+
+
+def record(name, delay=0.1):
+    with lock:
+        events.append(("start", name))
+    time.sleep(delay)
+    with lock:
+        events.append(("end", name))
+
+
+class RecordingNode(Node):
+    image = "hello-world"
+
+    def started(self):
+        super().started()
+        record(self.name)
+
+
+class FailingNode(RecordingNode):
+    def started(self):
+        super().started()
+        raise RuntimeError("boom")
+
+
+class AppService(Service):
+    nodes = {
+        "app": RecordingNode,
+        "db": RecordingNode,
+    }
+
+    dependencies = {
+        "app": [Dependency(name="db", state=DependencyState.HEALTHY)],
+    }
+
+
+class GitService(Service):
+    nodes = {
+        "git": RecordingNode,
+    }
+
+    @after("app")
+    def started(self):
+        super().started()
+        record(self.name, delay=0)
+
+
+class HookLab(Lab):
+    name = "HookLab"
+    services = {
+        "app": AppService,
+        "git": GitService,
+    }
+
+    def started(self):
+        super().started()
+        record(self.name, delay=0)
+
+
+def position(kind, name):
+    return events.index((kind, name))
+
+
+def test_scheduler_order():
+    """Confirm hooks respect dependencies but otherwise run concurrently."""
+    events.clear()
+    lab = HookLab()
+    HookScheduler(lab).run("started")
+
+    # each hook ran exactly once
+    assert sorted(name for kind, name in events if kind == "start") == ["HookLab", "app", "db", "git", "git"]
+
+    # node dependencies
+    assert position("end", "db") < position("start", "app")
+    # independent nodes overlap
+    assert position("start", "git") < position("end", "db")
+    # `after` hints and children come before the parent's own hook
+    git_service_start = [index for index, event in enumerate(events) if event == ("start", "git")][1]
+    assert git_service_start > position("end", "app")
+    assert events[-1] == ("end", "HookLab")
+
+
+def test_scheduler_failure():
+    """Confirm failures skip dependent hooks and are raised."""
+    class FailingService(AppService):
+        nodes = {
+            "db": FailingNode,
+        }
+
+    class FailingLab(HookLab):
+        services = {
+            "app": FailingService,
+        }
+
+    events.clear()
+    scheduler = HookScheduler(FailingLab())
+    with pytest.raises(HookError, match="app/db"):
+        scheduler.run("started")
+    skipped = {timing.name for timing in scheduler.timings if timing.skipped}
+    assert skipped == {"app/app", "app", "HookLab"}
+
+
+def test_scheduler_readiness():
+    """Confirm only nodes with their own hook, or that hooks depend on, are waited for."""
+    class PlainNode(Node):
+        image = "hello-world"
+
+    class GatedService(Service):
+        nodes = {
+            "app": RecordingNode,
+            "db": PlainNode,
+            "cache": PlainNode,
+        }
+
+        dependencies = {
+            "app": [Dependency(name="db", state=DependencyState.HEALTHY)],
+        }
+
+    class GatedLab(Lab):
+        name = "GatedLab"
+        services = {
+            "service": GatedService,
+        }
+
+    events.clear()
+    readiness = Mock()
+    readiness.wait.return_value = True
+    HookScheduler(GatedLab(), readiness=readiness, ready_timeout=1).run("started")
+    assert sorted(call.args[0][0] for call in readiness.wait.call_args_list) == ["app", "db"]
+
+    # a node that exited fails without waiting for the timeout
+    readiness.wait.return_value = False
+    readiness.exited.return_value = ["db"]
+    with pytest.raises(HookError) as info:
+        HookScheduler(GatedLab(), readiness=readiness, ready_timeout=1).run("started")
+    assert "db exited before it was ready" in str(info.value.__cause__)
+
+
+def test_summary_redirected():
+    """Confirm the hook summary goes to the stdout in effect when it is printed."""
+    scheduler = HookScheduler(HookLab())
+    scheduler.timings = [HookTiming("app/db", elapsed=1.5)]
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        scheduler.print_summary("started")
+    assert "app/db" in output.getvalue()
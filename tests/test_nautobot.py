@@ -0,0 +1,223 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from lab_builder.lab import Lab
+from lab_builder.labs.common import DB
+from lab_builder.ledger import create_directory
+from lab_builder.labs.nautobot.services import (
+    DumpFormat,
+    NautobotApp,
+    NautobotService,
+    dump_format_of,
+    parse_loaddata_output,
+)
+from lab_builder.node import StepResult
+
+
+def test_parse_loaddata_output():
+    """Confirm per-file object counts are recovered from a bulk `loaddata`."""
+    fixtures = ["/fixtures/10_organization.yaml", "/fixtures/20_devices.yaml", "/fixtures/30_empty.json"]
+    output = (
+        "Loading '/fixtures/10_organization' fixtures...\n"
+        "Checking '/fixtures' for fixtures...\n"
+        "Installing yaml fixture '10_organization' from '/fixtures'.\n"
+        "\rProcessed 1 object(s).\rProcessed 2 object(s).\rProcessed 3 object(s)."
+        "Installing yaml fixture '20_devices' from '/fixtures'.\n"
+        "\rProcessed 1 object(s).\rProcessed 2 object(s).\n"
+        "Installed 5 object(s) from 2 fixture(s)\n"
+    )
+    results = parse_loaddata_output(fixtures, output)
+    assert [(result.path, result.objects) for result in results] == [
+        ("/fixtures/10_organization.yaml", 3),
+        ("/fixtures/20_devices.yaml", 2),
+        ("/fixtures/30_empty.json", 0),
+    ]
+
+
+def restore_lab(dump_path):
+    class RestoreLab(Lab):
+        name = "RestoreLab"
+        services = {
+            "nautobot": NautobotService,
+        }
+        binds = {
+            "db": [f"{dump_path}:/tmp/nautobot.sql"],
+        }
+
+    return RestoreLab
+
+
+def test_dump_format():
+    """Confirm dump formats are recognized by content, or by name when the dump isn't on the host."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dumps = {
+            "plain.sql": b"--\n-- PostgreSQL database dump\n",
+            "custom.dump": b"PGDMP\x01\x0e",
+            "compressed.sql.gz": gzip.compress(b"SELECT 1;"),
+        }
+        for name, content in dumps.items():
+            with open(os.path.join(tmp_dir, name), "wb") as dump:
+                dump.write(content)
+        assert dump_format_of("/tmp/x", os.path.join(tmp_dir, "plain.sql")) == DumpFormat.SQL
+        assert dump_format_of("/tmp/x", os.path.join(tmp_dir, "custom.dump")) == DumpFormat.CUSTOM
+        assert dump_format_of("/tmp/x", os.path.join(tmp_dir, "compressed.sql.gz")) == DumpFormat.GZIP
+        with pytest.raises(ValueError):
+            dump_format_of("/tmp/x", tmp_dir)
+        with open(os.path.join(tmp_dir, "toc.dat"), "wb") as toc:
+            toc.write(b"PGDMP")
+        assert dump_format_of("/tmp/x", tmp_dir) == DumpFormat.DIRECTORY
+    assert dump_format_of("/tmp/nautobot.sql.gz") == DumpFormat.GZIP
+    assert dump_format_of("/tmp/nautobot.dump") == DumpFormat.CUSTOM
+
+
+def test_restore_db_ledger():
+    """Confirm an unchanged dump is only restored once per database."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dump_path = os.path.join(tmp_dir, "nautobot.dump")
+        with open(dump_path, "wb") as dump:
+            dump.write(b"PGDMP version 1")
+        lab = restore_lab(dump_path)(base_dir=tmp_dir)
+        service = lab.services["nautobot"]
+        data_directory = service.nodes["db"].host_path("/var/lib/postgresql/data")
+        create_directory(data_directory)
+
+        with patch.object(DB, "run_script", autospec=True) as run_script:
+            run_script.side_effect = lambda node, steps, **_: [StepResult(step, 0, "", "", 0.1) for step in steps]
+            assert service.restore_db("/tmp/nautobot.sql")
+            restore = run_script.call_args.args[1][-1]
+            assert restore[:1] == ["pg_restore"]
+            assert restore[-3:] == ["-j", "4", "/tmp/nautobot.sql"]
+
+            assert not service.restore_db("/tmp/nautobot.sql")
+            assert run_script.call_count == 1
+
+            # a changed dump is restored
+            with open(dump_path, "wb") as dump:
+                dump.write(b"PGDMP version 2")
+            assert service.restore_db("/tmp/nautobot.sql")
+            assert run_script.call_count == 2
+
+            # so is an unchanged dump, once the database has been recreated
+            shutil.rmtree(data_directory)
+            create_directory(data_directory)
+            assert service.restore_db("/tmp/nautobot.sql")
+            assert run_script.call_count == 3
+
+
+def test_restore_db_directory_ledger():
+    """Confirm an unchanged directory format dump is only restored once."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dump_path = os.path.join(tmp_dir, "nautobot")
+        os.makedirs(dump_path)
+        for name in ["toc.dat", "3001.dat.gz"]:
+            with open(os.path.join(dump_path, name), "wb") as dump:
+                dump.write(b"PGDMP")
+        lab = restore_lab(dump_path)(base_dir=tmp_dir)
+        service = lab.services["nautobot"]
+        create_directory(service.nodes["db"].host_path("/var/lib/postgresql/data"))
+
+        with patch.object(DB, "run_script", autospec=True) as run_script:
+            run_script.side_effect = lambda node, steps, **_: [StepResult(step, 0, "", "", 0.1) for step in steps]
+            assert service.restore_db("/tmp/nautobot.sql")
+            assert not service.restore_db("/tmp/nautobot.sql")
+            assert run_script.call_count == 1
+
+            # a changed table is restored
+            with open(os.path.join(dump_path, "3001.dat.gz"), "ab") as dump:
+                dump.write(b"more rows")
+            assert service.restore_db("/tmp/nautobot.sql")
+            assert run_script.call_count == 2
+
+
+def test_restore_db_not_a_dump():
+    """Confirm the database isn't dropped for a directory that isn't a directory format dump."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dump_path = os.path.join(tmp_dir, "nautobot")
+        os.makedirs(dump_path)
+        lab = restore_lab(dump_path)(base_dir=tmp_dir)
+        with patch.object(DB, "run_script", autospec=True) as run_script:
+            assert not lab.services["nautobot"].restore_db("/tmp/nautobot.sql")
+            run_script.assert_not_called()
+
+
+def test_fixture_ledger():
+    """Confirm only new and changed fixtures are loaded into the same database."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixtures = os.path.join(tmp_dir, "fixtures")
+        os.makedirs(fixtures)
+        for name in ["10_first.yaml", "20_second.yaml"]:
+            with open(os.path.join(fixtures, name), "w", encoding="utf-8") as fixture:
+                fixture.write(f"# {name}\n")
+
+        class FixtureLab(Lab):
+            name = "FixtureLab"
+            services = {
+                "nautobot": NautobotService,
+            }
+            binds = {
+                "nautobot": [f"{fixtures}/*:/fixtures"],
+            }
+
+        lab = FixtureLab(base_dir=tmp_dir)
+        nautobot = lab.services["nautobot"].nodes["nautobot"]
+        data_directory = lab.services["nautobot"].nodes["db"].host_path("/var/lib/postgresql/data")
+        create_directory(data_directory)
+        loaded = []
+
+        def run_script(node, steps, **_):
+            loaded.append(steps[0][4:])
+            return [StepResult(steps[0], 0, "", "", 0.1)]
+
+        with (
+            patch.object(NautobotApp, "list_dir", return_value=sorted(os.listdir(fixtures))),
+            patch.object(NautobotApp, "run_script", autospec=True, side_effect=run_script),
+        ):
+            nautobot.load_fixtures()
+            assert loaded[-1] == ["/fixtures/10_first.yaml", "/fixtures/20_second.yaml"]
+
+            assert nautobot.load_fixtures() == []
+            assert len(loaded) == 1
+
+            with open(os.path.join(fixtures, "20_second.yaml"), "a", encoding="utf-8") as fixture:
+                fixture.write("# changed\n")
+            nautobot.load_fixtures()
+            assert loaded[-1] == ["/fixtures/20_second.yaml"]
+
+            # a new database needs every fixture
+            shutil.rmtree(data_directory)
+            create_directory(data_directory)
+            nautobot.load_fixtures()
+            assert loaded[-1] == ["/fixtures/10_first.yaml", "/fixtures/20_second.yaml"]
+
+            # as does a restored one
+            nautobot.forget_fixtures()
+            nautobot.load_fixtures()
+            assert len(loaded) == 4
+
+
+def test_load_fixtures_script_failure(capsys):
+    """Confirm a script that produces no result falls back to loading the fixtures one at a time."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        class FixtureLab(Lab):
+            name = "FixtureLab"
+            services = {
+                "nautobot": NautobotService,
+            }
+
+        nautobot = FixtureLab(base_dir=tmp_dir).services["nautobot"].nodes["nautobot"]
+        with (
+            patch.object(NautobotApp, "list_dir", return_value=["10_first.yaml", "20_second.yaml"]),
+            patch.object(NautobotApp, "fixture_digest", return_value=None),
+            patch.object(NautobotApp, "run_script", return_value=[]),
+            patch.object(NautobotApp, "load_fixture", return_value={"return-code": 0}) as load_fixture,
+        ):
+            results = nautobot.load_fixtures()
+        assert [result.path for result in results] == ["/fixtures/10_first.yaml", "/fixtures/20_second.yaml"]
+        assert all(result.ok for result in results)
+        assert load_fixture.call_count == 2
+        assert "one at a time" in capsys.readouterr().err
@@ -0,0 +1,91 @@
+import subprocess
+import tempfile
+import json
+from unittest.mock import Mock, patch
+
+from lab_builder.lab import Lab, Service
+from lab_builder.node import Node, Step, build_script, parse_script_output
+
+
+class ScriptNode(Node):
+    """A node that runs its "container" commands in a local shell."""
+    image = "hello-world"
+
+    def _exec(self, shell_command):
+        process = subprocess.run(shell_command, shell=True, capture_output=True, text=True)
+        return {"return-code": process.returncode, "stdout": process.stdout, "stderr": process.stderr}
+
+
+def test_run_script():
+    """Confirm that every step of a script reports its own results."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        node = ScriptNode(name="node", parent=None, base_dir=tmp_dir)
+        results = node.run_script([
+            ["echo", "hello world"],
+            Step(["pwd"], working_directory=tmp_dir),
+            ["sh", "-c", "echo oops >&2; exit 3"],
+            ["echo", "never"],
+        ], stderr=None)
+
+    assert [result.return_code for result in results] == [0, 0, 3]
+    assert results[0].stdout == "hello world\n"
+    assert results[1].stdout == f"{tmp_dir}\n"
+    assert results[2].stderr == "oops\n"
+    assert not results[2].ok
+    assert all(result.elapsed >= 0 for result in results)
+
+
+def test_run_script_continue_on_error():
+    """Confirm that all of the steps run when `stop_on_error` is disabled."""
+    node = ScriptNode(name="node", parent=None)
+    results = node.run_script(["false", "true"], stop_on_error=False, stderr=None)
+    assert [result.return_code for result in results] == [1, 0]
+
+
+def test_run_script_single_exec():
+    """Confirm that a script is shipped to the node in one exec."""
+    with patch.object(ScriptNode, "_exec", autospec=True) as _exec:
+        _exec.return_value = {"return-code": 0, "stdout": "", "stderr": ""}
+        node = ScriptNode(name="node", parent=None)
+        node.run_script([["true"], ["true"], ["true"]])
+        assert _exec.call_count == 1
+
+
+def test_exec_cli_filters_by_lab():
+    """Confirm the containerlab exec fallback only matches the node of its own lab."""
+    class ExecNode(Node):
+        image = "hello-world"
+
+    class ExecService(Service):
+        nodes = {"node": ExecNode}
+
+    class ExecLab(Lab):
+        name = "ExecLab"
+        services = {"service": ExecService}
+
+    lab = ExecLab()
+    lab.engine = None
+    result = {"return-code": 0, "stdout": "", "stderr": ""}
+    with patch("lab_builder.lab.Lab.run_clab_cmd", return_value=Mock(stdout=json.dumps({"node": [result]}))) as clab:
+        assert lab.services["service"].nodes["node"]._exec("true") == result
+    cmd = clab.call_args.args[0]
+    assert cmd[cmd.index("containerlab=ExecLab") - 1] == "--label"
+    assert "clab-node-name=node" in cmd
+
+
+def test_parse_script_output():
+    """Confirm the script output is framed so step output can't be confused with markers."""
+    steps = [Step(["printf", "@@lab_builder-end\n"])]
+    output = subprocess.run(["sh", "-c", build_script(steps)], capture_output=True, text=True).stdout
+    results = parse_script_output(steps, output)
+    assert results[0].stdout == "@@lab_builder-end\n"
+
+
+def test_host_path():
+    """Confirm container paths are mapped through the most specific bind."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        node = ScriptNode(name="node", parent=None, base_dir=tmp_dir, binds=["data:/data", "/etc/hosts:/data/hosts:ro"])
+        assert node.host_path("/data/db/file") == f"{node.state_directory}/data/db/file"
+        assert node.host_path("/data") == f"{node.state_directory}/data"
+        assert node.host_path("/data/hosts") == "/etc/hosts"
+        assert node.host_path("/database") is None
@@ -0,0 +1,176 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock, PropertyMock, patch
+
+from lab_builder.lab import Lab, Service
+from lab_builder.node import HealthCheck, Node
+from lab_builder.readiness import ReadinessWatcher, parse_time
+
+
+class PlainNode(Node):
+    image = "hello-world"
+
+
+class HealthyNode(Node):
+    image = "hello-world"
+    health_check = HealthCheck(test=["CMD", "true"])
+
+
+class ReadinessService(Service):
+    nodes = {
+        "plain": PlainNode,
+        "healthy": HealthyNode,
+    }
+
+
+class ReadinessLab(Lab):
+    name = "ReadinessLab"
+    services = {
+        "service": ReadinessService,
+    }
+
+
+def event(name, action, seconds):
+    return {
+        "Type": "container",
+        "Action": action,
+        "Actor": {"Attributes": {"clab-node-name": name, "containerlab": "ReadinessLab"}},
+        "timeNano": int(seconds * 1e9),
+    }
+
+
+def test_parse_time():
+    """Confirm Docker timestamps (with nanoseconds) are parsed."""
+    assert parse_time("1970-01-01T00:00:10.500000000Z") == 10.5
+    assert parse_time("1970-01-01T01:00:10+01:00") == 10
+    assert parse_time("") is None
+
+
+def test_readiness_events():
+    """Confirm nodes become ready when running, or healthy when they have a health check."""
+    watcher = ReadinessWatcher(ReadinessLab())
+    for name in ["plain", "healthy"]:
+        watcher.handle_event(event(name, "create", 100))
+        watcher.handle_event(event(name, "start", 101))
+    assert watcher.nodes["plain"].ready
+    assert not watcher.nodes["healthy"].ready
+
+    watcher.handle_event(event("healthy", "health_status: healthy", 130))
+    assert watcher.nodes["healthy"].ready
+    assert watcher.startup_times() == {"plain": 1.0, "healthy": 30.0}
+
+    watcher.handle_event(event("healthy", "die", 140))
+    assert not watcher.nodes["healthy"].ready
+
+
+def test_wait():
+    """Confirm waiting returns as soon as the nodes are ready, or times out."""
+    lab = ReadinessLab()
+    lab.engine = None
+    watcher = ReadinessWatcher(lab)
+    # no containers exist, so polling never finds them ready
+    lab.query_containers = lambda: {}
+    assert watcher.wait(["plain"], timeout=0.1) is False
+
+    def become_healthy():
+        time.sleep(0.1)
+        watcher.update("healthy", "healthy")
+
+    thread = threading.Thread(target=become_healthy)
+    thread.start()
+    start = time.monotonic()
+    assert watcher.wait(["healthy"], timeout=5) is True
+    assert time.monotonic() - start < 5
+    thread.join()
+    # nothing is watching any more, so the watcher stopped
+    assert watcher._thread is None
+
+
+def test_wait_exited():
+    """Confirm waiting for a node whose container exited fails without waiting for the timeout."""
+    lab = ReadinessLab()
+    lab.engine = None
+    lab.query_containers = lambda: {}
+    watcher = ReadinessWatcher(lab, exit_grace=0.1)
+    watcher.update("plain", "exited")
+    start = time.monotonic()
+    assert watcher.wait(["plain"], timeout=5) is False
+    assert time.monotonic() - start < 5
+    assert watcher.exited(["plain", "healthy"]) == ["plain"]
+
+    # a container that is recreated within the grace period is waited for
+    watcher.update("healthy", "exited")
+    threading.Timer(0.05, watcher.update, ["healthy", "healthy"]).start()
+    assert watcher.wait(["healthy"], timeout=5) is True
+
+
+def test_watching():
+    """Confirm the watcher runs until the last caller stops watching, and leaves the lab's snapshot alone."""
+    lab = ReadinessLab()
+    lab.engine = None
+    polled = threading.Event()
+
+    def query_containers():
+        polled.set()
+        return {"plain": {"name": "clab-ReadinessLab-plain", "state": "running", "status": "Up 1 second"}}
+
+    lab.query_containers = query_containers
+    lab._inspection = snapshot = {"containers": []}
+    watcher = ReadinessWatcher(lab, poll_interval=0.01)
+    with watcher.watching():
+        with watcher.watching():
+            assert polled.wait(5)
+        assert watcher._thread is not None
+    assert watcher._thread is None
+    assert watcher.nodes["plain"].ready
+    assert lab._inspection is snapshot
+
+
+def test_wait_seeds_once():
+    """Confirm waiting for each node doesn't inspect every container again."""
+    lab = ReadinessLab()
+    lab.engine = Mock()
+    closed = threading.Event()
+
+    class Stream:
+        def __iter__(self):
+            closed.wait(5)
+            return iter([])
+
+        def close(self):
+            closed.set()
+
+    lab.engine.events.side_effect = lambda filters: Stream()
+    lab.engine.inspect_container.return_value = {"State": {"Status": "running"}}
+    lab.query_containers = lambda: {
+        name: {"name": f"clab-ReadinessLab-{name}"} for name in ["plain", "healthy"]
+    }
+    watcher = ReadinessWatcher(lab)
+    with watcher.watching():
+        for _ in range(5):
+            assert watcher.wait(["plain"], timeout=1)
+    assert lab.engine.inspect_container.call_count == 2
+
+
+def test_runner_wait(capsys):
+    """Confirm `wait` refuses unknown nodes and stopped labs instead of blocking."""
+    from lab_builder.runner import LabRunner
+
+    runner = LabRunner.__new__(LabRunner)
+    runner.lab = ReadinessLab()
+    runner.lab.readiness.wait = Mock(return_value=True)
+    with patch.object(ReadinessLab, "running", new_callable=PropertyMock, return_value=False):
+        runner.do_wait(SimpleNamespace(arg_list=["plain"]))
+    assert "is not running" in capsys.readouterr().out
+
+    with (
+        patch.object(ReadinessLab, "running", new_callable=PropertyMock, return_value=True),
+        patch.object(ReadinessLab, "needs_reconfigure", new_callable=PropertyMock, return_value=False),
+    ):
+        runner.do_wait(SimpleNamespace(arg_list=["plain", "typo"]))
+        assert "unknown nodes typo" in capsys.readouterr().out
+        runner.lab.readiness.wait.assert_not_called()
+
+        runner.do_wait(SimpleNamespace(arg_list=["plain"]))
+        runner.lab.readiness.wait.assert_called_once_with(["plain"], timeout=ReadinessLab.ready_timeout)
@@ -0,0 +1,122 @@
+import os
+import subprocess
+import tempfile
+from unittest.mock import Mock, patch
+
+import pytest
+
+from lab_builder.lab import Lab, Service
+from lab_builder.ledger import directory_identity
+from lab_builder.node import Node
+from lab_builder.snapshot import SnapshotError
+
+
+class DataNode(Node):
+    image = "hello-world"
+    binds = ["data:/data"]
+
+
+class DataService(Service):
+    nodes = {
+        "db": DataNode,
+        "cache": DataNode,
+    }
+
+
+class SnapshotLab(Lab):
+    name = "SnapshotLab"
+    services = {
+        "service": DataService,
+    }
+
+
+def run_cmd(cmd, **kwargs):
+    """Run the snapshot commands without `sudo`."""
+    kwargs.setdefault("check", True)
+    return subprocess.run(cmd[1:] if cmd[0] == "sudo" else cmd, **kwargs)
+
+
+def data_file(lab, node_name):
+    return os.path.join(lab.services["service"].nodes[node_name].host_path("/data"), "file")
+
+
+def test_snapshot_restore():
+    """Confirm a snapshot brings back the node directories it captured."""
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        patch("lab_builder.lab.Lab.run_cmd", side_effect=run_cmd),
+        patch("lab_builder.lab.Lab.inspect", return_value={"containers": []}),
+    ):
+        lab = SnapshotLab(base_dir=tmp_dir)
+        os.makedirs(lab.state_directory)
+        lab.services["service"].start()
+        for node_name in ["db", "cache"]:
+            with open(data_file(lab, node_name), "w", encoding="utf-8") as file:
+                file.write("seeded")
+        with open(os.path.join(lab.services["service"].state_directory, "ledger.json"), "w", encoding="utf-8") as file:
+            file.write("{}")
+        identity = directory_identity(lab.services["service"].nodes["db"].host_path("/data"))
+
+        snapshot = lab.snapshots.take("seeded", ["service/db"])
+        assert snapshot["nodes"] == ["service/db"]
+        assert [snapshot["name"] for snapshot in lab.snapshots.available()] == ["seeded"]
+        with pytest.raises(SnapshotError):
+            lab.snapshots.take("seeded")
+
+        lab.destroy()
+        assert not os.path.exists(lab.state_directory)
+        lab.snapshots.restore("seeded")
+        with open(data_file(lab, "db"), encoding="utf-8") as file:
+            assert file.read() == "seeded"
+        assert not os.path.exists(data_file(lab, "cache"))
+        assert os.path.exists(os.path.join(lab.services["service"].state_directory, "ledger.json"))
+        # the restored data directory is the one the ledgers were recorded against
+        assert directory_identity(lab.services["service"].nodes["db"].host_path("/data")) == identity
+
+
+def test_restore_running():
+    """Confirm snapshots aren't restored over running containers."""
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        patch("lab_builder.lab.Lab.run_cmd", side_effect=run_cmd),
+        patch("lab_builder.lab.Lab.inspect", return_value={"containers": []}) as inspect,
+    ):
+        lab = SnapshotLab(base_dir=tmp_dir)
+        os.makedirs(lab.state_directory)
+        lab.services["service"].start()
+        lab.snapshots.take("seeded")
+        inspect.return_value = {"containers": [{"lab_name": "SnapshotLab", "name": "clab-SnapshotLab-db"}]}
+        with pytest.raises(SnapshotError):
+            lab.snapshots.restore("seeded")
+        with pytest.raises(SnapshotError):
+            lab.snapshots.restore("missing")
+
+
+def test_pause_failure():
+    """Confirm a failure to pause a container unpauses the containers that were paused."""
+    lab = SnapshotLab()
+    lab.engine = Mock()
+    lab.engine.pause.side_effect = [None, RuntimeError("boom")]
+    containers = [{"lab_name": "SnapshotLab", "name": f"clab-SnapshotLab-{name}"} for name in ["db", "cache"]]
+    with patch("lab_builder.lab.Lab.inspect", return_value={"containers": containers}):
+        with pytest.raises(RuntimeError):
+            with lab.snapshots._paused(list(lab.nodes)):
+                pass
+    lab.engine.unpause.assert_called_once_with(lab.engine.pause.call_args_list[0].args[0])
+
+
+def test_delete():
+    """Confirm snapshots can be deleted."""
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        patch("lab_builder.lab.Lab.run_cmd", side_effect=run_cmd),
+        patch("lab_builder.lab.Lab.inspect", return_value={"containers": []}),
+    ):
+        lab = SnapshotLab(base_dir=tmp_dir)
+        os.makedirs(lab.state_directory)
+        lab.services["service"].start()
+        lab.snapshots.take("seeded")
+        lab.snapshots.delete("seeded")
+        assert lab.snapshots.available() == []
+        with pytest.raises(SnapshotError):
+            lab.snapshots.delete("seeded")
@@ -0,0 +1,257 @@
+from contextlib import redirect_stdout
+import copy
+import io
+import json
+import os
+import subprocess
+import tempfile
+from unittest.mock import Mock, patch
+
+from lab_builder.lab import Lab, Service
+from lab_builder.node import Node
+from lab_builder.topology import diff_topologies, iter_topology, read_manifest
+
+
+class TopologyNode(Node):
+    image = "hello-world"
+
+
+class TopologyService(Service):
+    nodes = {
+        "node1": TopologyNode,
+        "node2": TopologyNode,
+        "node3": TopologyNode,
+    }
+
+    links = {
+        "node1": {"eth1": "node2:eth1"},
+    }
+
+
+class TopologyLab(Lab):
+    name = "TopologyLab"
+    services = {
+        "service": TopologyService,
+    }
+
+
+def test_diff_unchanged():
+    """Confirm identical topologies have no differences."""
+    topology = TopologyLab().topology
+    assert not diff_topologies(topology, copy.deepcopy(topology))
+
+
+def test_diff_nodes():
+    """Confirm only the nodes that differ are reported."""
+    old = TopologyLab().topology
+    new = copy.deepcopy(old)
+    new["topology"]["nodes"]["node3"]["env"] = {"KEY": "value"}
+    new["topology"]["nodes"]["node4"] = new["topology"]["nodes"].pop("node2")
+    new["topology"]["links"] = []
+
+    diff = diff_topologies(old, new)
+    assert diff.added == {"node4"}
+    assert diff.removed == {"node2"}
+    # node1 lost its link to node2
+    assert diff.changed == {"node1", "node3"}
+    assert diff.recreate == ["node1", "node3", "node4"]
+    assert diff.destroy == ["node1", "node2", "node3"]
+    assert not diff.full
+
+
+def test_diff_full():
+    """Confirm management network changes require a full redeploy."""
+    old = TopologyLab().topology
+    new = copy.deepcopy(old)
+    new["mgmt"] = {"network": "custom_mgmt", "ipv4-subnet": "172.100.100.0/24"}
+    assert diff_topologies(old, new).full
+
+
+def test_incremental_start():
+    """Confirm a running lab only recreates the nodes that changed."""
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        patch("lab_builder.lab.Lab.run_clab_cmd") as run_clab_cmd,
+        patch("lab_builder.lab.DockerEngine.from_environment", return_value=None),
+        patch("lab_builder.lab.HookScheduler"),
+        patch("lab_builder.lab.ReadinessWatcher"),
+    ):
+        lab = TopologyLab(base_dir=tmp_dir)
+        containers = [
+            {"lab_name": "TopologyLab", "name": f"clab-TopologyLab-{node.name}", "labPath": lab.topology_file}
+            for node in lab.nodes
+        ]
+        run_clab_cmd.return_value = Mock(stdout=json.dumps({"containers": containers}))
+        lab.start()
+        # the lab was already running, nothing was deployed
+        assert run_clab_cmd.call_count == 1
+
+        node = lab.services["service"].nodes["node2"]
+        node.environment["KEY"] = "value"
+        assert lab.needs_reconfigure
+        lab.start()
+        commands = [call.args[0][:4] for call in run_clab_cmd.call_args_list if call.args[0][0] != "inspect"]
+        assert commands == [
+            ["destroy", "--topo", lab.topology_file, "--node-filter"],
+            ["deploy", "--topo", lab.topology_file, "--node-filter"],
+        ]
+        # node1 is unchanged, but it is linked to node2, and destroying node2
+        # removed their link, so node1 is recreated along with it
+        assert run_clab_cmd.call_args_list[-2].args[0][-1] == "node1,node2"
+        assert run_clab_cmd.call_args_list[-1].args[0][-1] == "node1,node2"
+        assert not lab.needs_reconfigure
+
+        # a node without links is recreated on its own
+        node = lab.services["service"].nodes["node3"]
+        node.environment["KEY"] = "value"
+        run_clab_cmd.reset_mock()
+        lab.start()
+        assert run_clab_cmd.call_args_list[-1].args[0][1:] == ["--topo", lab.topology_file, "--node-filter", "node3"]
+
+
+def test_incremental_start_missing_container():
+    """Confirm the whole lab is redeployed when an unchanged node's container is missing."""
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        patch("lab_builder.lab.Lab.run_clab_cmd") as run_clab_cmd,
+        patch("lab_builder.lab.DockerEngine.from_environment", return_value=None),
+        patch("lab_builder.lab.HookScheduler"),
+        patch("lab_builder.lab.ReadinessWatcher"),
+    ):
+        lab = TopologyLab(base_dir=tmp_dir)
+        containers = [
+            {"lab_name": "TopologyLab", "name": f"clab-TopologyLab-{node.name}", "labPath": lab.topology_file}
+            for node in lab.nodes
+        ]
+        run_clab_cmd.return_value = Mock(stdout=json.dumps({"containers": containers}))
+        with redirect_stdout(io.StringIO()):
+            lab.start()
+            # node1's container is gone
+            run_clab_cmd.return_value = Mock(stdout=json.dumps({"containers": containers[1:]}))
+            node = lab.services["service"].nodes["node3"]
+            node.environment["KEY"] = "value"
+            lab.start()
+        assert run_clab_cmd.call_args_list[-1].args[0] == ["deploy", "--topo", lab.topology_file, "--reconfigure"]
+
+
+def test_incremental_start_fallback():
+    """Confirm the whole lab is redeployed when containerlab refuses a partial deploy."""
+    def run_clab_cmd(cmd, cmd_input=None):
+        if cmd[0] == "deploy" and "--node-filter" in cmd:
+            raise subprocess.CalledProcessError(1, cmd)
+        return Mock(stdout=json.dumps({"containers": containers}))
+
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        patch("lab_builder.lab.Lab.run_clab_cmd", side_effect=run_clab_cmd) as clab,
+        patch("lab_builder.lab.DockerEngine.from_environment", return_value=None),
+        patch("lab_builder.lab.HookScheduler"),
+        patch("lab_builder.lab.ReadinessWatcher"),
+    ):
+        lab = TopologyLab(base_dir=tmp_dir)
+        containers = [
+            {"lab_name": "TopologyLab", "name": f"clab-TopologyLab-{node.name}", "labPath": lab.topology_file}
+            for node in lab.nodes
+        ]
+        with redirect_stdout(io.StringIO()):
+            lab.start()
+            node = lab.services["service"].nodes["node3"]
+            node.environment["KEY"] = "value"
+            lab.start()
+        assert clab.call_args_list[-1].args[0] == ["deploy", "--topo", lab.topology_file, "--reconfigure"]
+
+
+def test_diff_peers():
+    """Confirm only the nodes directly linked to a changed node are recreated with it."""
+    old = TopologyLab().topology
+    old["topology"]["nodes"]["node4"] = copy.deepcopy(old["topology"]["nodes"]["node3"])
+    old["topology"]["links"].append({"endpoints": ["node2:eth2", "node4:eth1"]})
+    new = copy.deepcopy(old)
+    new["topology"]["nodes"]["node1"]["env"] = {"KEY": "value"}
+
+    diff = diff_topologies(old, new)
+    assert diff.changed == {"node1"}
+    assert diff.peers == {"node2"}
+    assert diff.recreate == diff.destroy == ["node1", "node2"]
+    # node4 keeps running, its link to node2 is created again
+    assert diff.relink == [("node2:eth2", "node4:eth1")]
+
+
+def test_diff_leaf_spine():
+    """Confirm changing a leaf of a leaf/spine fabric leaves the other leaves running."""
+    nodes = {name: {"kind": "linux", "image": "hello-world"} for name in ["spine1", "spine2", "leaf1", "leaf2", "leaf3"]}
+    links = [
+        {"endpoints": [f"{spine}:eth{leaf}", f"leaf{leaf}:eth{spine[-1]}"]}
+        for spine in ["spine1", "spine2"]
+        for leaf in range(1, 4)
+    ]
+    old = {"name": "fabric", "topology": {"nodes": nodes, "links": links}}
+    new = copy.deepcopy(old)
+    new["topology"]["nodes"]["leaf1"]["env"] = {"KEY": "value"}
+
+    diff = diff_topologies(old, new)
+    assert diff.recreate == diff.destroy == ["leaf1", "spine1", "spine2"]
+    assert diff.relink == [
+        ("leaf2:eth1", "spine1:eth2"),
+        ("leaf2:eth2", "spine2:eth2"),
+        ("leaf3:eth1", "spine1:eth3"),
+        ("leaf3:eth2", "spine2:eth3"),
+    ]
+
+
+def test_topology_cache():
+    """Confirm the topology is only regenerated after a definition changes."""
+    lab = TopologyLab()
+    with patch.object(TopologyNode, "as_dict", autospec=True, side_effect=TopologyNode.as_dict) as as_dict:
+        assert lab.topology_str == lab.topology_str
+        assert as_dict.call_count == 3
+
+        node = lab.services["service"].nodes["node1"]
+        node.mgmt_ipv4 = "172.100.100.2"
+        assert lab.topology["topology"]["nodes"]["node1"]["mgmt-ipv4"] == "172.100.100.2"
+        assert as_dict.call_count == 6
+
+        # changing an attribute in place also regenerates the topology
+        digest = lab.topology_digest
+        node.binds.append("/tmp:/tmp")
+        assert "/tmp:/tmp" in lab.topology["topology"]["nodes"]["node1"]["binds"]
+        assert as_dict.call_count == 9
+        assert lab.topology_digest != digest
+
+        node.environment["KEY"] = "value"
+        assert lab.topology["topology"]["nodes"]["node1"]["env"]["KEY"] == "value"
+        assert as_dict.call_count == 12
+
+
+def test_iter_topology():
+    """Confirm the streamed topology matches `json.dumps`, indented or compact."""
+    topology = TopologyLab().topology
+    assert "".join(iter_topology(topology)) == json.dumps(topology, indent=2)
+    assert "".join(iter_topology(topology, compact=True)) == json.dumps(topology, separators=(",", ":"))
+
+
+def test_topology_manifest():
+    """Confirm a written topology is recognized by its manifest's digest."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lab = TopologyLab(base_dir=tmp_dir)
+        lab.compact_topology = True
+        os.makedirs(lab.state_directory)
+        lab.write_topology()
+        with open(lab.topology_file, encoding="utf-8") as topology_file:
+            assert json.load(topology_file) == lab.topology
+        manifest = read_manifest(lab.topology_file)
+        assert manifest["digest"] == lab.topology_digest
+
+        with patch("lab_builder.lab.json") as lab_json:
+            assert not lab.needs_reconfigure
+            node = lab.services["service"].nodes["node3"]
+            node.environment["KEY"] = "value"
+            assert lab.topology_diff.changed == {"node3"}
+            # the manifest was enough, the topology file wasn't read
+            lab_json.load.assert_not_called()
+
+        # editing the topology file makes the manifest stale
+        with open(lab.topology_file, "a", encoding="utf-8") as topology_file:
+            topology_file.write("\n")
+        assert read_manifest(lab.topology_file) is None
+        assert lab.topology_diff.changed == {"node3"}
@@ -0,0 +1,90 @@
+import glob
+import json
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+import pytest
+
+from lab_builder.lab import Lab, Service
+from lab_builder.node import Node
+from lab_builder.tracing import Tracer
+
+
+def test_spans():
+    """Confirm spans are recorded, even when the traced code fails."""
+    tracer = Tracer()
+    with tracer.span("containerlab deploy", "containerlab", cmd="deploy --topo lab.json"):
+        pass
+    with pytest.raises(ValueError):
+        with tracer.span("containerlab deploy", "containerlab"):
+            raise ValueError("boom")
+
+    assert [span.name for span in tracer.spans] == ["containerlab deploy", "containerlab deploy"]
+    assert tracer.spans[0].args == {"cmd": "deploy --topo lab.json"}
+    assert tracer.spans[1].args == {"error": "boom"}
+    assert tracer.summary()[0][:3] == ("containerlab", "containerlab deploy", 2)
+
+    event = tracer.chrome_trace()["traceEvents"][0]
+    assert event["ph"] == "X"
+    assert event["name"] == "containerlab deploy"
+    assert event["dur"] >= 0
+
+
+def test_spans_bounded():
+    """Confirm only the most recent spans are kept, while the summary covers them all."""
+    tracer = Tracer(max_spans=3)
+    for index in range(5):
+        with tracer.span(f"exec {index % 2}", "exec"):
+            pass
+    assert [span.name for span in tracer.spans] == ["exec 0", "exec 1", "exec 0"]
+    assert len(tracer.chrome_trace()["traceEvents"]) == 3
+    assert {row[1]: row[2] for row in tracer.summary()} == {"exec 0": 3, "exec 1": 2}
+
+
+def test_trace_files_pruned():
+    """Confirm only the most recent trace files are kept."""
+    tracer = Tracer()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = [tracer.write(tmp_dir, since=1_700_000_000 + seconds, keep=3) for seconds in range(5)]
+        assert sorted(glob.glob(os.path.join(tmp_dir, "trace-*.json"))) == paths[2:]
+
+
+class TracedNode(Node):
+    image = "hello-world"
+
+
+class TracedService(Service):
+    nodes = {
+        "node": TracedNode,
+    }
+
+
+class TracedLab(Lab):
+    name = "TracedLab"
+    services = {
+        "service": TracedService,
+    }
+
+
+def test_start_trace():
+    """Confirm starting a lab writes a trace of the deploy and hooks."""
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        patch("lab_builder.lab.Lab.run_cmd") as run_cmd,
+        patch("lab_builder.lab.DockerEngine.from_environment", return_value=None),
+        patch("lab_builder.lab.ReadinessWatcher"),
+    ):
+        run_cmd.return_value = Mock(stdout=json.dumps({"containers": []}))
+        lab = TracedLab(base_dir=tmp_dir)
+        lab.start()
+
+        traces = glob.glob(os.path.join(lab.state_directory, "trace-*.json"))
+        assert len(traces) == 1
+        with open(traces[0]) as file:
+            trace = json.load(file)
+    names = [event["name"] for event in trace["traceEvents"]]
+    assert names[0] == "start"
+    assert "containerlab deploy" in names
+    assert "started service/node" in names
+    assert trace["otherData"]["lab"] == "TracedLab"